@@ -1,121 +1,85 @@
 import asyncio
+import contextlib
 import os
-import sys
 import logging
+import threading
+import time
+import uuid
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-# Set telemetry variable early
-os.environ["ANONYMIZED_TELEMETRY"] = "False"
-
-# Optionally load .env before browser_use config executes
-from dotenv import load_dotenv
-dotenv_path = os.path.join(os.path.dirname(__file__), 'secrets.env')
-load_dotenv(dotenv_path)
-
-# Create custom Streamlit logging handler that supports streaming via st.chat_message
-class StreamlitHandler(logging.Handler):
-    def __init__(self, placeholder=None):
-        super().__init__()
-        # placeholder is no longer used for buffering log lines
-        self.log_placeholder = placeholder
-    def emit(self, record):
-        log_entry = self.format(record)
-        # Each log entry is streamed as a new assistant chat message
-        with st.chat_message("assistant"):
-            st.write(log_entry)
-
-# Setup custom logging BEFORE importing browser_use modules
-# Create handler without a placeholder initially
-streamlit_handler = StreamlitHandler(placeholder=None)
-streamlit_handler.setLevel(logging.INFO)
-# formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-formatter = logging.Formatter('%(message)s')
-streamlit_handler.setFormatter(formatter)
+from approvals import ApprovalQueue
+from recording import recorder_from_env
+from redaction import SecretRedactionFilter, install_redaction
+from streamlit_logging import StreamlitHandler
+from trace_cache import TraceCache
 
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-console_handler.setFormatter(formatter)
+# Streamlit re-executes this file on every interaction, so the module level only
+# holds what a rerun needs. browser_use (about 3 s to import) and langchain_openai
+# (about 1.5 s) are imported by the getters below that build the agent's pieces,
+# on the first task. Env, logging and redaction are set up once per process
+# (setup_process). Unless AGENT_WARMUP=0, the first page load also starts a
+# background thread that builds the browser pool, the LLM client and the
+# controller, so the first task usually finds them ready (start_warmup).
 
-# Clear existing root logger handlers and add our handler
-root_logger = logging.getLogger()
-root_logger.handlers = []
-root_logger.addHandler(streamlit_handler)
-root_logger.addHandler(console_handler)
-root_logger.setLevel(logging.INFO)
+DOTENV_PATH = os.path.join(os.path.dirname(__file__), 'secrets.env')
 
-# Import browser_use modules (they may set up their own loggers)
-from browser_use.browser.browser import Browser
-from langchain_openai import ChatOpenAI
-from browser_use import Agent, SystemPrompt
-from browser_use.browser.context import BrowserContextConfig, BrowserContext
+logger = logging.getLogger(__name__)
 
-# Force browser_use logger to propagate (so our handler sees its logs)
-browser_use_logger = logging.getLogger("browser_use")
-browser_use_logger.propagate = True
+# Log records from a run are streamed into the page by a per-run StreamlitHandler
+# (streamlit_logging.py); the formatter is shared with the console handler
+# formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+formatter = logging.Formatter('%(message)s')
+root_logger = logging.getLogger()
+
+# Once per process: telemetry off and secrets.env loaded before browser_use is
+# imported, our console handler on the root logger (browser_use then skips its
+# own logging setup), and secret redaction. Returns the sensitive data.
+@st.cache_resource(show_spinner=False)
+def setup_process():
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"
+    from dotenv import load_dotenv
+    load_dotenv(DOTENV_PATH)
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.setFormatter(formatter)
+    root_logger.handlers = [console_handler]
+    root_logger.setLevel(logging.INFO)
+
+    sensitive_data = {
+        'email': os.getenv('EMAIL'),
+        'email_password': os.getenv('EMAILPASSWORD'),
+        'banking_username': os.getenv('BANKINGUSERNAME'),
+        'banking_password': os.getenv('BANKINGPASSWORD')
+    }
+    # Never let the real values reach a log handler (console, page, profiles); see redaction.py
+    install_redaction(sensitive_data)
+    return sensitive_data
+
+sensitive_data = setup_process()
+
+# Import browser_use (on first use) with its log records reaching the page handler
+def import_browser_use():
+    import browser_use
+    logging.getLogger("browser_use").propagate = True
+    return browser_use
 
 # Set ProactorEventLoop on Windows
 if __name__ == "__main__" and os.name == "nt":
     asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-# Load environment variables
-dotenv_path = os.path.join(os.path.dirname(__file__), 'secrets.env')
-load_dotenv(dotenv_path)
-
-os.environ["OPENAI_API_KEY"] = os.getenv('OPENAI_API_KEY')
-
-# Define sensitive data
-sensitive_data = {
-    'email': os.getenv('EMAIL'),
-    'email_password': os.getenv('EMAILPASSWORD'),
-    'banking_username': os.getenv('BANKINGUSERNAME'),
-    'banking_password': os.getenv('BANKINGPASSWORD')
-}
-
-# Define custom SystemPrompt
-class MySystemPrompt(SystemPrompt):
-    def important_rules(self) -> str:
-        existing_rules = super().important_rules()
-        new_rules = """
-        You are a helpful navigation and action assistant.
-        You must follow the user instructions exactly and must validate you are always obeying the instructions in the order the user specified.
-        When scrolling in tabs with multiple sections you must make sure you CLICK ON THE SECTION YOU ARE TRYING TO SCROLL IN.
-        If you get stuck, go back to the top of the page. 
-        """
-        return f'{existing_rules}\n{new_rules}'
-
 test_steps = ""
 
-dummy_fa_app_ux_test_framework_task = f"""
-You are are helpful robotic process automation tester. 
-I will provide you with a task that you are to test on a given app. 
-
-You must always start by going to http://localhost:8501/ and logging in with my username and password for the banking site, and always finish with logging out of the site after the below steps are complete.
-
-Here is the specific test goal and the steps you should take:
-"""
-
-ux_test_buy_enough_task = """
-You are testing a financial advisor order entry system. You are to test the ability to buy shares for a client if they have enough funds.
-- Buy 20 shares of Morgan Stanley for Client B.
-- Ensure that the transaction is successful as they have enough investment balance. You should capture the exact text of the resulting message.
-"""
-
-ux_test_buy_task_not_enough = """
-You are testing a financial advisor order entry system. You are to test the ability to buy shares for a client if they do not have enough funds.
-- Buy 100000 shares of Morgan for Client B. 
-- This should fail as they do not have enough money. You should capture the exact text of the resulting message.
-"""
-
-ux_test_sell_not_enough_task = """
-You are testing a financial advisor order entry system. You are to test the ability to sell shares for a client if they do not have enough shares.
-- Attempt to sell 10 shares of Microsoft for Client A. 
-- This should fail as they do not own any Microsoft shares. You should capture the exact text of the resulting message.
-"""
-
-ux_test_sell_task = """
-You are testing a financial advisor order entry system. You are to test the ability to sell shares for a client if they have enough shares. 
-- Sell all of Client C's NVIDIA shares. You should capture the exact text of the resulting message. 
-"""
+# UX test prompts live in ux_tasks.py so the executor and benchmarks can use them without Streamlit;
+# re-exported here for the commented-out UX test block below
+from ux_tasks import (  # noqa: F401
+    dummy_fa_app_ux_test_framework_task,
+    ux_test_buy_enough_task,
+    ux_test_buy_task_not_enough,
+    ux_test_sell_not_enough_task,
+    ux_test_sell_task,
+)
 
 #
 # Then, go to Gmail and log in with my credentials and draft an email.
@@ -153,7 +117,10 @@ if 'chat_input_value' not in st.session_state:
 #     test_steps = task_mappings.get(test_task_key)
 #     task = dummy_fa_app_ux_test_framework_task + test_steps
 
-task = st.chat_input("User task:")
+# A task started in an earlier script run that is still going (see below)
+active_run = st.session_state.get('agent_run')
+
+task = st.chat_input("User task:", disabled=active_run is not None)
 
 #
 # if test_task:
@@ -162,60 +129,256 @@ task = st.chat_input("User task:")
 # else:
 #     task = st.chat_input("Enter your task:")
 
-# Create a placeholder at the bottom for log output (no longer used by our custom handler)
-log_placeholder = st.empty()
-# (Optional) You can assign this to the handler if needed:
-streamlit_handler.log_placeholder = log_placeholder
-if task:
-
-    with st.chat_message("user"):
-        st.write(task)
-
-    # Browser and context setup
-    config = BrowserContextConfig(
-        # browser_window_size={'width': 1920, 'height': 1080},
-        save_recording_path="recordingoutput",
-        trace_path="."
+# Long-lived pieces are built once per process and reused by every task:
+# the browser pool (browsers stay launched between runs), the LLM client and the controller.
+@st.cache_resource
+def get_browser_pool():
+    import_browser_use()
+    from browser_pool import BrowserPool
+    pool = BrowserPool(
+        max_size=int(os.getenv('BROWSER_POOL_SIZE', '2')),
+        idle_timeout=float(os.getenv('BROWSER_POOL_IDLE_TIMEOUT', '300')),
     )
-
-    browser = Browser()
-    context = BrowserContext(
-        browser=browser,
-        config=config,
-    )
-
-    llm = ChatOpenAI(
-        model='gpt-4o',
-        temperature=0.0,
-    )
-
-    from browser_use import Controller, ActionResult
+    pool.warm(1)
+    return pool
+
+@st.cache_resource
+def get_llm():
+    # OpenAI by default, or a local mock_llm_server.py with LLM_BACKEND=mock (see llm_backend.py)
+    from llm_backend import make_llm
+    return make_llm(sensitive_data)
+
+# Questions from the agent's ask_human action wait here for an answer from the UI
+# (approvals.py); unanswered ones fall back to a "not confirmed" answer after APPROVAL_TIMEOUT seconds
+@st.cache_resource
+def get_approvals():
+    return ApprovalQueue(timeout=float(os.getenv('APPROVAL_TIMEOUT', '300')))
+
+@st.cache_resource
+def get_controller():
+    import_browser_use()
+    from browser_use import ActionResult, Controller
+    from advisor_actions import register_advisor_actions
 
     # Initialize the controller
     controller = Controller()
+    approvals = get_approvals()
 
     @controller.action('Ask user for confirmation whenever you click a button')
-    def ask_human(question: str) -> str:
+    async def ask_human(question: str) -> str:
         root_logger.info("IN CONTROLLER ASK HUMAN")
-        answer = input(f'\n{question}\nInput: ')
+        # Suspends only this agent; the event loop and other runs keep going
+        answer = await approvals.ask(question)
         root_logger.info(answer)
         return ActionResult(extracted_content=answer)
 
-    # Pass the sensitive data to the agent
-    agent = Agent(
-        browser_context=context,
-        task=task,
-        llm=llm,
-        sensitive_data=sensitive_data,
-        max_failures=10,
-        # generate_gif=test_task_key + ".gif",
-        controller=controller,
-    )
+    # read_holdings / place_order / read_last_transaction_message against the
+    # advisor app's order API (advisor_actions.py), if it answers when the
+    # controller is built; ADVISOR_ACTIONS=0 leaves them out
+    if os.getenv('ADVISOR_ACTIONS', '1') != '0':
+        register_advisor_actions(controller)
+
+    return controller
+
+# Replay cache of successful action traces (trace_cache.py); AGENT_TRACE_CACHE=0 turns it off
+@st.cache_resource
+def get_trace_cache():
+    if os.getenv('AGENT_TRACE_CACHE', '1') == '0':
+        return None
+    return TraceCache()
+
+# Compressed, deduplicated per-step recordings with size/age retention
+# (recording.py, written off the agent's loop); AGENT_RECORDING=0 turns them off
+@st.cache_resource
+def get_recorder():
+    return recorder_from_env()
+
+# Per-step checkpoints (checkpoints.py): a task that crashed or hit max_failures
+# resumes from its last step when it is submitted again in the same browser session;
+# AGENT_CHECKPOINTS=0 turns it off
+@st.cache_resource
+def get_checkpoint_store():
+    if os.getenv('AGENT_CHECKPOINTS', '1') == '0':
+        return None
+    from checkpoints import CheckpointStore
+    return CheckpointStore()
+
+# Show the oldest pending question of a run as a form. A fragment polls the queue
+# so the page moves on by itself if the question times out.
+def approval_form(request, approvals):
+    with st.chat_message("assistant"):
+        st.markdown(f"**The agent is asking for confirmation:**\n\n{request.question}")
+        st.caption(f"Unanswered questions are treated as not confirmed after {request.timeout:.0f}s "
+                   f"({request.expires_in():.0f}s left).")
+        with st.form(key=f"approval_{request.id}"):
+            reply = st.text_input("Reply", key=f"approval_reply_{request.id}")
+            cols = st.columns(3)
+            approve = cols[0].form_submit_button("Approve")
+            reject = cols[1].form_submit_button("Reject")
+            send = cols[2].form_submit_button("Send reply")
+
+    answer = None
+    if approve:
+        answer = "Yes, confirmed. Proceed."
+    elif reject:
+        answer = "No, not confirmed. Do not proceed with the action."
+    elif send and reply:
+        answer = reply
+    if answer is not None:
+        approvals.answer(request.id, answer)
+        st.rerun()
+
+    def watch():
+        if all(r.id != request.id for r in approvals.pending(request.run_id)):
+            st.rerun(scope="app")
+
+    st.fragment(watch, run_every=1)()
+
+# Build the browser pool (which launches a browser), the LLM client and the
+# controller on a background thread while the user is still typing.
+# AGENT_WARMUP=0 leaves all of it to the first task.
+@st.cache_resource(show_spinner=False)
+def start_warmup():
+    if os.getenv('AGENT_WARMUP', '1') == '0':
+        return None
+
+    def warm():
+        started = time.perf_counter()
+        try:
+            get_browser_pool()
+            from browser_use import Agent
+            # The first Agent in a process pays one-off setup inside browser_use
+            # (about 0.3 s); this one never opens a browser and is dropped
+            Agent(task='warmup', llm=get_llm(), controller=get_controller())
+        except Exception:
+            # Nothing is cached for a getter that failed; the first task builds it again
+            logger.exception("Agent warmup failed")
+            return
+        logger.info(f"Agent warmup done in {time.perf_counter() - started:.1f}s")
+
+    thread = threading.Thread(target=warm, name='agent-warmup', daemon=True)
+    # The getters are st.cache_resource functions; let them run outside the script thread
+    add_script_run_ctx(thread, get_script_run_ctx())
+    thread.start()
+    return thread
+
+start_warmup()
+approvals = get_approvals()
+
+if task:
+    # Already imported by the warmup, unless it is off or still running
+    from browser_use import Agent
+    from browser_use.browser.context import BrowserContextConfig
+    from checkpoints import run_with_checkpoints
+    from run_profiler import profile_run
+    from trace_cache import run_with_replay
+
+    with st.chat_message("user"):
+        st.write(task)
+
+    # Without the warmup the browser launches on the pool's loop while this
+    # thread builds the LLM client and the controller
+    browser_pool = get_browser_pool()
+    llm = get_llm()
+    controller = get_controller()
 
-    # Re-add the logging handler (if needed)
+    recorder = get_recorder()
+
+    # Stream this run's log records into one placeholder, grouped per agent step.
+    # The agent logs from the pool's thread; the handler only buffers there and
+    # this script thread redraws the page while it waits for the run.
+    streamlit_handler = StreamlitHandler(placeholder=st.empty())
+    streamlit_handler.setLevel(logging.INFO)
+    streamlit_handler.setFormatter(formatter)
     root_logger.addHandler(streamlit_handler)
 
-    async def run_agent():
-        await agent.run()
+    run_id = uuid.uuid4().hex
+    # Checkpoints are per browser session: another session running the same prompt keeps its own
+    script_ctx = get_script_run_ctx()
+    session_id = script_ctx.session_id if script_ctx is not None else None
 
-    asyncio.run(run_agent())
+    async def run_agent():
+        streamlit_handler.bind()
+        approvals.bind(run_id)
+        # Browser and context setup. Recordings go to .recordings/ (Playwright video
+        # and traces only when enabled there) instead of recordingoutput/ and ./.
+        # Without those the pool's default config is used, so a lease can take the
+        # browser's spare, already initialised context.
+        recording = recorder.start_run('streamlit') if recorder is not None else None
+        try:
+            context_options = recording.context_options() if recording is not None else {}
+            config = BrowserContextConfig(
+                # browser_window_size={'width': 1920, 'height': 1080},
+                **context_options
+            ) if context_options else None
+            async with browser_pool.lease(config) as context:
+                # Pass the sensitive data to the agent
+                agent = Agent(
+                    browser_context=context,
+                    task=task,
+                    llm=llm,
+                    sensitive_data=sensitive_data,
+                    max_failures=10,
+                    # Rendering a GIF blocks the loop at the end of the run; `python recording.py gif <run>` makes one later
+                    generate_gif=False,
+                    controller=controller,
+                )
+                # Per-step timings go to .agent_profiles/ (see run_profiler.py); AGENT_PROFILE=0 disables it
+                profile_dir = False if os.getenv('AGENT_PROFILE', '1') == '0' else None
+                with profile_run(agent, 'streamlit', directory=profile_dir), \
+                        (recorder.record(agent, run=recording) if recording is not None else contextlib.nullcontext()):
+                    trace_cache = get_trace_cache()
+                    checkpoint_store = get_checkpoint_store()
+                    if checkpoint_store is not None:
+                        await run_with_checkpoints(agent, checkpoint_store, trace_cache=trace_cache, scope=session_id)
+                    elif trace_cache is not None:
+                        await run_with_replay(agent, trace_cache)
+                    else:
+                        await agent.run()
+        finally:
+            # Releases the run for prune() if the lease or Agent(...) failed before record() took over
+            if recording is not None:
+                recording.finish()
+
+    # The run outlives this script run: answering an approval reruns the script,
+    # so keep it in the session and pick it up again on the next run
+    active_run = st.session_state.agent_run = {
+        'id': run_id,
+        'task': task,
+        'handler': streamlit_handler,
+        'future': browser_pool.run(run_agent()),
+    }
+    # Detach the page handler when the run ends, even if its session is gone by then
+    active_run['future'].add_done_callback(lambda _: root_logger.removeHandler(streamlit_handler))
+    streamlit_handler.watch(active_run['future'])
+
+elif active_run is not None:
+    with st.chat_message("user"):
+        st.write(active_run['task'])
+    active_run['handler'].log_placeholder = st.empty()
+    active_run['handler'].flush(force=True)
+
+if active_run is not None:
+    streamlit_handler = active_run['handler']
+    pending = approvals.pending(active_run['id'])
+    if pending:
+        approval_form(pending[0], approvals)
+    else:
+        future = active_run['future']
+        try:
+            streamlit_handler.pump(future, until=lambda: bool(approvals.pending(active_run['id'])))
+        finally:
+            # A finished run, failed or not, must not keep the chat input disabled
+            if future.done():
+                root_logger.removeHandler(streamlit_handler)
+                st.session_state.agent_run = None
+        if future.done():
+            # Shown once; the next rerun starts from a clear session
+            if future.cancelled():
+                st.error("The agent run was cancelled.")
+            elif future.exception() is not None:
+                logger.error("Agent run failed", exc_info=future.exception())
+                st.error(SecretRedactionFilter(sensitive_data).redact(f"The agent run failed: {future.exception()!r}"))
+        else:
+            # The agent is waiting on a question; rerun to show it
+            st.rerun()
@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Dict, List, Optional
+
+from browser_use import ActionResult
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Controller actions that read and trade through the advisor app's JSON order
+# API (order_api.py) instead of the rendered pages.
+#
+#   read_holdings                   clients' cash and shares plus current
+#                                   prices, as JSON, in one step (instead of
+#                                   scrolling clients_overview() page by page)
+#   place_order                     one buy or sell; returns the app's message
+#   read_last_transaction_message   the message of the latest order, including
+#                                   ones placed through the UI
+#   rebalance_clients               sell-all / buy-as-much-as-possible / target
+#                                   weight rules for one or many clients as one
+#                                   atomic batch (rebalance.py), instead of one
+#                                   order per client and equity
+#
+# Action results go into the agent's prompt, so read_holdings and
+# rebalance_clients list at most `max_clients` clients (read_holdings pages
+# through the rest with offset) next to totals over the whole book.
+#
+# The API must run on the same ledger as the app: start the app with
+# ADVISOR_API_PORT set (it then serves the API in-process, which also lets
+# read_last_transaction_message see UI orders) or run order_api.py. The agent
+# finds it at ADVISOR_API_URL (default: order_api.py's default port, 8650, clear
+# of the 8501, 8502, ... Streamlit moves to when its port is taken).
+#
+# The API is off by default, so register_advisor_actions() first checks that it
+# answers and otherwise registers nothing: an agent told to use read_holdings
+# against a dead API only collects failed steps towards max_failures.
+
+DEFAULT_API_URL = 'http://127.0.0.1:8650'
+
+
+class ReadHoldingsAction(BaseModel):
+    client: Optional[str] = None
+    offset: int = 0
+
+
+class PlaceOrderAction(BaseModel):
+    client: str
+    side: str
+    equity: str
+    shares: int
+
+
+class LastTransactionMessageAction(BaseModel):
+    client: Optional[str] = None
+
+
+class RebalanceAction(BaseModel):
+    clients: Optional[List[str]] = None
+    sell_all: List[str] = []
+    buy_max: Optional[List[str]] = None
+    weights: Optional[Dict[str, float]] = None
+    dry_run: bool = False
+
+
+class AdvisorAPI:
+    def __init__(self, base_url=None, timeout=10.0):
+        self.base_url = (base_url or os.getenv('ADVISOR_API_URL', DEFAULT_API_URL)).rstrip('/')
+        self.timeout = timeout
+
+    # (status, decoded JSON body); API errors come back as their status, not as exceptions
+    def request(self, method, path, query=None, payload=None):
+        url = self.base_url + path
+        query = {k: v for k, v in (query or {}).items() if v is not None}
+        if query:
+            url += '?' + urllib.parse.urlencode(query)
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b'{}')
+
+    # Whether the API answers at all (one quick GET /quote)
+    def available(self, timeout=2.0):
+        request = urllib.request.Request(self.base_url + '/quote')
+        try:
+            with urllib.request.urlopen(request, timeout=min(timeout, self.timeout)) as response:
+                return response.status == 200
+        except (OSError, ValueError):
+            return False
+
+
+# The order engine's messages are Markdown for st.success/st.error
+def _plain(message):
+    return message.replace('**', '')
+
+
+def _unreachable(api, e):
+    return ActionResult(error=f'Advisor order API not reachable at {api.base_url}: {e}')
+
+
+def _page(mapping, offset, limit):
+    return dict(list(mapping.items())[offset:offset + limit])
+
+
+# Cash and shares summed over `holdings` ({client: {'Investment', 'Shares'}})
+def _totals(holdings):
+    shares = {}
+    for holding in holdings.values():
+        for equity, count in holding['Shares'].items():
+            shares[equity] = shares.get(equity, 0) + count
+    return {'Investment': round(sum(h['Investment'] for h in holdings.values()), 2), 'Shares': shares}
+
+
+# Register the advisor actions on `controller` if the API answers (or without
+# checking, with require_api=False); returns the controller. Results list at
+# most `max_clients` clients.
+def register_advisor_actions(controller, api=None, require_api=True, max_clients=20):
+    api = api or AdvisorAPI()
+    if require_api and not api.available():
+        logger.info(f'Advisor order API not reachable at {api.base_url}; advisor actions not registered')
+        return controller
+
+    @controller.action(
+        f'Read clients\' investment balances and shares, and current equity prices, as JSON: one client, '
+        f'or up to {max_clients} clients from offset plus totals over all clients. '
+        f'Use this instead of scrolling the clients overview.',
+        param_model=ReadHoldingsAction,
+    )
+    def read_holdings(params: ReadHoldingsAction):
+        try:
+            status, holdings = api.request('GET', '/holdings', {'client': params.client})
+            if status != 200:
+                return ActionResult(error=holdings.get('error', f'HTTP {status}'))
+            _, prices = api.request('GET', '/quote')
+        except (OSError, ValueError) as e:
+            return _unreachable(api, e)
+        if params.client is not None:
+            content = json.dumps({'prices': prices, 'clients': holdings})
+        else:
+            content = json.dumps({'prices': prices, 'clients': _page(holdings, params.offset, max_clients),
+                                  'total_clients': len(holdings), 'offset': params.offset,
+                                  'totals': _totals(holdings)})
+            remaining = len(holdings) - params.offset - max_clients
+            if remaining > 0:
+                content += (f' ({remaining} more clients: read_holdings with offset={params.offset + max_clients}, '
+                            f'or with client for one of them)')
+        return ActionResult(extracted_content=f'Holdings: {content}', include_in_memory=True)
+
+    @controller.action(
+        'Place a Buy or Sell order for a client in the advisor app and get the resulting message',
+        param_model=PlaceOrderAction,
+    )
+    def place_order(params: PlaceOrderAction):
+        order = {'client': params.client, 'side': params.side, 'equity': params.equity, 'shares': params.shares}
+        try:
+            status, result = api.request('POST', '/orders', payload=order)
+        except (OSError, ValueError) as e:
+            return _unreachable(api, e)
+        if status != 200:
+            return ActionResult(error=result.get('error', f'HTTP {status}'))
+        # A rejected order (insufficient funds/shares) is an answer, not an action failure
+        return ActionResult(extracted_content=f"Order {result['status']}: {_plain(result['message'])}",
+                            include_in_memory=True)
+
+    @controller.action(
+        'Read the message of the last transaction in the advisor app (optionally for one client)',
+        param_model=LastTransactionMessageAction,
+    )
+    def read_last_transaction_message(params: LastTransactionMessageAction):
+        try:
+            status, result = api.request('GET', '/orders/last', {'client': params.client})
+        except (OSError, ValueError) as e:
+            return _unreachable(api, e)
+        if status == 404:
+            return ActionResult(extracted_content='No transactions yet.', include_in_memory=True)
+        if status != 200:
+            return ActionResult(error=result.get('error', f'HTTP {status}'))
+        return ActionResult(extracted_content=f"Last transaction ({result['status']}): {_plain(result['message'])}",
+                            include_in_memory=True)
+
+    @controller.action(
+        'Rebalance clients in one batch: sell all shares of the sell_all equities, then spend as much '
+        'cash as possible on whole shares of the buy_max equities (split evenly), or hold the given '
+        f'target weights instead. Omit clients to rebalance every client. Returns the trades summed '
+        f'over all clients and the before/after holdings of up to {max_clients} of them.',
+        param_model=RebalanceAction,
+    )
+    def rebalance_clients(params: RebalanceAction):
+        try:
+            status, result = api.request('POST', '/rebalance', payload=params.model_dump(exclude_none=True))
+        except (OSError, ValueError) as e:
+            return _unreachable(api, e)
+        if status != 200:
+            return ActionResult(error=result.get('error', f'HTTP {status}'))
+        content = _plain(result['message'])
+        if result['status'] == 'success':
+            diff = result['diff']
+            trades = {}
+            for change in diff.values():
+                for equity, count in change['trades'].items():
+                    trades[equity] = trades.get(equity, 0) + count
+            content += ' ' + json.dumps({'clients_changed': len(diff), 'trades': trades,
+                                         'diff': _page(diff, 0, max_clients)})
+            if len(diff) > max_clients:
+                content += f' (diff of {len(diff) - max_clients} more clients not shown)'
+        return ActionResult(extracted_content=f"Rebalance {result['status']}: {content}", include_in_memory=True)
+
+    return controller
@@ -1,6 +1,73 @@
 import streamlit as st
 
-# Initialize session state for authentication and client data
+import math
+import os
+
+from journal import open_journal
+from ledger import Ledger
+from order_api import DEFAULT_HOST, start_server
+from order_engine import OrderEngine
+from portfolio import LiveValuation, load_portfolio, valuate
+from price_feed import LedgerPriceWriter, SimulatedPriceFeed
+
+# Clients rendered per page on the overview
+CLIENTS_PER_PAGE = 10
+
+# One ledger per server process, shared by every browser session
+@st.cache_resource
+def get_ledger():
+    return Ledger()
+
+# Append-only order journal next to the ledger (journal.py); ADVISOR_JOURNAL=0 disables it.
+# Raises JournalError if another process (e.g. a standalone order_api.py) holds it.
+@st.cache_resource
+def get_journal():
+    if os.getenv('ADVISOR_JOURNAL', '1') == '0':
+        return None
+    return open_journal(get_ledger())
+
+@st.cache_resource
+def get_engine():
+    return OrderEngine(get_ledger(), journal=get_journal())
+
+# Serve the JSON order API (order_api.py) from the app process when ADVISOR_API_PORT is set
+@st.cache_resource
+def get_order_api():
+    port = os.getenv('ADVISOR_API_PORT')
+    if not port:
+        return None
+    return start_server(get_engine(), os.getenv('ADVISOR_API_HOST', DEFAULT_HOST), int(port))
+
+# Columnar snapshot of the book and its valuation. Keyed by the ledger's version
+# counters, so reruns reuse them until a trade or price update lands.
+@st.cache_resource(max_entries=2)
+def get_portfolio(holdings_version, prices_version):
+    return load_portfolio(get_ledger())
+
+@st.cache_resource(max_entries=2)
+def get_valuation(holdings_version, prices_version):
+    return valuate(get_portfolio(holdings_version, prices_version))
+
+@st.cache_resource(max_entries=32)
+def search_clients(holdings_version, query, _portfolio):
+    return _portfolio.search(query)
+
+# Optional live prices: ADVISOR_PRICE_FEED=simulated starts a random-walk feed
+# (ADVISOR_PRICE_FEED_RATE ticks/s) that revalues the book incrementally and
+# writes prices back to the ledger so trades execute at the live price.
+@st.cache_resource
+def get_live_valuation():
+    if os.getenv('ADVISOR_PRICE_FEED') != 'simulated':
+        return None
+    ledger = get_ledger()
+    live = LiveValuation(ledger)
+    feed = SimulatedPriceFeed(ledger.tickers(), rate=float(os.getenv('ADVISOR_PRICE_FEED_RATE', '1000')))
+    feed.subscribe(live.apply_ticks)
+    feed.subscribe(LedgerPriceWriter(ledger))
+    feed.start()
+    return live
+
+# Initialize session state for authentication and navigation
 def init_session_state():
     if 'logged_in' not in st.session_state:
         st.session_state.logged_in = False
@@ -8,43 +75,6 @@ def init_session_state():
     if 'advisor_username' not in st.session_state:
         st.session_state.advisor_username = ''
 
-    if 'clients' not in st.session_state:
-        # Sample clients: Each client has a name, an investment account with balance, and shares
-        st.session_state.clients = {
-            'Client A': {
-                'Investment': 500.0,
-                'Shares': {
-                    'Microsoft': 0,
-                    'Nvidia': 0,
-                    'Morgan Stanley': 0
-                }
-            },
-            'Client B': {
-                'Investment': 8000.0,
-                'Shares': {
-                    'Microsoft': 10,
-                    'Nvidia': 5,
-                    'Morgan Stanley': 15
-                }
-            },
-            'Client C': {
-                'Investment': 12000.0,
-                'Shares': {
-                    'Microsoft': 8,
-                    'Nvidia': 3,
-                    'Morgan Stanley': 20
-                }
-            }
-        }
-
-    if 'tickers' not in st.session_state:
-        # Mock ticker prices for equities
-        st.session_state.tickers = {
-            'Microsoft': 350.00,
-            'Nvidia': 280.00,
-            'Morgan Stanley': 100.00
-        }
-
     if 'page' not in st.session_state:
         st.session_state.page = "Clients Overview"
 
@@ -94,44 +124,68 @@ def clients_overview():
     st.title("Clients Overview")
     st.write("Manage your clients' investments seamlessly.")
 
+    live = get_live_valuation()
+    if live is None:
+        clients_overview_body()
+    else:
+        # Re-render just the book on a timer while prices stream in
+        st.fragment(clients_overview_body, run_every=float(os.getenv('ADVISOR_PRICE_REFRESH', '2')))()
+
+def clients_overview_body():
+    live = get_live_valuation()
+    if live is None:
+        versions = get_ledger().versions()
+        portfolio = get_portfolio(versions['holdings'], versions['prices'])
+        prices = portfolio.prices
+        totals = get_valuation(versions['holdings'], versions['prices']).totals
+        holdings_version = versions['holdings']
+    else:
+        current = live.current()
+        portfolio = current.portfolio
+        prices, totals = current.view()
+        holdings_version = portfolio.versions['holdings']
+
     st.markdown("### Current Ticker Prices")
     ticker_data = {
-        'Equity': list(st.session_state.tickers.keys()),
-        'Current Price ($)': [f"${price:,.2f}" for price in st.session_state.tickers.values()]
+        'Equity': portfolio.equities,
+        'Current Price ($)': [f"${price:,.2f}" for price in prices]
     }
     st.table(ticker_data)
 
     st.markdown("---")
 
-    # Display all clients and their accounts
-    for client, data in st.session_state.clients.items():
-        st.subheader(f"{client}")
+    # Large books get a search box and pager; only the visible page is formatted and rendered
+    rows = search_clients(holdings_version, '', portfolio)
+    page = 1
+    if len(portfolio) > CLIENTS_PER_PAGE:
+        query = st.text_input("Search Clients")
+        rows = search_clients(holdings_version, query.strip(), portfolio)
+        num_pages = max(1, math.ceil(len(rows) / CLIENTS_PER_PAGE))
+        page = st.number_input("Page", min_value=1, max_value=num_pages, value=1, step=1, format="%d")
+        st.caption(f"{len(rows):,} matching clients, page {page} of {num_pages}")
+        st.markdown("---")
+    start = (page - 1) * CLIENTS_PER_PAGE
+
+    # Display the clients on this page and their accounts
+    for i in rows[start:start + CLIENTS_PER_PAGE]:
+        st.subheader(f"{portfolio.clients[i]}")
 
         # Display Investment Account Balance
-        st.write(f"**Investment Account Balance:** ${data['Investment']:,.2f}")
+        st.write(f"**Investment Account Balance:** ${portfolio.cash[i]:,.2f}")
 
         # Display Shares Owned
-        shares = data.get('Shares', {})
+        shares = portfolio.shares[i]
         shares_data = {
-            'Equity': [],
-            'Shares Owned': [],
-            'Current Price ($)': [],
-            'Total Value ($)': []
+            'Equity': portfolio.equities,
+            'Shares Owned': shares.tolist(),
+            'Current Price ($)': [f"${price:,.2f}" for price in prices],
+            'Total Value ($)': [f"${value:,.2f}" for value in shares * prices]
         }
-        total_investment = 0.0
-        for equity, num_shares in shares.items():
-            current_price = st.session_state.tickers.get(equity, 0)
-            total_value = num_shares * current_price
-            shares_data['Equity'].append(equity)
-            shares_data['Shares Owned'].append(num_shares)
-            shares_data['Current Price ($)'].append(f"${current_price:,.2f}")
-            shares_data['Total Value ($)'].append(f"${total_value:,.2f}")
-            total_investment += total_value
 
         st.markdown("**Portfolio:**")
-        if any(shares.values()):
+        if shares.any():
             st.table(shares_data)
-            st.write(f"**Total Investment Value:** ${total_investment:,.2f}")
+            st.write(f"**Total Investment Value:** ${totals[i]:,.2f}")
         else:
             st.write("No shares owned.")
 
@@ -141,23 +195,24 @@ def clients_overview():
 def investment_section():
     st.title("Manage Investments")
 
-    clients = list(st.session_state.clients.keys())
+    engine = get_engine()
+    clients = engine.ledger.client_names()
     if not clients:
         st.warning("No clients available.")
         return
 
     selected_client = st.selectbox("Select Client", clients)
-    client_data = st.session_state.clients[selected_client]
 
     # Transaction Type: Buy or Sell
     transaction_type = st.selectbox("Transaction Type", ["Buy", "Sell"])
 
     # Select Equity
-    equities = list(st.session_state.tickers.keys())
+    tickers = engine.quote()
+    equities = list(tickers.keys())
     selected_equity = st.selectbox("Select Equity", equities)
 
     # Current Price Display
-    current_price = st.session_state.tickers[selected_equity]
+    current_price = tickers[selected_equity]
     st.write(f"**Current Price of {selected_equity}: ${current_price:,.2f}**")
 
     # Number of Shares
@@ -165,46 +220,11 @@ def investment_section():
 
     # Execute Transaction
     if st.button("Execute"):
-        total_cost = num_shares * current_price
-
-        if transaction_type == "Buy":
-            if client_data['Investment'] >= total_cost:
-                # Perform Buy
-                client_data['Investment'] -= total_cost
-                client_data['Shares'][selected_equity] += num_shares
-                st.session_state.investment_message = {
-                    "type": "success",
-                    "content": (
-                        f"Successfully bought **{num_shares}** shares of **{selected_equity}** for **{selected_client}** "
-                        f"at **${current_price:,.2f}** per share.\n\n"
-                        f"**Updated Investment Balance:** ${client_data['Investment']:,.2f}\n"
-                        f"**Shares Owned:** {client_data['Shares'][selected_equity]} shares of {selected_equity}."
-                    )
-                }
-            else:
-                st.session_state.investment_message = {
-                    "type": "error",
-                    "content": "Insufficient funds to complete the purchase."
-                }
-        elif transaction_type == "Sell":
-            if client_data['Shares'][selected_equity] >= num_shares:
-                # Perform Sell
-                client_data['Shares'][selected_equity] -= num_shares
-                client_data['Investment'] += total_cost
-                st.session_state.investment_message = {
-                    "type": "success",
-                    "content": (
-                        f"Successfully sold **{num_shares}** shares of **{selected_equity}** for **{selected_client}** "
-                        f"at **${current_price:,.2f}** per share.\n\n"
-                        f"**Updated Investment Balance:** ${client_data['Investment']:,.2f}\n"
-                        f"**Shares Owned:** {client_data['Shares'][selected_equity]} shares of {selected_equity}."
-                    )
-                }
-            else:
-                st.session_state.investment_message = {
-                    "type": "error",
-                    "content": "Insufficient shares to complete the sale."
-                }
+        result = engine.place_order(selected_client, transaction_type, selected_equity, int(num_shares))
+        st.session_state.investment_message = {
+            "type": result['status'],
+            "content": result['message']
+        }
 
     # Display Message if Exists
     if st.session_state.investment_message:
@@ -242,6 +262,7 @@ def main_app():
 
 # Initialize session state
 init_session_state()
+get_order_api()
 
 # App Layout
 def main():
@@ -0,0 +1,99 @@
+import asyncio
+import contextvars
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Human-approval channel between agent runs and the Streamlit UI.
+#
+# An agent action awaits ask(): the question is queued and the action suspends
+# on an asyncio future, so the pool's event loop (and every other agent on it)
+# keeps running. The Streamlit script lists pending questions with pending(),
+# and answer() resolves the future from the script thread with
+# call_soon_threadsafe. A question nobody answers within `timeout` seconds
+# resolves to `default`, so an unattended run never hangs.
+#
+# Questions are tagged with the run they came from (bind() in the run's
+# coroutine, like StreamlitHandler), so each browser session only sees its own.
+
+DEFAULT_TIMEOUT = 300.0
+DEFAULT_ANSWER = "No answer from the user in time. Treat this as not confirmed and do not proceed with the action."
+
+_current_run = contextvars.ContextVar('approval_run', default=None)
+
+
+class ApprovalRequest:
+    def __init__(self, request_id, run_id, question, timeout, default, loop, future):
+        self.id = request_id
+        self.run_id = run_id
+        self.question = question
+        self.timeout = timeout
+        self.default = default
+        self.created = time.time()
+        self.status = 'pending'
+        self.answer = None
+        self._loop = loop
+        self._future = future
+
+    def expires_in(self):
+        return max(0.0, self.created + self.timeout - time.time())
+
+
+class ApprovalQueue:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, default=DEFAULT_ANSWER):
+        self.timeout = timeout
+        self.default = default
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count(1)
+
+    # Tag approvals asked from the current context (an agent run's coroutine) with run_id
+    def bind(self, run_id):
+        return _current_run.set(run_id)
+
+    # Queue a question and wait for the answer without blocking the event loop.
+    # Returns the user's answer, or `default` after `timeout` seconds.
+    async def ask(self, question, timeout=None, default=None):
+        timeout = self.timeout if timeout is None else timeout
+        default = self.default if default is None else default
+        loop = asyncio.get_running_loop()
+        request = ApprovalRequest(next(self._ids), _current_run.get(), question, timeout, default,
+                                  loop, loop.create_future())
+        with self._lock:
+            self._pending[request.id] = request
+        try:
+            answer = await asyncio.wait_for(asyncio.shield(request._future), timeout)
+            request.status = 'answered'
+        except asyncio.TimeoutError:
+            answer = default
+            request.status = 'timed_out'
+            logger.info(f'Approval request {request.id} timed out after {timeout:.0f}s; using the default answer')
+        finally:
+            with self._lock:
+                self._pending.pop(request.id, None)
+        request.answer = answer
+        return answer
+
+    # Pending requests, oldest first (only run_id's when given)
+    def pending(self, run_id=None):
+        with self._lock:
+            requests = list(self._pending.values())
+        return [r for r in requests if run_id is None or r.run_id == run_id]
+
+    # Answer a pending request from any thread; False if it is no longer pending
+    def answer(self, request_id, answer):
+        # Drop it from pending() right away, before the agent's loop gets to it
+        with self._lock:
+            request = self._pending.pop(request_id, None)
+        if request is None:
+            return False
+
+        def resolve():
+            if not request._future.done():
+                request._future.set_result(answer)
+
+        request._loop.call_soon_threadsafe(resolve)
+        return True
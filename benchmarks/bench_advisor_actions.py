@@ -0,0 +1,186 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from run_profiler import ACTION_RE, STEP_RE, load_records
+
+# Steps and LLM tokens saved on the sample bank + email run by the advisor
+# actions (advisor_actions.py).
+#
+# The banking half of sample_bank_email_log.txt (every step before the agent
+# leaves localhost:8501) is compared with the same work done through the
+# actions: read_holdings, sell, buy, read_holdings. Those four calls are run for
+# real against an in-process order API on a scratch ledger, so the results,
+# their sizes and their latency are measured, not assumed.
+#
+# Tokens are estimated with the mock server's 4-characters-per-token rule:
+#   input per step   system prompt (built by browser_use from the registered
+#                    actions, with and without the advisor actions) + task +
+#                    page state and history (--state-tokens, or the mean input
+#                    tokens of a run profile given with --profile)
+#   output per step  the agent's eval/memory/goal/action lines in the log
+# The advisor actions lengthen the system prompt of every step, the email half
+# included; that cost is subtracted from the savings.
+#
+#   python benchmarks/bench_advisor_actions.py [--log sample_bank_email_log.txt] [--profile run.jsonl]
+
+SAMPLE_LOG = os.path.join(ROOT, 'sample_bank_email_log.txt')
+APP_HOST = 'localhost:8501'
+OUTPUT_MARKERS = ('Eval:', '🧠 Memory:', '🎯 Next goal:', '🛠️')
+
+
+def tokens(text):
+    return len(text) // 4
+
+
+# [{'step', 'actions': [dicts], 'output_chars'}] from a browser_use log
+def parse_steps(lines):
+    steps = []
+    for line in lines:
+        match = STEP_RE.search(line)
+        if match:
+            steps.append({'step': int(match.group(1)), 'actions': [], 'output_chars': 0})
+            continue
+        if not steps:
+            continue
+        if any(marker in line for marker in OUTPUT_MARKERS):
+            steps[-1]['output_chars'] += len(line.split('] ', 1)[-1])
+        match = ACTION_RE.search(line)
+        if match:
+            try:
+                steps[-1]['actions'].append(json.loads(match.group(3)))
+            except ValueError:
+                pass
+    return steps
+
+
+# Steps before the agent first leaves the advisor app
+def bank_steps(steps):
+    for i, step in enumerate(steps):
+        for action in step['actions']:
+            name, params = next(iter(action.items()))
+            if name == 'search_google' or (name == 'go_to_url' and APP_HOST not in params.get('url', '')):
+                return steps[:i], steps[i:]
+    return steps, []
+
+
+def system_prompt_tokens(with_advisor_actions):
+    from browser_use import Controller
+    from browser_use.agent.prompts import SystemPrompt
+
+    from advisor_actions import AdvisorAPI, register_advisor_actions
+
+    controller = Controller()
+    if with_advisor_actions:
+        register_advisor_actions(controller, AdvisorAPI('http://127.0.0.1:1'), require_api=False)
+    prompt = SystemPrompt(controller.registry.get_prompt_description()).get_system_message().content
+    return tokens(prompt)
+
+
+# The banking half through the actions, against a scratch ledger. Returns
+# [(step, [(action, params, result_text, seconds)])].
+def run_actions():
+    from browser_use import Controller
+
+    from advisor_actions import AdvisorAPI, register_advisor_actions
+    from ledger import Ledger
+    from order_api import start_server
+    from order_engine import OrderEngine
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = Ledger(os.path.join(tmp, 'ledger.db'))
+        server = start_server(OrderEngine(ledger), port=0)
+        try:
+            controller = register_advisor_actions(
+                Controller(), AdvisorAPI(f'http://127.0.0.1:{server.server_address[1]}'))
+
+            async def call(name, params):
+                start = time.perf_counter()
+                result = await controller.registry.execute_action(name, params)
+                return name, params, result.extracted_content or result.error, time.perf_counter() - start
+
+            async def run():
+                before = await call('read_holdings', {})
+                holdings = json.loads(before[2].split(': ', 1)[1])
+                client_c = holdings['clients']['Client C']
+                sell = await call('place_order', {'client': 'Client C', 'side': 'Sell', 'equity': 'Nvidia',
+                                                  'shares': client_c['Shares']['Nvidia']})
+                # What the agent works out from the first read: cash after the sale / MS price
+                cash = client_c['Investment'] + client_c['Shares']['Nvidia'] * holdings['prices']['Nvidia']
+                buy = await call('place_order', {'client': 'Client C', 'side': 'Buy', 'equity': 'Morgan Stanley',
+                                                 'shares': int(cash // holdings['prices']['Morgan Stanley'])})
+                after = await call('read_holdings', {})
+                return [(1, [before]), (2, [sell]), (3, [buy]), (4, [after])]
+
+            return asyncio.run(run())
+        finally:
+            server.shutdown()
+            ledger.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Steps and tokens saved by the advisor controller actions")
+    parser.add_argument('--log', default=SAMPLE_LOG, help="browser_use log of the bank + email task")
+    parser.add_argument('--profile', default=None,
+                        help="Run profile (.jsonl from run_profiler) with measured input tokens per step")
+    parser.add_argument('--state-tokens', type=int, default=1500,
+                        help="Assumed page state + history tokens per step when no --profile is given")
+    args = parser.parse_args()
+
+    from ux_tasks import bank_email_task
+
+    with open(args.log, encoding='utf-8') as f:
+        steps = parse_steps(f)
+    bank, rest = bank_steps(steps)
+    action_steps = run_actions()
+
+    base_prompt = system_prompt_tokens(False)
+    advisor_prompt = system_prompt_tokens(True)
+    task_tokens = tokens(bank_email_task)
+    if args.profile:
+        measured = [r['input_tokens'] for r in load_records(args.profile) if r['input_tokens']]
+        per_step_in = sum(measured) / len(measured) if measured else 0
+        source = f'measured, {args.profile}'
+    else:
+        per_step_in = base_prompt + task_tokens + args.state_tokens
+        source = f'estimated, {args.state_tokens} state tokens assumed'
+    extra = advisor_prompt - base_prompt
+
+    # Results are carried into the following steps' history
+    result_tokens = [tokens(r[2]) for _, calls in action_steps for r in calls]
+    carried = sum(t * (len(action_steps) - i - 1) for i, t in enumerate(result_tokens))
+
+    old_in = len(bank) * per_step_in
+    old_out = sum(s['output_chars'] // 4 for s in bank)
+    new_in = len(action_steps) * (per_step_in + extra) + carried
+    # Each action step answers with about one short AgentOutput
+    mean_out = old_out / len(bank) if bank else 0
+    new_out = len(action_steps) * mean_out
+    overhead = len(rest) * extra
+
+    print(f"{'banking half':<22} {'steps':>6} {'actions':>8} {'input tok':>10} {'output tok':>11}")
+    print(f"{'browser (sample log)':<22} {len(bank):>6} {sum(len(s['actions']) for s in bank):>8} "
+          f"{old_in:>10.0f} {old_out:>11.0f}")
+    print(f"{'advisor actions':<22} {len(action_steps):>6} {len(result_tokens):>8} {new_in:>10.0f} {new_out:>11.0f}")
+    print()
+    print(f"per-step input tokens: {per_step_in:.0f} ({source})")
+    print(f"system prompt: {base_prompt} tokens, +{extra} with the advisor actions "
+          f"(x {len(rest)} email steps = {overhead} tokens)")
+    print(f"saved: {len(bank) - len(action_steps)} of {len(steps)} steps, "
+          f"{old_in - new_in - overhead:.0f} input and {old_out - new_out:.0f} output tokens")
+    print()
+    print(f"{'action':<32} {'ms':>7}  result")
+    for _, calls in action_steps:
+        for name, params, text, seconds in calls:
+            print(f"{name:<32} {seconds * 1000:>7.1f}  {' '.join(text.split())[:70]}")
+
+
+if __name__ == '__main__':
+    main()
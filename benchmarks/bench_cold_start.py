@@ -0,0 +1,223 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Cold start of the Streamlit agent runner (BrowserUse.py).
+#
+# Every probe runs in a fresh interpreter (this file with --probe), so nothing
+# is already imported or cached; each is repeated --repeat times and the median
+# is reported.
+#
+#   imports   import time of each heavy module on its own
+#   page      first render and one rerun of BrowserUse.py (streamlit AppTest),
+#             with the background warmup off and on; with it on, also the time
+#             from page load until the warmup has finished
+#   task      time from submitting the first task to the agent's first model
+#             response, split into the pieces the runner builds, cold (nothing
+#             built yet, AGENT_WARMUP=0) and warm (the warmup finished while the
+#             user was typing). browser is the wait for a leased browser, which
+#             launches alongside llm and controller. The LLM is a local
+#             mock_llm_server.py (LLM_BACKEND=mock), so the model round trip is
+#             only HTTP. Without a launchable Chromium the browser column reads
+#             n/a, the failed launch is left out of the total and the agent is
+#             built without a browser context.
+#
+#   python benchmarks/bench_cold_start.py [--repeat 3]
+
+PAGE = os.path.join(ROOT, 'BrowserUse.py')
+HEAVY_MODULES = ['streamlit', 'browser_use', 'langchain_openai', 'llm_backend', 'browser_pool',
+                 'checkpoints', 'advisor_actions']
+TASK = 'Open the advisor app and report the first client.'
+TASK_STEPS = ['imports', 'llm', 'controller', 'browser', 'agent', 'first call']
+
+
+def ms_since(start):
+    return (time.perf_counter() - start) * 1000
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+# --- probes (run in a child interpreter, print one JSON object) ---
+
+def probe_import(module):
+    start = time.perf_counter()
+    __import__(module)
+    return {'ms': ms_since(start)}
+
+
+def probe_page(warmup):
+    os.environ['AGENT_WARMUP'] = '1' if warmup else '0'
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(PAGE, default_timeout=120)
+    loaded = start = time.perf_counter()
+    app.run()
+    first = ms_since(start)
+    start = time.perf_counter()
+    app.run()
+    rerun = ms_since(start)
+    if app.exception:
+        raise RuntimeError(app.exception[0].value)
+    result = {'first': first, 'rerun': rerun, 'ready': None}
+    for thread in threading.enumerate():
+        if thread.name == 'agent-warmup':
+            thread.join()
+            result['ready'] = ms_since(loaded)
+    return result
+
+
+def probe_task(warm):
+    from mock_llm_server import ScriptedPolicy, start_server
+
+    port = free_port()
+    server = start_server(ScriptedPolicy(), port=port)
+    os.environ.update(LLM_BACKEND='mock', MOCK_LLM_URL=f'http://127.0.0.1:{port}/v1', ANONYMIZED_TELEMETRY='False')
+    times = {}
+    built = {}
+
+    # What BrowserUse.py's getters build, in the order its task block (or its
+    # warmup, which also makes one throwaway Agent) asks for them
+    def prepare(warmup):
+        start = time.perf_counter()
+        import browser_use  # noqa: F401
+        from browser_use import Agent, Controller
+        # Unused here; imported only so their cost is timed, as BrowserUse.py's task block imports them
+        from browser_use.browser.context import BrowserContextConfig  # noqa: F401
+        import checkpoints, run_profiler, trace_cache  # noqa: F401,E401
+        from advisor_actions import register_advisor_actions
+        from browser_pool import BrowserPool
+        from llm_backend import make_llm
+        times['imports'] = ms_since(start)
+
+        built['pool'] = BrowserPool(max_size=1)
+        launched = built['pool'].warm(1)
+
+        start = time.perf_counter()
+        built['llm'] = make_llm()
+        times['llm'] = ms_since(start)
+
+        start = time.perf_counter()
+        built['controller'] = Controller()
+        register_advisor_actions(built['controller'])
+        times['controller'] = ms_since(start)
+
+        if warmup:
+            Agent(task='warmup', llm=built['llm'], controller=built['controller'])
+        return launched
+
+    async def lease_and_build():
+        from browser_use import Agent
+
+        start = time.perf_counter()
+        try:
+            async with built['pool'].lease() as context:
+                times['browser'] = ms_since(start)
+                start = time.perf_counter()
+                Agent(task=TASK, llm=built['llm'], controller=built['controller'], browser_context=context)
+                times['agent'] = ms_since(start)
+        except Exception:
+            # No browser to launch here; leave the failed attempt out of the total
+            times['browser'] = None
+            times['failed launch'] = ms_since(start)
+            start = time.perf_counter()
+            Agent(task=TASK, llm=built['llm'], controller=built['controller'])
+            times['agent'] = ms_since(start)
+
+    if warm:
+        # Done before the task is submitted, while the user types
+        try:
+            prepare(warmup=True).result()
+        except Exception:
+            pass
+        times.update(imports=0.0, llm=0.0, controller=0.0)
+    submitted = time.perf_counter()
+    if not warm:
+        prepare(warmup=False)
+
+    built['pool'].run(lease_and_build()).result()
+    start = time.perf_counter()
+    built['llm'].invoke(TASK)
+    times['first call'] = ms_since(start)
+    times['total'] = ms_since(submitted) - times.pop('failed launch', 0.0)
+
+    built['pool'].close()
+    server.shutdown()
+    return times
+
+
+PROBES = {
+    'import': lambda arg: probe_import(arg),
+    'page': lambda arg: probe_page(arg == 'warm'),
+    'task': lambda arg: probe_task(arg == 'warm'),
+}
+
+
+# --- driver ---
+
+def run_probe(name, arg, repeat):
+    results = []
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, __file__, '--probe', name, arg], cwd=ROOT,
+            capture_output=True, text=True, timeout=600,
+        )
+        lines = [line for line in proc.stdout.splitlines() if line.startswith('{')]
+        if proc.returncode != 0 or not lines:
+            raise RuntimeError(f'probe {name} {arg} failed:\n{proc.stderr[-2000:]}')
+        results.append(json.loads(lines[-1]))
+    return {key: median([r[key] for r in results]) for key in results[0]}
+
+
+def median(values):
+    values = [v for v in values if v is not None]
+    return statistics.median(values) if values else None
+
+
+def fmt(value, width=9):
+    return f"{'n/a':>{width}}" if value is None else f'{value:>{width}.0f}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start of the Streamlit agent runner")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--probe', nargs=2, metavar=('NAME', 'ARG'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.probe:
+        name, arg = args.probe
+        print(json.dumps(PROBES[name](arg)))
+        return
+
+    print(f"{'import (fresh process)':<26} {'ms':>9}")
+    for module in HEAVY_MODULES:
+        print(f"{module:<26} {fmt(run_probe('import', module, args.repeat)['ms'])}")
+
+    print()
+    print(f"{'BrowserUse.py page':<26} {'first ms':>9} {'rerun ms':>9} {'ready ms':>9}")
+    for mode in ('cold', 'warm'):
+        page = run_probe('page', mode, args.repeat)
+        label = 'AGENT_WARMUP=1' if mode == 'warm' else 'AGENT_WARMUP=0'
+        print(f"{label:<26} {fmt(page['first'])} {fmt(page['rerun'])} {fmt(page['ready'])}")
+
+    print()
+    print(f"{'first task':<12} " + ' '.join(f'{step:>10}' for step in TASK_STEPS) + f" {'total ms':>10}")
+    for mode in ('cold', 'warm'):
+        task = run_probe('task', mode, args.repeat)
+        print(f'{mode:<12} ' + ' '.join(fmt(task[step], 10) for step in TASK_STEPS) + f" {fmt(task['total'], 10)}")
+
+
+if __name__ == '__main__':
+    main()
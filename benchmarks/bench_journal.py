@@ -0,0 +1,123 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+
+from bench_overview import make_book
+from journal import Journal, open_journal
+from ledger import SEED_TICKERS, Ledger
+from order_engine import OrderEngine
+
+# Cost of the order journal (journal.py) at millions of orders.
+#
+# A book of --clients clients is seeded, then --orders random fills (one per
+# simulated millisecond) are appended one at a time, as the OrderEngine does.
+# Reported:
+#   append      time per Journal.append, and the file size
+#   engine      OrderEngine.place_order with and without the journal (real ledger)
+#   rebuild     matrix_at(random time): from the nearest snapshot (every
+#               --snapshot-every records) vs replaying everything from snapshot 0
+#   query       one client, one client + equity, one equity over a 1% time
+#               window, and a 1% time window, over the whole journal
+#
+#   python benchmarks/bench_journal.py [--orders 1000000] [--clients 10000]
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def fill_journal(journal, clients, equities, count, seed=0):
+    rng = random.Random(seed)
+    start = time.time() - count / 1000
+    begin = time.perf_counter()
+    for i in range(count):
+        shares = rng.randint(1, 20) * rng.choice((1, -1))
+        journal.append(rng.choice(clients), rng.choice(equities), shares, round(rng.uniform(50, 500), 2),
+                       ts=start + i / 1000)
+    return time.perf_counter() - begin, start
+
+
+def engine_cost(ledger, clients, equities, journal, count, seed=1):
+    engine = OrderEngine(ledger, journal=journal)
+    rng = random.Random(seed)
+    orders = [(rng.choice(clients), 'Buy', rng.choice(equities), 1) for _ in range(count)]
+    start = time.perf_counter()
+    for order in orders:
+        engine.place_order(*order)
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Order journal append, rebuild and query cost")
+    parser.add_argument('--orders', type=int, default=1_000_000)
+    parser.add_argument('--clients', type=int, default=10_000)
+    parser.add_argument('--snapshot-every', type=int, default=100_000)
+    parser.add_argument('--engine-orders', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        ledger = Ledger(os.path.join(workdir, 'ledger.db'), seed=False)
+        ledger.seed(make_book(args.clients), SEED_TICKERS)
+        clients = ledger.client_names()
+        equities = list(ledger.tickers())
+
+        journal = open_journal(ledger, os.path.join(workdir, 'journal'), snapshot_every=args.snapshot_every)
+        elapsed, start = fill_journal(journal, clients, equities, args.orders)
+        size = os.path.getsize(journal._orders_path)
+        print(f"{args.orders} orders, {args.clients} clients x {len(equities)} equities")
+        print(f"append      {elapsed / args.orders * 1e6:8.2f} us/order   {size / 1024 / 1024:.1f} MiB on disk, "
+              f"{len(journal._snapshots)} snapshots")
+
+        plain = engine_cost(ledger, clients, equities, None, args.engine_orders)
+        journaled = engine_cost(ledger, clients, equities, journal, args.engine_orders)
+        print(f"engine      {plain:8.1f} us/order without journal, {journaled:.1f} us with")
+        journal.close()
+
+        # Same records, but only snapshot 0 to rebuild from
+        full = os.path.join(workdir, 'journal')
+        bare = os.path.join(workdir, 'journal_bare')
+        os.makedirs(os.path.join(bare, 'snapshots'))
+        for name in ('orders.bin', 'names.jsonl'):
+            shutil.copy(os.path.join(full, name), bare)
+        shutil.copy(os.path.join(full, 'snapshots', f'{0:012d}.npz'), os.path.join(bare, 'snapshots'))
+
+        rng = random.Random(2)
+        when = [start + rng.uniform(0, args.orders / 1000) for _ in range(10)]
+        print()
+        print(f"{'rebuild':<34} {'mean ms':>8} {'max ms':>8}")
+        for label, path in (('nearest snapshot', full), ('replay from snapshot 0', bare)):
+            replayer = Journal(path, readonly=True)
+            times = [timed(lambda: replayer.matrix_at(t))[0] for t in when]
+            print(f"{label:<34} {np.mean(times):>8.1f} {max(times):>8.1f}")
+            replayer.close()
+
+        reader = Journal(full, readonly=True)
+        window = (start + args.orders / 1000 * 0.5, start + args.orders / 1000 * 0.51)
+        queries = [
+            ('client', lambda: reader.query(client=clients[7])),
+            ('client + equity', lambda: reader.query(client=clients[7], equity=equities[1])),
+            ('equity in 1% window', lambda: reader.query(equity=equities[1], since=window[0], until=window[1])),
+            ('1% window', lambda: reader.query(since=window[0], until=window[1])),
+        ]
+        print()
+        print(f"{'query':<34} {'ms':>8} {'matches':>8}")
+        for label, fn in queries:
+            ms, seqs = timed(fn, repeat=5)
+            print(f"{label:<34} {ms:>8.2f} {len(seqs):>8}")
+        reader.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import base64
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from browser_use.agent.prompts import AgentMessagePrompt, SystemPrompt
+from browser_use.agent.views import AgentStepInfo
+from browser_use.browser.views import BrowserState, TabInfo
+from browser_use.dom.views import DOMElementNode, DOMTextNode
+from langchain_core.load import dumps
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration
+
+from llm_cache import TIMESTAMP_RE, LLMResponseCache, cache_key
+
+# Whether a rerun of the same task is answered from the LLM response cache
+# (llm_cache.py), and what keying a step costs.
+#
+# The same --steps step task is built twice from browser_use's own prompts
+# (system prompt, task, one AgentMessagePrompt per step, with screenshots), as
+# the agent sends them: once now and once as a rerun a day later with freshly
+# taken screenshots (same pages, different bytes). Every prompt of the first run
+# goes into an empty cache; the rerun must then hit on every step. Exits
+# non-zero if any rerun key differs. Also reported: milliseconds per
+# cache_key() for a text-only and a vision step.
+#
+#   python benchmarks/bench_llm_cache.py [--steps 10] [--screenshot-kb 600]
+
+TASK = 'Open the advisor app, buy 10 shares of AAPL for Client B and report the confirmation.'
+LLM_STRING = 'model=gpt-4o temperature=0.0 tools=browser_use'
+
+
+def page(step):
+    root = DOMElementNode(is_visible=True, parent=None, tag_name='body', xpath='/body', attributes={}, children=[])
+    for index in range(30):
+        button = DOMElementNode(is_visible=True, parent=root, tag_name='button', xpath=f'/body/button[{index}]',
+                                attributes={}, children=[], is_interactive=True, is_top_element=True,
+                                highlight_index=index)
+        button.children.append(DOMTextNode(is_visible=True, parent=button, text=f'Client {index} step {step}'))
+        root.children.append(button)
+    return root
+
+
+def screenshot(step, run, size):
+    # Same page, different bytes per run, like two captures of one Streamlit page
+    return base64.b64encode(bytes([step, run]) + os.urandom(size)).decode('ascii')
+
+
+# The message list of every step of one run, serialized as LangChain passes it to the cache
+def run_prompts(steps, vision, run, screenshot_bytes, when):
+    system = SystemPrompt(action_description='click_element, input_text, done').get_system_message()
+    messages = [system, HumanMessage(content=TASK)]
+    prompts = []
+    for step in range(steps):
+        state = BrowserState(
+            element_tree=page(step), selector_map={}, url=f'http://localhost:8501/?step={step}', title='Advisor',
+            tabs=[TabInfo(page_id=0, url=f'http://localhost:8501/?step={step}', title='Advisor')],
+            screenshot=screenshot(step, run, screenshot_bytes) if vision else None,
+        )
+        message = AgentMessagePrompt(state, step_info=AgentStepInfo(step, 100)).get_user_message(use_vision=vision)
+        # Stand-in for running at another time of day
+        if isinstance(message.content, str):
+            message.content = TIMESTAMP_RE.sub(f"Current date and time: {when:%Y-%m-%d %H:%M}", message.content)
+        else:
+            message.content[0]['text'] = TIMESTAMP_RE.sub(f"Current date and time: {when:%Y-%m-%d %H:%M}",
+                                                          message.content[0]['text'])
+        prompts.append(dumps(messages + [message]))
+        messages.append(AIMessage(content=f'{{"action": [{{"click_element": {{"index": {step}}}}}]}}'))
+    return prompts
+
+
+def time_keys(prompts, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for prompt in prompts:
+            cache_key(prompt, LLM_STRING)
+        times.append((time.perf_counter() - start) * 1000 / len(prompts))
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM response cache hits on a rerun of the same task")
+    parser.add_argument('--steps', type=int, default=10)
+    parser.add_argument('--screenshot-kb', type=int, default=600)
+    args = parser.parse_args()
+
+    now = datetime.now()
+    failed = False
+    print(f"{'prompts':<10} {'rerun hits':>11} {'key ms/step':>12}")
+    for vision in (False, True):
+        first = run_prompts(args.steps, vision, 0, args.screenshot_kb * 1024, now)
+        rerun = run_prompts(args.steps, vision, 1, args.screenshot_kb * 1024, now + timedelta(days=1, minutes=7))
+        assert first != rerun, 'the rerun should differ before normalizing'
+        with tempfile.TemporaryDirectory() as directory:
+            cache = LLMResponseCache(path=os.path.join(directory, 'cache.db'))
+            for prompt in first:
+                cache.update(prompt, LLM_STRING, [ChatGeneration(message=AIMessage(content='{"action": []}'))])
+            hits = sum(cache.lookup(prompt, LLM_STRING) is not None for prompt in rerun)
+        failed = failed or hits != len(rerun)
+        label = 'vision' if vision else 'text'
+        print(f"{label:<10} {f'{hits}/{len(rerun)}':>11} {time_keys(rerun):>12.2f}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
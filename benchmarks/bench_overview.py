@@ -0,0 +1,100 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from ledger import Ledger, SEED_TICKERS
+from portfolio import load_portfolio, valuate
+
+# Render latency of the Clients Overview page at different book sizes.
+#
+# For each size a fresh ledger is generated and the page is rendered through
+# Streamlit's AppTest: cold (empty caches), warm (plain rerun), and after a trade
+# (holdings version moved, so the snapshot and valuation are rebuilt). The legacy
+# column times the old per-client dict/format loop on its own, without any st calls.
+#
+#   python benchmarks/bench_overview.py [sizes...]
+
+SIZES = [100, 10_000, 100_000]
+
+
+def make_book(num_clients, seed=0):
+    rng = random.Random(seed)
+    return {
+        f"Client {i:06d}": {
+            'Investment': round(rng.uniform(0, 50_000), 2),
+            'Shares': {equity: rng.randint(0, 50) for equity in SEED_TICKERS}
+        }
+        for i in range(num_clients)
+    }
+
+
+# The pre-columnar clients_overview() body, minus rendering
+def legacy_format(book, tickers):
+    for client, data in book.items():
+        shares = data.get('Shares', {})
+        shares_data = {'Equity': [], 'Shares Owned': [], 'Current Price ($)': [], 'Total Value ($)': []}
+        total_investment = 0.0
+        for equity, num_shares in shares.items():
+            current_price = tickers.get(equity, 0)
+            total_value = num_shares * current_price
+            shares_data['Equity'].append(equity)
+            shares_data['Shares Owned'].append(num_shares)
+            shares_data['Current Price ($)'].append(f"${current_price:,.2f}")
+            shares_data['Total Value ($)'].append(f"${total_value:,.2f}")
+            total_investment += total_value
+
+
+def timed(fn):
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def render(at):
+    at.run(timeout=600)
+    assert not at.exception, at.exception
+
+
+def bench(num_clients, workdir):
+    path = os.path.join(workdir, f"ledger_{num_clients}.db")
+    book = make_book(num_clients)
+    ledger = Ledger(path, seed=False)
+    ledger.seed(book, SEED_TICKERS)
+
+    os.environ['ADVISOR_LEDGER_PATH'] = path
+    st.cache_resource.clear()
+
+    at = AppTest.from_file(os.path.join(ROOT, 'advisor_app.py'), default_timeout=600)
+    at.session_state['logged_in'] = True
+    cold = timed(lambda: render(at))
+    warm = timed(lambda: render(at))
+    ledger.buy(next(iter(book)), 'Microsoft', 1)
+    after_trade = timed(lambda: render(at))
+
+    portfolio = load_portfolio(ledger)
+    load_ms = timed(lambda: load_portfolio(ledger))
+    valuate_ms = timed(lambda: valuate(portfolio))
+    legacy_ms = timed(lambda: legacy_format(book, SEED_TICKERS))
+    return cold, warm, after_trade, load_ms, valuate_ms, legacy_ms
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'clients':>8} {'cold ms':>9} {'warm ms':>9} {'trade ms':>9} "
+          f"{'load ms':>9} {'value ms':>9} {'legacy ms':>10}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for num_clients in sizes:
+            row = bench(num_clients, workdir)
+            print(f"{num_clients:>8} " + " ".join(f"{v:>9.1f}" for v in row[:5]) + f" {row[5]:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ledger import SEED_TICKERS
+from portfolio import IncrementalValuation, PortfolioMatrix, valuate
+from price_feed import SimulatedPriceFeed
+
+# Price-feed throughput and per-tick revaluation latency.
+#
+# For each book size: how fast the simulated feed generates ticks, the cost of
+# revaluing the book for one tick incrementally vs a full valuate(), and the
+# end-to-end ticks/s of generate + coalesce + incremental apply in 50-tick batches.
+#
+#   python benchmarks/bench_price_feed.py [sizes...]
+
+SIZES = [10_000, 100_000, 1_000_000]
+TICKS = 20_000
+BATCH = 50
+
+
+def make_portfolio(num_clients, seed=0):
+    rng = np.random.default_rng(seed)
+    equities = list(SEED_TICKERS)
+    shares = rng.integers(0, 50, size=(num_clients, len(equities)))
+    # Roughly half of clients hold nothing in a given equity
+    shares[rng.random(shares.shape) < 0.5] = 0
+    return PortfolioMatrix(
+        clients=[f"Client {i:07d}" for i in range(num_clients)],
+        equities=equities,
+        shares=shares,
+        cash=rng.uniform(0, 50_000, size=num_clients),
+        prices=np.array(list(SEED_TICKERS.values())),
+    )
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def bench(num_clients):
+    portfolio = make_portfolio(num_clients)
+    feed = SimulatedPriceFeed(SEED_TICKERS, seed=1)
+
+    start = time.perf_counter()
+    feed.generate(TICKS)
+    generate_rate = TICKS / (time.perf_counter() - start)
+
+    incremental = IncrementalValuation(portfolio)
+    single_ticks = [feed.generate(1) for _ in range(2_000)]
+    it = iter(single_ticks)
+    incremental_us = per_call_us(lambda: incremental.apply_ticks(next(it)), len(single_ticks))
+    full_us = per_call_us(lambda: valuate(portfolio, incremental.prices), 50)
+
+    incremental = IncrementalValuation(portfolio)
+    start = time.perf_counter()
+    for _ in range(TICKS // BATCH):
+        incremental.apply_ticks(feed.generate(BATCH))
+    end_to_end_rate = TICKS / (time.perf_counter() - start)
+
+    drift = np.max(np.abs(incremental.totals - portfolio.shares @ incremental.prices))
+    return generate_rate, incremental_us, full_us, end_to_end_rate, drift
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'clients':>9} {'gen ticks/s':>12} {'incr us/tick':>13} {'full us/tick':>13} "
+          f"{'e2e ticks/s':>12} {'max drift $':>12}")
+    for num_clients in sizes:
+        generate_rate, incremental_us, full_us, end_to_end_rate, drift = bench(num_clients)
+        print(f"{num_clients:>9} {generate_rate:>12,.0f} {incremental_us:>13,.1f} {full_us:>13,.1f} "
+              f"{end_to_end_rate:>12,.0f} {drift:>12.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench_overview import make_book
+from ledger import SEED_TICKERS, Ledger
+from order_engine import OrderEngine
+from portfolio import load_portfolio
+from rebalance import plan_rebalance
+
+# "Sell all Nvidia, spend as much as possible on Morgan Stanley" for every client.
+#
+#   per-order   what the agent does today, minus the browser: read each client,
+#               work out the affordable share count, then one sell and one buy
+#               through OrderEngine.place_order (one ledger transaction each).
+#               Run on at most PER_ORDER_LIMIT clients and extrapolated.
+#   rebalance   OrderEngine.rebalance(): load the book, plan it with array
+#               operations, apply it in one transaction (plan and apply also
+#               timed separately)
+# Both run on the same freshly seeded book; the final books are compared on the
+# clients both handled.
+#
+#   python benchmarks/bench_rebalance.py [sizes...]
+
+SIZES = [1_000, 10_000, 100_000]
+PER_ORDER_LIMIT = 2_000
+SELL = 'Nvidia'
+BUY = 'Morgan Stanley'
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def per_order(engine, clients):
+    for client in clients:
+        position = engine.ledger.get_client(client)
+        held = position['Shares'][SELL]
+        cash = position['Investment']
+        if held:
+            cash = engine.place_order(client, 'Sell', SELL, held)['investment']
+        shares = int(cash // engine.ledger.get_price(BUY))
+        if shares:
+            engine.place_order(client, 'Buy', BUY, shares)
+
+
+def seeded(path, book):
+    ledger = Ledger(path, seed=False)
+    ledger.seed(book, SEED_TICKERS)
+    return ledger
+
+
+def bench(num_clients, workdir):
+    book = make_book(num_clients)
+    loop_ledger = seeded(os.path.join(workdir, f'loop_{num_clients}.db'), book)
+    batch_ledger = seeded(os.path.join(workdir, f'batch_{num_clients}.db'), book)
+    sample = loop_ledger.client_names()[:PER_ORDER_LIMIT]
+
+    loop_ms, _ = timed(lambda: per_order(OrderEngine(loop_ledger), sample))
+    loop_ms *= num_clients / len(sample)
+
+    plan_ms, plan = timed(lambda: plan_rebalance(load_portfolio(batch_ledger), sell_all=[SELL], buy_max=BUY))
+    batch_ms, result = timed(lambda: OrderEngine(batch_ledger).rebalance(sell_all=[SELL], buy_max=BUY))
+    assert result['status'] == 'success', result['message']
+
+    loop_book = loop_ledger.clients()
+    batch_book = batch_ledger.clients()
+    same = all(
+        loop_book[c]['Shares'] == batch_book[c]['Shares']
+        and abs(loop_book[c]['Investment'] - batch_book[c]['Investment']) < 1e-6
+        for c in sample
+    )
+    loop_ledger.close()
+    batch_ledger.close()
+    return loop_ms, plan_ms, batch_ms, result['orders'], same
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'clients':>8} {'orders':>8} {'per-order ms':>13} {'plan ms':>9} {'rebalance ms':>13} {'speedup':>8} {'same':>5}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            loop_ms, plan_ms, batch_ms, orders, same = bench(n, workdir)
+            marker = '*' if n > PER_ORDER_LIMIT else ' '
+            print(f"{n:>8} {orders:>8} {loop_ms:>12.0f}{marker} {plan_ms:>9.1f} {batch_ms:>13.1f} "
+                  f"{loop_ms / batch_ms:>7.0f}x {str(same):>5}")
+    print(f"* extrapolated from the first {PER_ORDER_LIMIT} clients")
+
+
+if __name__ == '__main__':
+    main()
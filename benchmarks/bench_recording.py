@@ -0,0 +1,114 @@
+import argparse
+import base64
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from PIL import Image, ImageDraw
+
+from recording import Recorder, _dir_size
+
+# Cost of recording a run on the agent's loop, and what it leaves on disk.
+#
+# A synthetic run of --steps steps is fed through the step callback with
+# 1280x1100 PNG screenshots (text blocks on a white page, like the advisor
+# app); --duplicates of the steps repeat the previous page, as scrolls and
+# retries on a Streamlit page do. Compared:
+#   sync       every screenshot written as PNG on the loop, then a GIF of all
+#              steps rendered at the end (what trace/generate_gif cost in-line)
+#   recorder   recording.Recorder: enqueue on the loop, dedup + JPEG + gzip
+#              trace on the writer thread
+# "loop ms" is time spent on the caller's thread (per step mean / max, plus the
+# end of the run); disk is the run's directory after everything is flushed.
+#
+#   python benchmarks/bench_recording.py [--steps 40] [--duplicates 0.4]
+
+
+class FakeState:
+    def __init__(self, screenshot, step):
+        self.screenshot = screenshot
+        self.url = f'http://localhost:8501/?step={step}'
+        self.title = 'Advisor'
+
+
+def screenshots(steps, duplicates, seed=0):
+    rng = random.Random(seed)
+    shots = []
+    for step in range(steps):
+        if shots and rng.random() < duplicates:
+            shots.append(shots[-1])
+            continue
+        image = Image.new('RGB', (1280, 1100), 'white')
+        draw = ImageDraw.Draw(image)
+        for row in range(40):
+            y = 20 + row * 26
+            draw.text((30, y), ' '.join(f'{rng.randint(0, 99999):05d}' for _ in range(12)), fill='black')
+        draw.rectangle((1000, 20 + step % 30 * 30, 1200, 40 + step % 30 * 30), fill=(255, 75, 75))
+        out = io.BytesIO()
+        image.save(out, 'PNG')
+        shots.append(base64.b64encode(out.getvalue()).decode('ascii'))
+    return shots
+
+
+def run_sync(shots, directory):
+    loop_times = []
+    for step, shot in enumerate(shots):
+        start = time.perf_counter()
+        with open(os.path.join(directory, f'{step:04d}.png'), 'wb') as f:
+            f.write(base64.b64decode(shot))
+        loop_times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    frames = [Image.open(io.BytesIO(base64.b64decode(shot))).convert('RGB') for shot in shots]
+    frames[0].save(os.path.join(directory, 'run.gif'), save_all=True, append_images=frames[1:], duration=1000)
+    end = time.perf_counter() - start
+    return loop_times, end, _dir_size(directory)
+
+
+def run_recorder(shots, directory):
+    recorder = Recorder(directory, max_age_days=None)
+    run = recorder.start_run('bench')
+    loop_times = []
+    for step, shot in enumerate(shots):
+        start = time.perf_counter()
+        run(FakeState(shot, step), None, step + 1)
+        loop_times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    run.finish()
+    end = time.perf_counter() - start
+    recorder.flush()
+    recorder.close()
+    return loop_times, end, _dir_size(directory), run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recording cost on the agent loop and on disk")
+    parser.add_argument('--steps', type=int, default=40)
+    parser.add_argument('--duplicates', type=float, default=0.4, help="Share of steps that repeat the previous page")
+    args = parser.parse_args()
+
+    shots = screenshots(args.steps, args.duplicates)
+    png_bytes = sum(len(base64.b64decode(s)) for s in shots)
+    print(f"{args.steps} steps, {len(set(shots))} distinct pages, {png_bytes / 1024 / 1024:.1f} MiB of PNG screenshots")
+    print()
+    print(f"{'mode':<10} {'loop ms/step':>13} {'max':>8} {'end of run ms':>14} {'disk MiB':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        loop_times, end, size = run_sync(shots, tmp)
+    print(f"{'sync':<10} {sum(loop_times) / len(loop_times) * 1000:>13.2f} {max(loop_times) * 1000:>8.2f} "
+          f"{end * 1000:>14.1f} {size / 1024 / 1024:>9.2f}")
+    with tempfile.TemporaryDirectory() as tmp:
+        loop_times, end, size, run = run_recorder(shots, tmp)
+    print(f"{'recorder':<10} {sum(loop_times) / len(loop_times) * 1000:>13.2f} {max(loop_times) * 1000:>8.2f} "
+          f"{end * 1000:>14.1f} {size / 1024 / 1024:>9.2f}")
+    print()
+    print(f"recorder: {run.frames} frames written, {run.duplicate_frames} duplicates skipped, "
+          f"{run.dropped_frames} dropped")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+import argparse
+import io
+import logging
+import os
+import random
+import re
+import string
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from redaction import SecretRedactionFilter
+
+# Per-record cost of secret redaction (redaction.py) at different secret counts.
+#
+# Records are the agent lines of sample_bank_email_log.txt, replayed in a loop
+# (a few of them carry the demo login, as in the original log). For each number
+# of secrets (the 4 real sample values plus random ones) the same records go
+# through:
+#   replace   one str.replace per secret
+#   regex     one alternation of all secrets, longest first
+#   trie      SecretRedactionFilter: one regex built from a trie of the secrets
+# and, for scale, the cost of logging the record to a formatted stream handler
+# with no redaction at all. Times are microseconds per record.
+#
+#   python benchmarks/bench_redaction.py [--records 20000] [--secrets 4 100 1000]
+
+SAMPLE_LOG = os.path.join(ROOT, 'sample_bank_email_log.txt')
+SAMPLE_SECRETS = {
+    'banking_username': 'johnsmith',
+    'banking_password': 'securepassword123',
+    'email': 'tengtestms@gmail.com',
+    'email_password': 'operatorpassword',
+}
+
+
+def messages():
+    with open(SAMPLE_LOG, encoding='utf-8') as f:
+        lines = [line.split('] ', 1)[1].rstrip('\n') for line in f if line.startswith(('INFO', 'ERROR', 'WARNING'))]
+    # The sample was captured before redaction; make sure the login line is in it
+    lines.append('⌨️  Input johnsmith into index 5')
+    lines.append('⌨️  Input securepassword123 into index 7')
+    return lines
+
+
+def make_secrets(count, seed=0):
+    rng = random.Random(seed)
+    secrets = dict(SAMPLE_SECRETS)
+    alphabet = string.ascii_letters + string.digits
+    while len(secrets) < count:
+        secrets[f'secret_{len(secrets)}'] = ''.join(rng.choice(alphabet) for _ in range(rng.randint(8, 24)))
+    return dict(list(secrets.items())[:count])
+
+
+class ReplaceFilter(SecretRedactionFilter):
+    def redact(self, text):
+        for value, placeholder in self._placeholders.items():
+            if value in text:
+                text = text.replace(value, placeholder)
+        return text
+
+
+class AlternationFilter(SecretRedactionFilter):
+    def set_secrets(self, secrets):
+        super().set_secrets(secrets)
+        values = sorted(self._placeholders, key=len, reverse=True)
+        self._pattern = re.compile('|'.join(re.escape(v) for v in values)) if values else None
+
+
+def make_records(lines, count):
+    logger = logging.getLogger('browser_use.controller')
+    return [logger.makeRecord(logger.name, logging.INFO, __file__, 0, lines[i % len(lines)], None, None)
+            for i in range(count)]
+
+
+def time_filter(redaction, lines, count):
+    records = make_records(lines, count)
+    start = time.perf_counter()
+    for record in records:
+        redaction.filter(record)
+    elapsed = time.perf_counter() - start
+    leaked = sum(v in r.getMessage() for r in records for v in SAMPLE_SECRETS.values())
+    return elapsed / count * 1e6, leaked
+
+
+def time_logging(lines, count):
+    stream = io.StringIO()
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(levelname)-8s [%(name)s] %(message)s'))
+    logger = logging.getLogger('bench_redaction')
+    logger.propagate = False
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    start = time.perf_counter()
+    for i in range(count):
+        logger.info(lines[i % len(lines)])
+    elapsed = time.perf_counter() - start
+    logger.removeHandler(handler)
+    return elapsed / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-record cost of log secret redaction")
+    parser.add_argument('--records', type=int, default=20000)
+    parser.add_argument('--secrets', type=int, nargs='*', default=[4, 100, 1000])
+    args = parser.parse_args()
+
+    lines = messages()
+    base = time_logging(lines, args.records)
+    print(f"{len(lines)} distinct log lines, {args.records} records per run; "
+          f"logging one record without redaction: {base:.2f} us")
+    print()
+    print(f"{'secrets':>8} {'replace us':>11} {'regex us':>9} {'trie us':>8} {'trie vs logging':>16} {'leaked':>7}")
+    for count in args.secrets:
+        secrets = make_secrets(count)
+        replace, _ = time_filter(ReplaceFilter(secrets), lines, args.records)
+        alternation, _ = time_filter(AlternationFilter(secrets), lines, args.records)
+        trie, leaked = time_filter(SecretRedactionFilter(secrets), lines, args.records)
+        print(f"{count:>8} {replace:>11.2f} {alternation:>9.2f} {trie:>8.2f} {trie / base * 100:>15.0f}% {leaked:>7}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scratch_app import ScratchApp
+from scripted_llm import ScriptedChatModel
+from ux_tasks import UX_TEST_EXPECTED, UX_TEST_TASKS, ux_test_script, with_app_url
+
+# Offline end-to-end run of the UX test scenarios against a local advisor_app.
+#
+# Each run starts advisor_app on a fresh, freshly seeded ledger and a free port
+# (scratch_app.py, so trades from one scenario never affect the next and a
+# running dev app on 8501 is left alone) and drives a real
+# browser_use Agent and browser through the scenario. ScriptedChatModel stands in
+# for the LLM, so no network or API key is needed and every run takes the same
+# path. A scenario passes when the agent finishes and its result contains the
+# app message the test expects.
+#
+# Per scenario: steps, LLM calls, wall time (median over --repeat runs, app
+# startup excluded), peak Python heap of this process during the run (the agent
+# and browser_use side; tracemalloc) and peak RSS of the app server (Linux only).
+# tracemalloc slows every allocation down, so the heap is measured in one extra
+# run of its own and the timed runs go without it.
+# Results go to a JSON file so releases can be compared with --compare.
+#
+#   python benchmarks/bench_scenarios.py [names...] [--repeat 3] [--compare results/old.json]
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+# The advisor app's built-in demo login
+SENSITIVE_DATA = {'banking_username': 'johnsmith', 'banking_password': 'securepassword123'}
+
+
+# Peak resident set of a live process in KiB, from /proc (None elsewhere)
+def peak_rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# One run of a scenario: timed, or with trace_memory its peak Python heap instead
+def run_scenario(pool, name, url, max_steps, trace_memory=False):
+    from browser_use import Agent
+
+    llm = ScriptedChatModel(script=ux_test_script(name, url))
+
+    async def run():
+        async with pool.lease() as context:
+            agent = Agent(
+                task=with_app_url(UX_TEST_TASKS[name], url),
+                llm=llm,
+                browser_context=context,
+                sensitive_data=SENSITIVE_DATA,
+                use_vision=False,
+                generate_gif=False,
+                max_failures=3,
+            )
+            return await agent.run(max_steps=max_steps)
+
+    wall = peak = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            history = pool.run(run()).result()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    else:
+        start = time.perf_counter()
+        history = pool.run(run()).result()
+        wall = time.perf_counter() - start
+
+    final = ' '.join((history.final_result() or '').split())
+    return {
+        'passed': bool(history.is_done() and re.search(UX_TEST_EXPECTED[name], final)),
+        'steps': len(history.history),
+        'llm_calls': llm.calls,
+        'wall_seconds': wall,
+        'peak_python_kb': peak // 1024 if peak is not None else None,
+        'final_result': final,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def bench(names, port, repeat, max_steps, headless=True):
+    from browser_use.browser.browser import BrowserConfig
+
+    from browser_pool import BrowserPool
+
+    pool = BrowserPool(max_size=1, browser_config=BrowserConfig(headless=headless))
+    scenarios = []
+    try:
+        for name in names:
+            runs = []
+            # `repeat` timed runs, then one for the Python heap
+            for trace_memory in [False] * repeat + [True]:
+                with ScratchApp(port) as app:
+                    result = run_scenario(pool, name, app.url, max_steps, trace_memory=trace_memory)
+                    result['app_peak_rss_kb'] = peak_rss_kb(app.proc.pid)
+                runs.append(result)
+            timed = runs[:-1]
+            last = timed[-1]
+            scenarios.append({
+                'name': name,
+                'passed': all(r['passed'] for r in runs),
+                'steps': last['steps'],
+                'llm_calls': last['llm_calls'],
+                'wall_seconds': statistics.median(r['wall_seconds'] for r in timed),
+                'wall_seconds_runs': [r['wall_seconds'] for r in timed],
+                'peak_python_kb': runs[-1]['peak_python_kb'],
+                'app_peak_rss_kb': max((r['app_peak_rss_kb'] or 0) for r in runs) or None,
+                'final_result': last['final_result'],
+            })
+    finally:
+        pool.close()
+    return {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'repeat': repeat,
+        'scenarios': scenarios,
+    }
+
+
+def format_results(results, baseline=None):
+    previous = {s['name']: s for s in (baseline or {}).get('scenarios', [])}
+    lines = [
+        f"{'scenario':<18} {'ok':<4} {'steps':>5} {'llm':>4} {'wall s':>8} {'py heap MiB':>12} {'app RSS MiB':>12}"
+        + ('  vs baseline' if baseline else ''),
+    ]
+    for s in results['scenarios']:
+        rss = f"{s['app_peak_rss_kb'] / 1024:.1f}" if s['app_peak_rss_kb'] else '-'
+        line = (
+            f"{s['name']:<18} {'yes' if s['passed'] else 'no':<4} {s['steps']:>5} {s['llm_calls']:>4} "
+            f"{s['wall_seconds']:>8.2f} {s['peak_python_kb'] / 1024:>12.1f} {rss:>12}"
+        )
+        old = previous.get(s['name'])
+        if old:
+            line += f"  {s['wall_seconds'] - old['wall_seconds']:+.2f}s, {s['steps'] - old['steps']:+d} steps"
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the advisor app UX scenarios")
+    parser.add_argument('names', nargs='*', help=f"Scenarios (default: all of {', '.join(UX_TEST_TASKS)})")
+    parser.add_argument('--port', type=int, default=None,
+                        help="Port for the local advisor_app (default: a free one per run)")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Timed runs per scenario; wall time is the median (plus one run for the heap)")
+    parser.add_argument('--max-steps', type=int, default=30)
+    parser.add_argument('--headed', action='store_true', help="Show the browser")
+    parser.add_argument('--output', default=None, help="Results file (default: benchmarks/results/scenarios-<rev>.json)")
+    parser.add_argument('--compare', default=None, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    names = args.names or list(UX_TEST_TASKS)
+    results = bench(names, args.port, args.repeat, args.max_steps, headless=not args.headed)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print(format_results(results, baseline))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"scenarios-{results['revision']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+    sys.exit(0 if all(s['passed'] for s in results['scenarios']) else 1)
+
+
+if __name__ == '__main__':
+    main()
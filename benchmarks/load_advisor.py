@@ -0,0 +1,336 @@
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+from bench_overview import make_book
+from ledger import SEED_TICKERS, Ledger
+
+# Load test of advisor_app.py: how many concurrent sessions one server takes
+# before login, the overview render and order latency degrade.
+#
+# Each level starts a fresh `streamlit run advisor_app.py` on its own ledger
+# and drives N sessions over Streamlit's websocket protocol, the way N
+# browsers would (AppTest can't do this: it runs one session per process).
+# A session speaks BackMsg/ForwardMsg directly: it sends a rerun with the
+# widget states a browser would send and times the run until the server
+# reports it finished (st.rerun() round trips included). Per session:
+#   login      submit the login form
+#   overview   "Clients Overview": clients_overview() renders the book
+#   manage     "Manage Investments", when a trade starts from another page
+#   order      buy or sell one share of a random equity (Execute)
+# --ops operations per session after login, --read-ratio of them overviews,
+# with --think seconds between them. All sessions start together.
+#
+# Reports p50/p95/p99 latency per operation (and p95 against the one-session
+# level), throughput over the operations phase, and server memory per session:
+# the server's RSS once every session has logged in, minus its RSS after
+# start-up, divided by N. The driver shares the machine with the server, so
+# treat absolute numbers at high N as an upper bound.
+#
+#   python benchmarks/load_advisor.py [levels...] [--ops 20] [--clients 3] [--read-ratio 0.7]
+
+APP = os.path.join(ROOT, 'advisor_app.py')
+LEVELS = [1, 4, 16, 64]
+OPERATIONS = ('login', 'overview', 'manage', 'order')
+USERNAME = 'johnsmith'
+PASSWORD = 'securepassword123'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_kb(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+# Nearest-rank percentile
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))]
+
+
+class Server:
+    def __init__(self, ledger_path, log_path):
+        self.port = free_port()
+        env = dict(os.environ, ADVISOR_LEDGER_PATH=ledger_path)
+        for name in ('ADVISOR_PRICE_FEED', 'ADVISOR_API_PORT'):
+            env.pop(name, None)
+        self.log = open(log_path, 'w')
+        self.process = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', APP, '--server.port', str(self.port),
+             '--server.headless', 'true', '--server.fileWatcherType', 'none',
+             '--browser.gatherUsageStats', 'false'],
+            cwd=ROOT, env=env, stdout=self.log, stderr=subprocess.STDOUT)
+        self.url = f'ws://127.0.0.1:{self.port}/_stcore/stream'
+
+    def wait_ready(self, timeout=60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                break
+            try:
+                with urllib.request.urlopen(f'http://127.0.0.1:{self.port}/_stcore/health', timeout=1) as r:
+                    if r.status == 200:
+                        return
+            except OSError:
+                time.sleep(0.2)
+        raise RuntimeError(f'streamlit did not start; see {self.log.name}')
+
+    def rss_kb(self):
+        return rss_kb(self.process.pid)
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+# One script run's output: the widgets and alerts it rendered
+class Page:
+    def __init__(self, messages):
+        self.widgets = {}
+        self.success = []
+        self.error = []
+        self.exception = []
+        for msg in messages:
+            if msg.WhichOneof('type') != 'delta' or msg.delta.WhichOneof('type') != 'new_element':
+                continue
+            element = msg.delta.new_element
+            kind = element.WhichOneof('type')
+            if kind in ('button', 'text_input', 'selectbox', 'number_input'):
+                widget = getattr(element, kind)
+                self.widgets[widget.label] = widget
+            elif kind == 'alert':
+                alert = element.alert
+                if alert.format == alert.SUCCESS:
+                    self.success.append(alert.body)
+                elif alert.format == alert.ERROR:
+                    self.error.append(alert.body)
+            elif kind == 'exception':
+                self.exception.append(element.exception.message)
+
+
+class Session:
+    def __init__(self, url, seed, clients, equities, think):
+        self.url = url
+        self.rng = random.Random(seed)
+        self.clients = clients
+        self.equities = equities
+        self.think = think
+        self.ws = None
+        self.page = None
+        self.screen = None
+        self.page_script_hash = ''
+        self.latencies = {op: [] for op in OPERATIONS}
+        self.orders_ok = 0
+        self.orders_rejected = 0
+        self.errors = []
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+        self.page = await self._rerun([])
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    # Send a rerun with `states` and collect the messages of the run that finishes it
+    async def _rerun(self, states):
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self.page_script_hash
+        msg.rerun_script.widget_states.widgets.extend(states)
+        await self.ws.send(msg.SerializeToString())
+        messages = []
+        while True:
+            reply = ForwardMsg()
+            reply.ParseFromString(await self.ws.recv())
+            kind = reply.WhichOneof('type')
+            if kind == 'new_session':
+                self.page_script_hash = reply.new_session.page_script_hash
+                messages = []
+            messages.append(reply)
+            if kind == 'script_finished' and reply.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return Page(messages)
+
+    def _state(self, label, **value):
+        state = WidgetState(id=self.page.widgets[label].id)
+        for field, v in value.items():
+            setattr(state, field, v)
+        return state
+
+    async def _timed(self, op, states):
+        start = time.perf_counter()
+        page = await self._rerun(states)
+        self.latencies[op].append(time.perf_counter() - start)
+        self.errors.extend(f'{op}: {e}' for e in page.exception)
+        self.page = page
+        return page
+
+    async def login(self):
+        await self._timed('login', [
+            self._state('Username', string_value=USERNAME),
+            self._state('Password', string_value=PASSWORD),
+            self._state('Login', trigger_value=True),
+        ])
+        self.screen = 'Clients Overview'
+
+    async def overview(self):
+        await self._timed('overview', [self._state('Clients Overview', trigger_value=True)])
+        self.screen = 'Clients Overview'
+
+    async def trade(self):
+        if self.screen != 'Manage Investments':
+            await self._timed('manage', [self._state('Manage Investments', trigger_value=True)])
+            self.screen = 'Manage Investments'
+        page = await self._timed('order', [
+            self._state('Select Client', string_value=self.rng.choice(self.clients)),
+            self._state('Transaction Type', string_value=self.rng.choice(['Buy', 'Sell'])),
+            self._state('Select Equity', string_value=self.rng.choice(self.equities)),
+            self._state('Number of Shares', double_value=1),
+            self._state('Execute', trigger_value=True),
+        ])
+        if page.success:
+            self.orders_ok += 1
+        elif page.error:
+            self.orders_rejected += 1
+
+    async def work(self, ops, read_ratio):
+        for _ in range(ops):
+            if self.rng.random() < read_ratio:
+                await self.overview()
+            else:
+                await self.trade()
+            if self.think:
+                await asyncio.sleep(self.rng.uniform(0, 2 * self.think))
+
+
+async def _gather(sessions, fn):
+    results = await asyncio.gather(*(fn(s) for s in sessions), return_exceptions=True)
+    return [f'{type(r).__name__}: {r}' for r in results if isinstance(r, BaseException)]
+
+
+async def drive(server, num_sessions, ops, read_ratio, clients, equities, think):
+    sessions = [Session(server.url, i, clients, equities, think) for i in range(num_sessions)]
+    rss_idle = server.rss_kb()
+    failures = await _gather(sessions, Session.connect)
+    failures += await _gather(sessions, Session.login)
+    rss_logged_in = server.rss_kb()
+    start = time.perf_counter()
+    failures += await _gather(sessions, lambda s: s.work(ops, read_ratio))
+    wall = time.perf_counter() - start
+    rss_end = server.rss_kb()
+    await _gather(sessions, Session.close)
+    return sessions, failures, wall, (rss_idle, rss_logged_in, rss_end)
+
+
+def run_level(num_sessions, args, workdir):
+    path = os.path.join(workdir, f'ledger_{num_sessions}.db')
+    if args.clients > 3:
+        ledger = Ledger(path, seed=False)
+        ledger.seed(make_book(args.clients), SEED_TICKERS)
+    else:
+        ledger = Ledger(path)
+    clients = ledger.client_names()[:50]
+    equities = list(ledger.tickers())
+    ledger.close()
+
+    server = Server(path, os.path.join(workdir, f'streamlit_{num_sessions}.log'))
+    try:
+        server.wait_ready()
+        # One throwaway session, so imports and st.cache_resource are warm before the baseline
+        asyncio.run(drive(server, 1, 0, 0, clients, equities, 0))
+        sessions, failures, wall, (rss_idle, rss_logged_in, rss_end) = asyncio.run(
+            drive(server, num_sessions, args.ops, args.read_ratio, clients, equities, args.think))
+    finally:
+        server.stop()
+
+    latencies = {op: [t for s in sessions for t in s.latencies[op]] for op in OPERATIONS}
+    work_ops = sum(len(latencies[op]) for op in ('overview', 'order'))
+    return {
+        'sessions': num_sessions,
+        'latencies': latencies,
+        'throughput': work_ops / wall if wall else 0.0,
+        'wall': wall,
+        'rss_mib_per_session': (rss_logged_in - rss_idle) / 1024 / num_sessions if rss_idle else None,
+        'rss_end_mib_per_session': (rss_end - rss_idle) / 1024 / num_sessions if rss_idle else None,
+        'orders_ok': sum(s.orders_ok for s in sessions),
+        'orders_rejected': sum(s.orders_rejected for s in sessions),
+        'errors': failures + [e for s in sessions for e in s.errors],
+    }
+
+
+def format_level(result, baseline):
+    lines = []
+    for op in OPERATIONS:
+        values = result['latencies'][op]
+        if not values:
+            continue
+        p50, p95, p99 = (percentile(values, p) * 1000 for p in (50, 95, 99))
+        base = baseline['latencies'][op] if baseline else None
+        factor = f"{p95 / (percentile(base, 95) * 1000):.1f}x" if base else '-'
+        lines.append(f"{result['sessions']:>8} {op:<9} {len(values):>6} {p50:>8.1f} {p95:>8.1f} {p99:>8.1f} {factor:>8}")
+    rss = result['rss_mib_per_session']
+    rss_end = result['rss_end_mib_per_session']
+    lines.append(
+        f"{'':>8} {result['throughput']:.1f} ops/s over {result['wall']:.1f}s; "
+        f"{result['orders_ok']} orders filled, {result['orders_rejected']} rejected; "
+        f"server RSS {'-' if rss is None else f'{rss:+.2f}'} MiB/session logged in, "
+        f"{'-' if rss_end is None else f'{rss_end:+.2f}'} MiB/session at the end; "
+        f"{len(result['errors'])} errors"
+    )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of advisor_app.py")
+    parser.add_argument('levels', nargs='*', type=int, help=f"Concurrent sessions per level (default: {LEVELS})")
+    parser.add_argument('--ops', type=int, default=20, help="Operations per session after login")
+    parser.add_argument('--read-ratio', type=float, default=0.7, help="Share of operations that are overview renders")
+    parser.add_argument('--think', type=float, default=0.0, help="Mean seconds between a session's operations")
+    parser.add_argument('--clients', type=int, default=3, help="Clients in the book (3 = the app's seed data)")
+    args = parser.parse_args()
+
+    levels = args.levels or LEVELS
+    print(f"{'sessions':>8} {'op':<9} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'p95 vs 1':>8}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as workdir:
+        for level in levels:
+            result = run_level(level, args, workdir)
+            baseline = baseline or (result if level == 1 else None)
+            print(format_level(result, baseline), flush=True)
+            for error in result['errors'][:3]:
+                print(f"{'':>8} error: {error}")
+
+
+if __name__ == '__main__':
+    main()
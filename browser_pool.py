@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import threading
+import time
+from contextlib import asynccontextmanager
+
+from browser_use.browser.browser import Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext, BrowserContextConfig
+
+logger = logging.getLogger(__name__)
+
+# Process-wide pool of pre-launched browsers for the agent runners.
+#
+# Playwright objects belong to the event loop that created them, so the pool owns a
+# long-lived loop in a daemon thread and every agent run is submitted to it. That
+# lets browsers survive Streamlit reruns (which would otherwise each get a fresh
+# asyncio.run loop) instead of launching Chromium per task and leaking it after.
+#
+# Each task leases a browser plus a fresh BrowserContext (so cookies and storage are
+# isolated per task). Idle browsers keep one spare context already initialised so a
+# lease does not wait on context creation; spares are only handed out for leases
+# that use the pool's default context config.
+
+
+class PooledBrowser:
+    def __init__(self, browser):
+        self.browser = browser
+        self.spare = None
+        self.last_used = time.monotonic()
+        self.leases = 0
+
+    def is_healthy(self):
+        playwright_browser = self.browser.playwright_browser
+        return playwright_browser is not None and playwright_browser.is_connected()
+
+
+class BrowserPool:
+    def __init__(self, max_size=2, idle_timeout=300.0, browser_config=None, context_config=None,
+                 evict_interval=30.0):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.browser_config = browser_config or BrowserConfig()
+        self.context_config = context_config or BrowserContextConfig()
+        self.evict_interval = evict_interval
+
+        self._idle = []
+        self._leased = set()
+        self._size = 0
+        self._closed = False
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='browser-pool', daemon=True)
+        self._thread.start()
+        # asyncio primitives must be created on the loop that uses them
+        self._available = self.run(self._make_condition()).result()
+        self._evictor = asyncio.run_coroutine_threadsafe(self._evict_idle_forever(), self.loop)
+
+    async def _make_condition(self):
+        return asyncio.Condition()
+
+    # Schedule a coroutine on the pool's loop from any thread; returns a concurrent.futures.Future
+    def run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    # Pre-launch browsers in the background so the first task skips Chromium startup
+    def warm(self, count=1):
+        async def do_warm():
+            async with self._available:
+                to_launch = min(count, self.max_size) - self._size
+                self._size += max(0, to_launch)
+            for launched in range(max(0, to_launch)):
+                try:
+                    pooled = await self._launch()
+                except BaseException:
+                    # Give back the slots reserved above, or leases would wait for them forever
+                    async with self._available:
+                        self._size -= to_launch - launched
+                        self._available.notify(to_launch - launched)
+                    raise
+                await self._release_browser(pooled)
+        return self.run(do_warm())
+
+    async def _launch(self):
+        browser = Browser(config=self.browser_config)
+        await browser.get_playwright_browser()
+        logger.debug('Browser pool launched a browser')
+        return PooledBrowser(browser)
+
+    async def _new_context(self, pooled, config):
+        context = BrowserContext(browser=pooled.browser, config=config)
+        await context.get_session()
+        return context
+
+    async def _discard(self, pooled):
+        for closeable in (pooled.spare, pooled.browser):
+            if closeable is None:
+                continue
+            try:
+                await closeable.close()
+            except Exception as e:
+                logger.debug(f'Browser pool failed to close {closeable!r}: {e}')
+        pooled.spare = None
+
+    async def _acquire_browser(self):
+        dead = []
+        try:
+            async with self._available:
+                while True:
+                    if self._closed:
+                        raise RuntimeError('Browser pool is closed')
+                    while self._idle:
+                        pooled = self._idle.pop()
+                        if pooled.is_healthy():
+                            return pooled
+                        self._size -= 1
+                        dead.append(pooled)
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    await self._available.wait()
+        finally:
+            # Outside the lock, so a slow Chromium close holds up no other acquire or release
+            for pooled in dead:
+                await self._discard(pooled)
+        try:
+            return await self._launch()
+        except BaseException:
+            async with self._available:
+                self._size -= 1
+                self._available.notify()
+            raise
+
+    async def _release_browser(self, pooled):
+        if pooled.is_healthy() and not self._closed:
+            if pooled.spare is None:
+                try:
+                    pooled.spare = await self._new_context(pooled, self.context_config)
+                except Exception as e:
+                    logger.debug(f'Browser pool could not pre-create a context: {e}')
+            pooled.last_used = time.monotonic()
+            async with self._available:
+                self._idle.append(pooled)
+                self._available.notify()
+        else:
+            await self._discard(pooled)
+            async with self._available:
+                self._size -= 1
+                self._available.notify()
+
+    # Lease a browser and a fresh context for one task. Must run on the pool's loop
+    # (i.e. inside a coroutine passed to run()). The context is closed on exit and
+    # the browser goes back to the pool, or is discarded if it has died.
+    @asynccontextmanager
+    async def lease(self, context_config=None):
+        pooled = await self._acquire_browser()
+        self._leased.add(pooled)
+        context = None
+        try:
+            if context_config is None and pooled.spare is not None and pooled.spare.session is not None:
+                context, pooled.spare = pooled.spare, None
+            else:
+                context = await self._new_context(pooled, context_config or self.context_config)
+            pooled.leases += 1
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f'Browser pool failed to close context: {e}')
+            self._leased.discard(pooled)
+            await self._release_browser(pooled)
+
+    async def _evict_idle_forever(self):
+        while not self._closed:
+            await asyncio.sleep(self.evict_interval)
+            now = time.monotonic()
+            async with self._available:
+                expired = [p for p in self._idle if now - p.last_used > self.idle_timeout or not p.is_healthy()]
+                self._idle = [p for p in self._idle if p not in expired]
+                self._size -= len(expired)
+                if expired:
+                    self._available.notify(len(expired))
+            for pooled in expired:
+                logger.debug('Browser pool evicting idle browser')
+                await self._discard(pooled)
+
+    def stats(self):
+        return {'size': self._size, 'idle': len(self._idle), 'max_size': self.max_size}
+
+    # Close every idle browser, wait up to `timeout` seconds for leased (and launching)
+    # browsers to come back and be closed, then stop the loop. Browsers still leased
+    # after that are closed under their runs.
+    def close(self, timeout=30.0):
+        async def do_close():
+            async with self._available:
+                self._closed = True
+                idle, self._idle = self._idle, []
+                self._size -= len(idle)
+                self._available.notify_all()
+            for pooled in idle:
+                await self._discard(pooled)
+            try:
+                async with self._available:
+                    await asyncio.wait_for(self._available.wait_for(lambda: self._size <= 0), timeout)
+            except asyncio.TimeoutError:
+                leased = list(self._leased)
+                logger.warning(f'Browser pool closing {len(leased)} browser(s) still leased after {timeout:.0f}s')
+                for pooled in leased:
+                    await self._discard(pooled)
+        self._evictor.cancel()
+        try:
+            self.run(do_close()).result(timeout + 30.0)
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
@@ -1,14 +1,13 @@
 from browser_use.browser.browser import Browser
-from langchain_openai import ChatOpenAI
 from browser_use import Agent
 import asyncio
+import contextlib
 import os
 
 from dotenv import load_dotenv
 dotenv_path = os.path.join(os.path.dirname(__file__), 'secrets.env')
 load_dotenv(dotenv_path)
 
-os.environ["OPENAI_API_KEY"] = os.getenv('OPENAI_API_KEY')
 os.environ["ANONYMIZED_TELEMETRY"] = "false"
 
 # The model will only see the keys (x_name, x_password) but never the actual values
@@ -19,6 +18,11 @@ sensitive_data = {
     'banking_password': os.getenv('BANKINGPASSWORD')
 }
 
+# browser_use logs some actions with the real values substituted in; scrub them
+# from every log record before any handler sees it (redaction.py)
+from redaction import install_redaction
+install_redaction(sensitive_data)
+
 from browser_use import Agent, SystemPrompt
 
 class MySystemPrompt(SystemPrompt):
@@ -38,39 +42,25 @@ class MySystemPrompt(SystemPrompt):
 
 
 
-# Use the placeholder names in your task description
-task = """
-You are a financial advisor's assistant.
-Go to http://localhost:8501/ and login with my username and password.
-Then, do the following: 
-Capture the current state of the accounts.
-Sell all of Client C's NVIDIA shares and spend as much as possible on MS
-If client does not have enough money or shares you should stop and move on to the next step.
-You should then return to the main client menu and capture all my client metrics and print them out in a nice simple report.
-Finally, when you are done, log out of the website.
-
-Then, go to Gmail and log in with my credentials and draft an email. 
-When using email interface, when entering who to address it to, each person's email should be entered seperately. After typing each individual person's email, you should type it and then hit enter before proceeding to the next person. 
-The email must have the following:
-Addressee are the following: pradeep.sundaram@morganstanley.com; mainak.saha@morganstanley.com; timothy.eng@morganstanley.com;
-You should CC timothy.eng@outlook.com. 
-The subject should be 'Sample banking transaction with a dummy app - no hands!' 
-The body should contain, nicely formatted, the client metrics both before and after updated to reflect the changes you executed.
-You should reformat the metrics before and after to be human readable - replace new lines with enter, escape sequences with their actual characters, etc. 
-Make an additional note in the body saying Hi! and about how I didn't have to lift a finger to write the email, and about how cool Operator is and how potentially it could be quite powerful, given the correct guardrails.
-Sign it Best, Tim
-
-After doing all this make sure you've set up all the email components I've specified correctly. Do not send the email until all the above conditions have been met.
-After doing that, send the email. 
-Wait for it to send before closing. Check that it shows up in sent mail. 
-"""
+# Use the placeholder names in your task description (the prompt lives in ux_tasks.py)
+from ux_tasks import bank_email_task as task
 
 from browser_use.browser.context import BrowserContextConfig, BrowserContext
+from browser_use import Controller
+from advisor_actions import register_advisor_actions
+from llm_backend import make_llm
+from run_profiler import profile_run
+from checkpoints import CheckpointStore, run_with_checkpoints
+from recording import recorder_from_env
+
+# Compressed, deduplicated per-step recordings in .recordings/ with size/age
+# retention (recording.py); AGENT_RECORDING=0 turns them off
+recorder = recorder_from_env()
+recording = recorder.start_run('browserusetest') if recorder is not None else None
 
 config = BrowserContextConfig(
     browser_window_size={'width': 1920, 'height': 1080},
-    save_recording_path="recordingoutput",
-    trace_path="."
+    **(recording.context_options() if recording is not None else {})
 )
 
 browser = Browser()
@@ -79,22 +69,40 @@ context = BrowserContext(
     config=config,
 )
 
-llm = ChatOpenAI(
-    model='gpt-4o',
-    temperature=0.0,
-)
+# OpenAI by default, or a local mock_llm_server.py with LLM_BACKEND=mock (see llm_backend.py)
+llm = make_llm(sensitive_data)
+
+# Holdings, orders and the last transaction message straight from the advisor
+# app's order API (advisor_actions.py), if it is running; ADVISOR_ACTIONS=0 leaves them out
+controller = Controller()
+if os.getenv('ADVISOR_ACTIONS', '1') != '0':
+    register_advisor_actions(controller)
 
 # Pass the sensitive data to the agent
 agent = Agent(
     browser_context=context,
     task=task,
     llm=llm,
+    controller=controller,
     sensitive_data=sensitive_data,
     max_failures=10,
+    # `python recording.py gif <run>` renders a GIF from the recording afterwards
+    generate_gif=False,
 )
 
 async def main():
-    await agent.run()
+    # Per-step timings go to .agent_profiles/ (see run_profiler.py); AGENT_PROFILE=0 disables it
+    profile_dir = False if os.getenv('AGENT_PROFILE', '1') == '0' else None
+    with profile_run(agent, 'browserusetest', directory=profile_dir), \
+            (recorder.record(agent, run=recording) if recorder is not None else contextlib.nullcontext()):
+        # Checkpointed after every step (checkpoints.py); an interrupted run picks up
+        # from its last step next time. AGENT_RESUME=0 starts over, AGENT_CHECKPOINTS=0 disables it
+        if os.getenv('AGENT_CHECKPOINTS', '1') == '0':
+            await agent.run()
+        else:
+            await run_with_checkpoints(agent, CheckpointStore(), resume=os.getenv('AGENT_RESUME', '1') != '0')
+    if recorder is not None:
+        recorder.close()
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
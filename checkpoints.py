@@ -0,0 +1,240 @@
+import json
+import logging
+import os
+import re
+import shutil
+import time
+
+from browser_use.agent.views import AgentHistoryList
+
+from redaction import SecretRedactionFilter
+from trace_cache import run_with_replay, task_key
+
+logger = logging.getLogger(__name__)
+
+# Per-step checkpoints of agent runs, so a crashed or failed run can pick up
+# where it stopped instead of starting over from step 1.
+#
+# One directory per task (keyed like the trace cache) and optional scope, e.g.
+# a Streamlit session, so concurrent runs of the same prompt never share or
+# resume each other's checkpoint, under DEFAULT_CHECKPOINT_DIR:
+#   steps.jsonl  one AgentHistory item per line, appended after every step
+#                (screenshots dropped), so a step costs one small append
+#                rather than rewriting the whole history
+#   state.json   replaced atomically after every step: step number, current
+#                URL, the agent's memory and the browser storage state
+#                (cookies + localStorage), plus whether the run finished
+#
+# sensitive_data values in action results (browser_use reports typed text with
+# the real secret substituted in) and in the agent's memory are replaced by
+# their <secret>name</secret> placeholders before anything is written.
+#
+# Resuming restores the history and step counter, loads the cookies and local
+# storage into the agent's context, reopens the last URL and tells the agent
+# which goals are done, what it remembered and what it had extracted. The LLM
+# conversation itself is not restored; the agent continues from that summary.
+# A finished run clears its checkpoint, as does a fresh run of the task.
+
+DEFAULT_CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.checkpoints')
+
+
+class CheckpointStore:
+    def __init__(self, root=DEFAULT_CHECKPOINT_DIR, storage_every=1):
+        self.root = root
+        # Browser storage state is captured every `storage_every` steps
+        self.storage_every = storage_every
+        os.makedirs(self.root, exist_ok=True)
+
+    # Checkpoint key of a task within `scope` (any string; None = shared by every run of the task)
+    @staticmethod
+    def key(task, scope=None):
+        if not scope:
+            return task_key(task)
+        return f"{task_key(task)}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', str(scope))[:64]}"
+
+    def _dir(self, key):
+        return os.path.join(self.root, key)
+
+    def clear(self, key):
+        shutil.rmtree(self._dir(key), ignore_errors=True)
+
+    # Latest checkpoint under `key`: {'state': {...}, 'steps': [history item dicts]}, or None
+    def load(self, key):
+        directory = self._dir(key)
+        try:
+            with open(os.path.join(directory, 'state.json'), encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        steps = []
+        try:
+            with open(os.path.join(directory, 'steps.jsonl'), encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        steps.append(json.loads(line))
+                    except ValueError:
+                        # A crash mid-append leaves at most one torn line at the end
+                        break
+        except OSError:
+            pass
+        return {'state': state, 'steps': steps[:state['history_len']]}
+
+    # Rewrite steps.jsonl with just `steps`, dropping a torn last line or items
+    # appended after the last state.json, so appends continue on a clean file
+    def truncate(self, key, steps):
+        path = os.path.join(self._dir(key), 'steps.jsonl')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(data) + '\n' for data in steps)
+        os.replace(tmp, path)
+
+    # Append the history items added since the last save and rewrite state.json.
+    # `redact` replaces secrets in a string (SecretRedactionFilter.redact).
+    async def save(self, agent, key, saved_len, storage_state=None, redact=None):
+        redact = redact or (lambda text: text)
+        directory = self._dir(key)
+        os.makedirs(directory, exist_ok=True)
+        items = agent.history.history[saved_len:]
+        if items:
+            with open(os.path.join(directory, 'steps.jsonl'), 'a', encoding='utf-8') as f:
+                for item in items:
+                    data = item.model_dump()
+                    data['state']['screenshot'] = None
+                    for result in data.get('result') or []:
+                        for field in ('extracted_content', 'error'):
+                            if result.get(field):
+                                result[field] = redact(result[field])
+                    f.write(json.dumps(data) + '\n')
+
+        history = agent.history.history
+        last = history[-1] if history else None
+        state = {
+            'task': agent.task,
+            'saved': time.time(),
+            'step': agent.n_steps,
+            'history_len': len(history),
+            'url': last.state.url if last else None,
+            'memory': redact(last.model_output.current_state.memory) if last and last.model_output else '',
+            'done': agent.history.is_done(),
+            'storage_state': storage_state,
+        }
+        path = os.path.join(directory, 'state.json')
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+        return len(history)
+
+
+async def _storage_state(agent):
+    session = await agent.browser_context.get_session()
+    return await session.context.storage_state()
+
+
+async def _restore_storage(agent, storage_state):
+    if not storage_state:
+        return
+    session = await agent.browser_context.get_session()
+    if storage_state.get('cookies'):
+        await session.context.add_cookies(storage_state['cookies'])
+    origins = [o for o in storage_state.get('origins', []) if o.get('localStorage')]
+    if origins:
+        page = await session.context.new_page()
+        try:
+            for origin in origins:
+                await page.goto(origin['origin'])
+                await page.evaluate(
+                    "items => { for (const {name, value} of items) localStorage.setItem(name, value); }",
+                    origin['localStorage'],
+                )
+        finally:
+            await page.close()
+
+
+def _restore_history(agent, steps):
+    items = []
+    for data in steps:
+        data = dict(data)
+        if data.get('model_output'):
+            data['model_output'] = agent.AgentOutput.model_validate(data['model_output'])
+        data['state'] = dict(data['state'], interacted_element=data['state'].get('interacted_element') or [])
+        items.append(data)
+    agent.history = AgentHistoryList.model_validate({'history': items})
+
+
+def _resume_note(task, checkpoint, redact):
+    goals = []
+    extracted = []
+    for data in checkpoint['steps']:
+        results = data.get('result') or []
+        if data.get('model_output') and not any(r.get('error') for r in results):
+            goals.append(data['model_output']['current_state']['next_goal'])
+        # Checkpoints written before results were redacted may still hold secrets
+        extracted.extend(redact(r['extracted_content']) for r in results
+                         if r.get('include_in_memory') and r.get('extracted_content'))
+    lines = [task, '', 'This task was interrupted and is being resumed in this browser. Already completed:']
+    lines.extend(f'- {goal}' for goal in goals)
+    if checkpoint['state'].get('memory'):
+        lines += ['', f"Your memory at that point: {redact(checkpoint['state']['memory'])}"]
+    if extracted:
+        lines += ['', 'Information gathered so far:']
+        lines.extend(f'- {content}' for content in extracted)
+    lines += ['', 'Continue from the current page; do not repeat completed steps.']
+    return '\n'.join(lines)
+
+
+# Checkpoint `agent` after every step and, if resume is set and an unfinished
+# checkpoint of the same task and scope exists, restore it first. Call before
+# agent.run() (or run_with_replay). Returns the number of restored steps (0 = fresh start).
+async def enable_checkpoints(agent, store, resume=True, scope=None):
+    task = agent.task
+    key = store.key(task, scope)
+    redact = SecretRedactionFilter(getattr(agent, 'sensitive_data', None) or {}).redact
+    checkpoint = store.load(key) if resume else None
+    restored = 0
+    if checkpoint and not checkpoint['state']['done'] and checkpoint['steps']:
+        _restore_history(agent, checkpoint['steps'])
+        store.truncate(key, checkpoint['steps'])
+        agent.n_steps = checkpoint['state']['step']
+        await _restore_storage(agent, checkpoint['state'].get('storage_state'))
+        if checkpoint['state'].get('url'):
+            page = await agent.browser_context.get_current_page()
+            await page.goto(checkpoint['state']['url'])
+        agent.add_new_task(_resume_note(task, checkpoint, redact))
+        restored = len(checkpoint['steps'])
+        logger.info(f'⏯️  Resumed from checkpoint at step {agent.n_steps} ({restored} steps restored)')
+    else:
+        store.clear(key)
+
+    saved = {'len': restored, 'storage': checkpoint['state'].get('storage_state') if restored else None}
+    step = agent.step
+
+    async def checkpointed_step(step_info=None):
+        await step(step_info)
+        if store.storage_every and agent.n_steps % store.storage_every == 0:
+            try:
+                saved['storage'] = await _storage_state(agent)
+            except Exception as e:
+                logger.debug(f'Could not capture browser storage state: {e}')
+        try:
+            saved['len'] = await store.save(agent, key, saved['len'], saved['storage'], redact)
+        except OSError as e:
+            logger.warning(f'Could not write checkpoint: {e}')
+
+    agent.step = checkpointed_step
+    return restored
+
+
+# agent.run() with checkpoints: resumes an unfinished checkpoint of the task (in
+# `scope`) if there is one, otherwise starts fresh (through run_with_replay when a
+# trace cache is given; a resumed run is already past the replayable prefix)
+async def run_with_checkpoints(agent, store, resume=True, trace_cache=None, max_steps=100, scope=None):
+    restored = await enable_checkpoints(agent, store, resume=resume, scope=scope)
+    if trace_cache is not None and not restored:
+        history = await run_with_replay(agent, trace_cache, max_steps=max_steps)
+    else:
+        # max_steps is the budget of the whole task, restored steps included
+        history = await agent.run(max_steps=max(1, max_steps - restored))
+    if history.is_done():
+        store.clear(store.key(agent.task, scope))
+    return history
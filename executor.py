@@ -0,0 +1,287 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+
+from dotenv import load_dotenv
+
+from checkpoints import CheckpointStore, run_with_checkpoints
+from llm_backend import make_llm
+from redaction import install_redaction
+from run_profiler import format_summary, profile_run, summarize
+from trace_cache import TraceCache, run_with_replay
+from ux_tasks import with_app_url
+
+logger = logging.getLogger(__name__)
+
+# Runs a queue of agent tasks concurrently.
+#
+# Up to `concurrency` agents run at once, each on its own BrowserContext leased
+# from a BrowserPool (so cookies/storage never leak between tasks). Every attempt
+# is bounded by `timeout` seconds and retried up to `retries` more times if it
+# raises, times out or ends without the agent calling done.
+#
+# Results are plain dicts:
+#   {'name', 'success', 'attempts', 'duration', 'steps', 'final_result', 'error'}
+# `duration` covers every attempt of that task. The report's
+# `sequential_estimate` is the sum of durations, each measured while other tasks
+# ran alongside (sharing CPU, browsers and the model's rate limits), so it and
+# `speedup_estimate` only approximate what a one-at-a-time run would take.
+# `--sequential` measures that instead: it runs the same tasks again with
+# concurrency 1 and reports `sequential` (wall clock, succeeded, failed) and
+# `speedup`.
+#
+# With `make_app` (e.g. scratch_app.ScratchApp) every task gets its own app on
+# a freshly seeded ledger, named in its prompt (ux_tasks.with_app_url), so tasks
+# never see each other's trades or those of earlier invocations. A retry keeps
+# the task's app when it resumes from a checkpoint (it continues on the state
+# the failed attempt left) and gets a fresh one when it starts over.
+#
+# Every attempt is profiled (run_profiler.profile_run); the per-step records of
+# all attempts are collected in `step_records` and, with profile_dir set, also
+# written there as one JSONL file per attempt.
+#
+# With a checkpoint store (checkpoints.CheckpointStore) every step is
+# checkpointed, and a retry continues from where the failed attempt stopped
+# instead of starting over. `resume` also lets the first attempt pick up a
+# checkpoint left by an earlier, interrupted invocation.
+
+
+class AgentExecutor:
+    # make_agent(task, browser_context) -> browser_use.Agent. With a trace_cache
+    # (trace_cache.TraceCache), known steps are replayed without the LLM.
+    def __init__(self, pool, make_agent, concurrency=2, timeout=600.0, retries=1, retry_delay=2.0, max_steps=100,
+                 trace_cache=None, profile_dir=False, checkpoints=None, resume=False, make_app=None):
+        self.pool = pool
+        self.make_agent = make_agent
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_steps = max_steps
+        self.trace_cache = trace_cache
+        self.profile_dir = profile_dir
+        self.checkpoints = checkpoints
+        self.resume = resume
+        self.make_app = make_app
+        self.step_records = []
+
+    async def _attempt(self, name, task, resume=False):
+        async with self.pool.lease() as context:
+            agent = self.make_agent(task, context)
+            with profile_run(agent, name, directory=self.profile_dir) as profiler:
+                try:
+                    if self.checkpoints is not None:
+                        run = run_with_checkpoints(agent, self.checkpoints, resume=resume,
+                                                   trace_cache=self.trace_cache, max_steps=self.max_steps)
+                    elif self.trace_cache is not None:
+                        run = run_with_replay(agent, self.trace_cache, max_steps=self.max_steps)
+                    else:
+                        run = agent.run(max_steps=self.max_steps)
+                    history = await asyncio.wait_for(run, self.timeout)
+                finally:
+                    self.step_records.extend(profiler.finish())
+        return history
+
+    async def _run_task(self, name, task, semaphore):
+        result = {
+            'name': name,
+            'success': False,
+            'attempts': 0,
+            'duration': 0.0,
+            'steps': 0,
+            'final_result': None,
+            'error': None,
+        }
+        app = None
+        async with semaphore:
+            try:
+                for attempt in range(1 + self.retries):
+                    if attempt:
+                        await asyncio.sleep(self.retry_delay)
+                    result['attempts'] += 1
+                    start = time.perf_counter()
+                    try:
+                        if self.make_app is not None and (app is None or self.checkpoints is None):
+                            if app is not None:
+                                await asyncio.to_thread(app.stop)
+                                app = None
+                            # Started off the pool's loop; not part of the attempt's duration
+                            app = await asyncio.to_thread(self.make_app().start)
+                            start = time.perf_counter()
+                        attempt_task = with_app_url(task, app.url) if app is not None else task
+                        history = await self._attempt(name, attempt_task, resume=self.resume or attempt > 0)
+                        result['steps'] = len(history.history)
+                        result['final_result'] = history.final_result()
+                        result['success'] = history.is_done()
+                        result['error'] = None if result['success'] else 'Agent did not complete the task'
+                    except asyncio.TimeoutError:
+                        result['error'] = f'Timed out after {self.timeout:.0f}s'
+                    except Exception as e:
+                        result['error'] = f'{type(e).__name__}: {e}'
+                    finally:
+                        result['duration'] += time.perf_counter() - start
+                    if result['success']:
+                        break
+                    logger.info(f'Task {name} attempt {attempt + 1} failed: {result["error"]}')
+            finally:
+                if app is not None:
+                    await asyncio.to_thread(app.stop)
+        return result
+
+    # tasks: {name: prompt}. Must run on the pool's loop (see run()).
+    async def run_all(self, tasks):
+        semaphore = asyncio.Semaphore(self.concurrency)
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            self._run_task(name, task, semaphore) for name, task in tasks.items()
+        ])
+        wall_clock = time.perf_counter() - start
+        sequential = sum(r['duration'] for r in results)
+        return {
+            'concurrency': self.concurrency,
+            'wall_clock': wall_clock,
+            'sequential_estimate': sequential,
+            'speedup_estimate': sequential / wall_clock if wall_clock else 0.0,
+            'succeeded': sum(r['success'] for r in results),
+            'failed': sum(not r['success'] for r in results),
+            'results': list(results),
+        }
+
+    # Blocking entry point: run the queue on the pool's loop and wait for the report
+    def run(self, tasks):
+        return self.pool.run(self.run_all(tasks)).result()
+
+
+def format_report(report):
+    lines = [
+        f"{'task':<20} {'ok':<4} {'tries':>5} {'steps':>5} {'seconds':>8}  error",
+    ]
+    for r in report['results']:
+        lines.append(
+            f"{r['name']:<20} {'yes' if r['success'] else 'no':<4} {r['attempts']:>5} {r['steps']:>5} "
+            f"{r['duration']:>8.1f}  {r['error'] or ''}"
+        )
+    lines.append('')
+    lines.append(f"{report['succeeded']} succeeded, {report['failed']} failed, concurrency {report['concurrency']}")
+    lines.append(
+        f"wall clock {report['wall_clock']:.1f}s vs {report['sequential_estimate']:.1f}s of task time "
+        f"(~{report['speedup_estimate']:.2f}x; task times measured concurrently, so a sequential estimate only)"
+    )
+    sequential = report.get('sequential')
+    if sequential is not None:
+        lines.append(
+            f"one at a time {sequential['wall_clock']:.1f}s ({sequential['succeeded']} succeeded, "
+            f"{sequential['failed']} failed), measured speedup {report['speedup']:.2f}x"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    from browser_use import Agent
+
+    from browser_pool import BrowserPool
+    from scratch_app import ScratchApp
+    from ux_tasks import APP_URL, UX_TEST_TASKS
+
+    parser = argparse.ArgumentParser(description="Run the advisor app UX tests concurrently")
+    parser.add_argument('tasks', nargs='*', help=f"Task names (default: all of {', '.join(UX_TEST_TASKS)})")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--timeout', type=float, default=600.0, help="Seconds per attempt")
+    parser.add_argument('--retries', type=int, default=1)
+    parser.add_argument('--max-steps', type=int, default=50)
+    parser.add_argument('--report', default=None, help="Write the JSON report to this path")
+    parser.add_argument('--sequential', action='store_true',
+                        help="Afterwards run the same tasks one at a time and report the measured speedup "
+                             "(both runs without the trace and LLM caches, so the second does not replay the first)")
+    parser.add_argument('--no-trace-cache', action='store_true', help="Always drive every step with the LLM")
+    parser.add_argument('--no-llm-cache', action='store_true', help="Always call the model API")
+    parser.add_argument('--no-profile', action='store_true', help="Don't write per-step profiles")
+    parser.add_argument('--no-checkpoints', action='store_true',
+                        help="Don't checkpoint steps; retries start over from step 1")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue tasks from checkpoints left by an earlier, interrupted invocation "
+                             "(with --app-url; scratch apps start each invocation on a fresh ledger)")
+    parser.add_argument('--mock-llm', action='store_true',
+                        help="Drive the agents with an in-process scripted mock LLM (no API calls, no trace cache)")
+    parser.add_argument('--mock-latency', type=float, default=0.0, help="Seconds the mock LLM takes per response")
+    parser.add_argument('--app-url', default=None,
+                        help="Run every task against this advisor app, sharing its ledger "
+                             "(default: a scratch app on a freshly seeded ledger per task)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    load_dotenv(os.path.join(os.path.dirname(__file__), 'secrets.env'))
+    sensitive_data = {
+        'banking_username': os.getenv('BANKINGUSERNAME'),
+        'banking_password': os.getenv('BANKINGPASSWORD')
+    }
+    install_redaction(sensitive_data)
+    mock_server = None
+    if args.mock_llm:
+        from mock_llm_server import ScriptedPolicy, start_server
+        mock_server = start_server(ScriptedPolicy(args.app_url or APP_URL), port=0, latency=args.mock_latency)
+        llm = make_llm(sensitive_data, backend='mock',
+                       mock_url=f"http://127.0.0.1:{mock_server.server_address[1]}/v1")
+    else:
+        llm = make_llm(sensitive_data, use_cache=not (args.no_llm_cache or args.sequential))
+
+    def make_agent(task, context):
+        return Agent(
+            browser_context=context,
+            task=task,
+            llm=llm,
+            sensitive_data=sensitive_data,
+            max_failures=10,
+            generate_gif=False,
+        )
+
+    tasks = {name: UX_TEST_TASKS[name] for name in (args.tasks or UX_TEST_TASKS)}
+    if args.app_url:
+        tasks = {name: with_app_url(task, args.app_url) for name, task in tasks.items()}
+    trace_cache = None if args.no_trace_cache or args.mock_llm or args.sequential else TraceCache()
+    checkpoints = None if args.no_checkpoints else CheckpointStore()
+
+    def make_executor(concurrency):
+        return AgentExecutor(
+            pool, make_agent,
+            concurrency=concurrency,
+            timeout=args.timeout,
+            retries=args.retries,
+            max_steps=args.max_steps,
+            trace_cache=trace_cache,
+            profile_dir=False if args.no_profile else None,
+            checkpoints=checkpoints,
+            resume=args.resume,
+            make_app=None if args.app_url else ScratchApp,
+        )
+
+    pool = BrowserPool(max_size=args.concurrency)
+    try:
+        executor = make_executor(args.concurrency)
+        report = executor.run(tasks)
+        if args.sequential:
+            baseline = make_executor(1).run(tasks)
+            report['sequential'] = {key: baseline[key] for key in ('wall_clock', 'succeeded', 'failed')}
+            report['speedup'] = baseline['wall_clock'] / report['wall_clock'] if report['wall_clock'] else 0.0
+    finally:
+        pool.close()
+        if mock_server is not None:
+            mock_server.shutdown()
+
+    print(format_report(report))
+    print()
+    print(format_summary(summarize(executor.step_records)))
+    if mock_server is not None:
+        print(f"Mock LLM: {mock_server.stats.snapshot()}")
+    elif llm.cache is not None:
+        print(f"LLM cache: {llm.cache.stats()}")
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
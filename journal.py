@@ -0,0 +1,422 @@
+import argparse
+import bisect
+import json
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
+from portfolio import PortfolioMatrix
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process guard
+    fcntl = None
+
+# Append-only journal of every filled order, for audit and point-in-time rebuilds.
+#
+# The ledger only holds the current book; the journal records how it got there.
+# A journal is a directory, by default next to the ledger (<ledger>.journal):
+#   orders.bin      16-byte header, then one fixed 32-byte record per fill:
+#                   time (f8), client id (u4), equity id (u4), signed shares
+#                   (i8, + bought / - sold), price (f8). A million orders is 32 MB,
+#                   and the file is read back as a numpy memmap, never parsed.
+#   names.jsonl     client and equity names, interned to the ids above in order
+#   snapshots/      <seq>.npz: the book (shares matrix, cash, last prices) after
+#                   the first <seq> records. Snapshot 0 is the ledger when the
+#                   journal was started; another is taken every snapshot_every
+#                   records, from the previous one plus the records since.
+#
+# Rebuilding the book at a time loads the nearest snapshot at or before it and
+# replays at most snapshot_every records (vectorized), whatever the journal's
+# length. Times never go backwards in the file, so a time range is two binary
+# searches and a client/equity filter is one mask over that range.
+#
+# Entries are written after the ledger commits, so a crash in between can lose
+# an entry but never records an order that did not happen; verify() compares a
+# rebuild against the ledger. One process writes a journal at a time, and
+# open_journal() raises JournalError in a second one rather than let it trade
+# on the same ledger unjournaled (ADVISOR_JOURNAL=0 / --no-journal opt out
+# explicitly). Journal(path, readonly=True) (the CLI) reads alongside the writer.
+#
+#   python journal.py query|state|verify|snapshot|stats [--client ..] [--equity ..] [--since ..] [--until ..]
+
+MAGIC = b'ADVJRNL\x01'
+HEADER = struct.Struct('<8sII')
+RECORD = struct.Struct('<dIIqd')
+RECORD_DTYPE = np.dtype([
+    ('ts', '<f8'),
+    ('client', '<u4'),
+    ('equity', '<u4'),
+    ('shares', '<i8'),
+    ('price', '<f8'),
+])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+DEFAULT_SNAPSHOT_EVERY = 100_000
+
+
+class JournalError(Exception):
+    pass
+
+
+class Journal:
+    # readonly: query a journal another process may be writing (as of when it was opened)
+    def __init__(self, path, snapshot_every=DEFAULT_SNAPSHOT_EVERY, sync=False, readonly=False):
+        self.path = path
+        self.snapshot_every = snapshot_every
+        # fsync after every write; off by default, like the ledger's synchronous=NORMAL
+        self.sync = sync
+        self.readonly = readonly
+        self._lock = threading.Lock()
+        if readonly and not os.path.isdir(path):
+            raise JournalError(f"No journal at {path}")
+        if not readonly:
+            os.makedirs(os.path.join(path, 'snapshots'), exist_ok=True)
+        self._lock_file = None if readonly else self._acquire_process_lock()
+
+        self._names = {'client': [], 'equity': []}
+        self._ids = {'client': {}, 'equity': {}}
+        self._load_names()
+        self._names_file = None if readonly else open(os.path.join(path, 'names.jsonl'), 'a', encoding='utf-8')
+
+        self._orders_path = os.path.join(path, 'orders.bin')
+        self._count = self._open_orders()
+        self._file = None if readonly else open(self._orders_path, 'ab')
+        self._map = None
+        self._last_ts = float(self.records()['ts'][-1]) if self._count else 0.0
+        self._snapshots = sorted(
+            int(name[:-4]) for name in os.listdir(os.path.join(path, 'snapshots')) if name.endswith('.npz'))
+
+    def _acquire_process_lock(self):
+        if fcntl is None:
+            return None
+        lock_file = open(os.path.join(self.path, 'lock'), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise JournalError(f"Journal {self.path} is in use by another process")
+        return lock_file
+
+    def _load_names(self):
+        path = os.path.join(self.path, 'names.jsonl')
+        if not os.path.exists(path):
+            return
+        with open(path, encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        # A torn last line (crash mid-write) never got a record pointing at it
+        valid = []
+        for line in lines:
+            try:
+                kind, name = json.loads(line)
+            except ValueError:
+                break
+            valid.append(line)
+            self._ids[kind][name] = len(self._names[kind])
+            self._names[kind].append(name)
+        if not self.readonly and len(valid) != len([line for line in lines if line]):
+            with open(path, 'w', encoding='utf-8') as f:
+                f.writelines(line + '\n' for line in valid)
+
+    # Number of whole records; a torn trailing record is cut off
+    def _open_orders(self):
+        if not os.path.exists(self._orders_path) or os.path.getsize(self._orders_path) < HEADER.size:
+            if self.readonly:
+                raise JournalError(f"No orders in {self.path}")
+            with open(self._orders_path, 'wb') as f:
+                f.write(HEADER.pack(MAGIC, RECORD.size, 0))
+            return 0
+        with open(self._orders_path, 'rb') as f:
+            magic, record_size, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or record_size != RECORD.size:
+            raise JournalError(f"{self._orders_path} is not an order journal")
+        size = os.path.getsize(self._orders_path)
+        count = (size - HEADER.size) // RECORD.size
+        if HEADER.size + count * RECORD.size != size and not self.readonly:
+            with open(self._orders_path, 'r+b') as f:
+                f.truncate(HEADER.size + count * RECORD.size)
+        return count
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        with self._lock:
+            for f in (self._file, self._names_file, self._lock_file):
+                if f is not None:
+                    f.close()
+            self._map = None
+
+    def names(self, kind):
+        return list(self._names[kind])
+
+    def _intern(self, kind, name):
+        ids = self._ids[kind]
+        if name not in ids:
+            self._names_file.write(json.dumps([kind, name]) + '\n')
+            self._names_file.flush()
+            ids[name] = len(self._names[kind])
+            self._names[kind].append(name)
+        return ids[name]
+
+    # Record one fill: `shares` is signed (+ bought, - sold). Returns the record's sequence number.
+    def append(self, client, equity, shares, price, ts=None):
+        return self.append_many([(client, equity, shares, price)], ts)[0]
+
+    # Record several fills in one write, all stamped with the same time (one rebalance, say)
+    def append_many(self, fills, ts=None):
+        if self.readonly:
+            raise JournalError("Journal was opened read-only")
+        with self._lock:
+            ts = max(time.time() if ts is None else ts, self._last_ts)
+            data = b''.join(
+                RECORD.pack(ts, self._intern('client', client), self._intern('equity', equity), shares, price)
+                for client, equity, shares, price in fills
+            )
+            first = self._count
+            self._file.write(data)
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+            self._count += len(data) // RECORD.size
+            self._last_ts = ts
+            due = self._count // self.snapshot_every * self.snapshot_every if self.snapshot_every else 0
+            if due > first and due not in self._snapshots:
+                self._write_snapshot(due)
+            return list(range(first, self._count))
+
+    # Journal a successful OrderEngine result
+    def record_order(self, result):
+        shares = result['shares'] if result['side'] == 'Buy' else -result['shares']
+        return self.append(result['client'], result['equity'], shares, result['price'])
+
+    # Records [start, stop) as a read-only structured array backed by the file
+    def records(self, start=0, stop=None):
+        count = self._count
+        if self._map is None or len(self._map) != count:
+            self._map = np.memmap(self._orders_path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size,
+                                  shape=(count,)) if count else np.empty(0, dtype=RECORD_DTYPE)
+        return self._map[start:stop]
+
+    # Sequence range of records with since <= time < until (times are epoch seconds)
+    def time_range(self, since=None, until=None):
+        ts = self.records()['ts']
+        start = 0 if since is None else int(np.searchsorted(ts, since, 'left'))
+        stop = len(ts) if until is None else int(np.searchsorted(ts, until, 'left'))
+        return start, max(start, stop)
+
+    # Sequence numbers of the records matching every given filter
+    def query(self, client=None, equity=None, since=None, until=None):
+        start, stop = self.time_range(since, until)
+        records = self.records(start, stop)
+        mask = np.ones(len(records), dtype=bool)
+        for kind, name in (('client', client), ('equity', equity)):
+            if name is None:
+                continue
+            if name not in self._ids[kind]:
+                return np.empty(0, dtype=np.int64)
+            mask &= records[kind] == self._ids[kind][name]
+        return np.flatnonzero(mask) + start
+
+    # Records as dicts with names and side, for display
+    def entries(self, seqs):
+        records = self.records()
+        clients, equities = self._names['client'], self._names['equity']
+        out = []
+        for seq in seqs:
+            record = records[int(seq)]
+            shares = int(record['shares'])
+            out.append({
+                'seq': int(seq),
+                'time': float(record['ts']),
+                'client': clients[record['client']],
+                'equity': equities[record['equity']],
+                'side': 'Buy' if shares > 0 else 'Sell',
+                'shares': abs(shares),
+                'price': float(record['price']),
+            })
+        return out
+
+    # Snapshot 0: the ledger's book when journaling starts. No-op once any snapshot exists.
+    def initialize(self, ledger):
+        with self._lock:
+            if self._snapshots or self.readonly:
+                return
+            cols = ledger.columns()
+            client_ids = {row[0]: self._intern('client', row[1]) for row in cols['clients']}
+            equity_ids = {row[0]: self._intern('equity', row[1]) for row in cols['equities']}
+            shares = np.zeros((len(self._names['client']), len(self._names['equity'])), dtype=np.int64)
+            cash = np.zeros(len(self._names['client']), dtype=np.float64)
+            prices = np.zeros(len(self._names['equity']), dtype=np.float64)
+            for client_id, _, investment in cols['clients']:
+                cash[client_ids[client_id]] = investment
+            for equity_id, _, price in cols['equities']:
+                prices[equity_ids[equity_id]] = price
+            for client_id, equity_id, num_shares in cols['holdings']:
+                shares[client_ids[client_id], equity_ids[equity_id]] = num_shares
+            self._save_snapshot(self._count, shares, cash, prices)
+
+    # Snapshot the book as of now (e.g. before a bulk import); returns its sequence number
+    def snapshot(self):
+        with self._lock:
+            if self._count not in self._snapshots:
+                self._write_snapshot(self._count)
+            return self._count
+
+    def _write_snapshot(self, seq):
+        shares, cash, prices = self._replay(seq)
+        self._save_snapshot(seq, shares, cash, prices)
+
+    def _save_snapshot(self, seq, shares, cash, prices):
+        path = os.path.join(self.path, 'snapshots', f'{seq:012d}.npz')
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, shares=shares, cash=cash, prices=prices)
+        os.replace(path + '.tmp', path)
+        bisect.insort(self._snapshots, seq)
+
+    def _load_snapshot(self, seq):
+        with np.load(os.path.join(self.path, 'snapshots', f'{seq:012d}.npz')) as data:
+            return data['shares'], data['cash'], data['prices']
+
+    # Book after the first `seq` records: nearest snapshot, then the records since, vectorized
+    def _replay(self, seq):
+        i = bisect.bisect_right(self._snapshots, seq) - 1
+        if i < 0:
+            raise JournalError("Journal has no snapshot to rebuild from; call initialize(ledger) first")
+        base = self._snapshots[i]
+        shares, cash, prices = self._load_snapshot(base)
+        num_clients, num_equities = len(self._names['client']), len(self._names['equity'])
+        if shares.shape != (num_clients, num_equities):
+            grown = np.zeros((num_clients, num_equities), dtype=np.int64)
+            grown[:shares.shape[0], :shares.shape[1]] = shares
+            shares = grown
+            cash = np.concatenate([cash, np.zeros(num_clients - len(cash))])
+            prices = np.concatenate([prices, np.zeros(num_equities - len(prices))])
+        else:
+            shares, cash, prices = shares.copy(), cash.copy(), prices.copy()
+
+        records = self.records(base, seq)
+        if len(records):
+            clients = records['client'].astype(np.intp)
+            equities = records['equity'].astype(np.intp)
+            np.add.at(shares, (clients, equities), records['shares'])
+            cash -= np.bincount(clients, weights=records['shares'] * records['price'], minlength=num_clients)
+            # Last traded price per equity
+            last = len(equities) - 1 - np.unique(equities[::-1], return_index=True)[1]
+            prices[equities[last]] = records['price'][last]
+        return shares, cash, prices
+
+    # The book as of `when` (epoch seconds; None = now) as a PortfolioMatrix, priced at
+    # the last fill of each equity. Times before the journal started give snapshot 0.
+    def matrix_at(self, when=None):
+        with self._lock:
+            seq = self._count if when is None else self.time_range(until=np.nextafter(when, np.inf))[1]
+            shares, cash, prices = self._replay(seq)
+            clients, equities = self.names('client'), self.names('equity')
+        return PortfolioMatrix(clients, equities, shares, cash, prices, versions={'journal': seq})
+
+    # Same shape as Ledger.clients(): {client: {'Investment': ..., 'Shares': {...}}}
+    def state_at(self, when=None):
+        matrix = self.matrix_at(when)
+        return {
+            client: {
+                'Investment': float(matrix.cash[i]),
+                'Shares': {equity: int(matrix.shares[i, j]) for j, equity in enumerate(matrix.equities)},
+            }
+            for i, client in enumerate(matrix.clients)
+        }
+
+    # Differences between the journal's current book and the ledger's:
+    # [(client, equity or 'Investment', journal value, ledger value), ...]
+    def verify(self, ledger, tolerance=1e-6):
+        journal_book = self.state_at()
+        mismatches = []
+        for client, data in ledger.clients().items():
+            replayed = journal_book.get(client, {'Investment': 0.0, 'Shares': {}})
+            if abs(replayed['Investment'] - data['Investment']) > tolerance:
+                mismatches.append((client, 'Investment', replayed['Investment'], data['Investment']))
+            for equity, num_shares in data['Shares'].items():
+                if replayed['Shares'].get(equity, 0) != num_shares:
+                    mismatches.append((client, equity, replayed['Shares'].get(equity, 0), num_shares))
+        return mismatches
+
+
+# Journal for `ledger` (ADVISOR_JOURNAL_PATH, or <ledger path>.journal), initialized
+# from the ledger on first use. Raises JournalError if another process is already
+# writing it: its fills would otherwise be missing from every rebuild.
+def open_journal(ledger, path=None, snapshot_every=DEFAULT_SNAPSHOT_EVERY):
+    path = path or os.getenv('ADVISOR_JOURNAL_PATH') or ledger.path + '.journal'
+    try:
+        journal = Journal(path, snapshot_every=snapshot_every)
+    except JournalError as e:
+        raise JournalError(
+            f"{e}. Trade on {ledger.path} from one process only (serve the order API from the app "
+            f"with ADVISOR_API_PORT), or run this one without a journal (ADVISOR_JOURNAL=0, "
+            f"order_api.py --no-journal)"
+        ) from e
+    journal.initialize(ledger)
+    return journal
+
+
+def _parse_time(value):
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main():
+    from ledger import Ledger
+
+    parser = argparse.ArgumentParser(description="Order journal: audit queries and point-in-time books")
+    parser.add_argument('command', choices=['query', 'state', 'verify', 'snapshot', 'stats'])
+    parser.add_argument('--ledger', default=None, help="Ledger database path (defaults to the app's)")
+    parser.add_argument('--journal', default=None, help="Journal directory (defaults to <ledger>.journal)")
+    parser.add_argument('--client')
+    parser.add_argument('--equity')
+    parser.add_argument('--since', help="ISO time or epoch seconds")
+    parser.add_argument('--until', help="ISO time or epoch seconds (query: exclusive; state: the book at this time)")
+    parser.add_argument('--limit', type=int, default=50, help="query: most recent entries to print")
+    args = parser.parse_args()
+
+    ledger = Ledger(args.ledger, seed=False)
+    path = args.journal or os.getenv('ADVISOR_JOURNAL_PATH') or ledger.path + '.journal'
+    # Only snapshot writes; everything else can run next to the app that owns the journal
+    journal = Journal(path, readonly=args.command != 'snapshot')
+    try:
+        if args.command == 'query':
+            seqs = journal.query(args.client, args.equity, _parse_time(args.since), _parse_time(args.until))
+            print(f"{len(seqs)} matching orders")
+            for entry in journal.entries(seqs[-args.limit:]):
+                when = datetime.fromtimestamp(entry['time']).isoformat(sep=' ', timespec='seconds')
+                print(f"{entry['seq']:>10} {when} {entry['client']:<20} {entry['side']:<4} "
+                      f"{entry['shares']:>6} {entry['equity']:<16} @ ${entry['price']:,.2f}")
+        elif args.command == 'state':
+            book = journal.state_at(_parse_time(args.until))
+            if args.client:
+                book = {args.client: book[args.client]}
+            print(json.dumps(book, indent=2))
+        elif args.command == 'verify':
+            mismatches = journal.verify(ledger)
+            for client, field, replayed, actual in mismatches:
+                print(f"{client}: {field} journal={replayed} ledger={actual}")
+            print("journal matches ledger" if not mismatches else f"{len(mismatches)} mismatches")
+        elif args.command == 'snapshot':
+            print(f"snapshot at record {journal.snapshot()}")
+        else:
+            size = os.path.getsize(journal._orders_path)
+            print(f"{len(journal)} orders, {size / 1024 / 1024:.1f} MiB, "
+                  f"{len(journal.names('client'))} clients, {len(journal.names('equity'))} equities, "
+                  f"snapshots at {journal._snapshots}")
+    finally:
+        journal.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,332 @@
+import os
+import sqlite3
+import threading
+
+# Shared, durable ledger for the advisor app.
+#
+# Every Streamlit session (and every agent driving the app) reads and writes the
+# same SQLite database. WAL journaling lets readers run concurrently with a
+# writer, and each buy/sell is a single IMMEDIATE transaction whose UPDATEs carry
+# the funds/shares check in their WHERE clause, so no global Python lock is held.
+
+# Override with ADVISOR_LEDGER_PATH to point several app servers (or a benchmark) at another file
+DEFAULT_LEDGER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'advisor_ledger.db')
+
+# Sample clients: Each client has a name, an investment account with balance, and shares
+SEED_CLIENTS = {
+    'Client A': {
+        'Investment': 500.0,
+        'Shares': {
+            'Microsoft': 0,
+            'Nvidia': 0,
+            'Morgan Stanley': 0
+        }
+    },
+    'Client B': {
+        'Investment': 8000.0,
+        'Shares': {
+            'Microsoft': 10,
+            'Nvidia': 5,
+            'Morgan Stanley': 15
+        }
+    },
+    'Client C': {
+        'Investment': 12000.0,
+        'Shares': {
+            'Microsoft': 8,
+            'Nvidia': 3,
+            'Morgan Stanley': 20
+        }
+    }
+}
+
+# Mock ticker prices for equities
+SEED_TICKERS = {
+    'Microsoft': 350.00,
+    'Nvidia': 280.00,
+    'Morgan Stanley': 100.00
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    investment REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS equities (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    price REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS holdings (
+    client_id INTEGER NOT NULL REFERENCES clients(id),
+    equity_id INTEGER NOT NULL REFERENCES equities(id),
+    shares INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (client_id, equity_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS holdings_by_equity ON holdings (equity_id, client_id);
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO versions (name, version) VALUES ('holdings', 0), ('prices', 0);
+"""
+
+
+class LedgerError(Exception):
+    pass
+
+
+class UnknownClientError(LedgerError):
+    pass
+
+
+class UnknownEquityError(LedgerError):
+    pass
+
+
+class InsufficientFundsError(LedgerError):
+    def __init__(self, message="Insufficient funds to complete the purchase."):
+        super().__init__(message)
+
+
+class InsufficientSharesError(LedgerError):
+    def __init__(self, message="Insufficient shares to complete the sale."):
+        super().__init__(message)
+
+
+class StaleBookError(LedgerError):
+    def __init__(self, message="The book changed since the rebalance was planned."):
+        super().__init__(message)
+
+
+class Ledger:
+    def __init__(self, path=None, seed=True):
+        self.path = path or os.getenv('ADVISOR_LEDGER_PATH', DEFAULT_LEDGER_PATH)
+        # One connection per thread: sqlite3 connections must not be shared across threads
+        self._local = threading.local()
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        if seed:
+            self.seed(SEED_CLIENTS, SEED_TICKERS)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: we issue BEGIN/COMMIT ourselves
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    # Run fn(conn) inside a write transaction; BEGIN IMMEDIATE takes the write lock up front
+    # so two writers never both read-then-write the same rows. `bumps` names the version
+    # counters (see versions()) that change when the transaction commits.
+    def _write(self, fn, bumps=('holdings',)):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+            conn.executemany("UPDATE versions SET version = version + 1 WHERE name = ?", [(b,) for b in bumps])
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    # Populate an empty ledger; a ledger that already has clients is left untouched
+    def seed(self, clients, tickers):
+        def do_seed(conn):
+            if conn.execute("SELECT 1 FROM clients LIMIT 1").fetchone():
+                return
+            conn.executemany(
+                "INSERT OR IGNORE INTO equities (name, price) VALUES (?, ?)",
+                list(tickers.items())
+            )
+            conn.executemany(
+                "INSERT INTO clients (name, investment) VALUES (?, ?)",
+                [(name, data['Investment']) for name, data in clients.items()]
+            )
+            conn.executemany(
+                "INSERT INTO holdings (client_id, equity_id, shares) "
+                "SELECT c.id, e.id, ? FROM clients c, equities e WHERE c.name = ? AND e.name = ?",
+                [
+                    (num_shares, name, equity)
+                    for name, data in clients.items()
+                    for equity, num_shares in data.get('Shares', {}).items()
+                ]
+            )
+        self._write(do_seed, bumps=('holdings', 'prices'))
+
+    # Monotonic change counters: {'holdings': n, 'prices': m}. Callers cache derived
+    # views (valuations, pages) keyed by these and recompute only when they move.
+    def versions(self):
+        return dict(self._conn().execute("SELECT name, version FROM versions"))
+
+    def client_names(self):
+        return [row[0] for row in self._conn().execute("SELECT name FROM clients ORDER BY id")]
+
+    def tickers(self):
+        return dict(self._conn().execute("SELECT name, price FROM equities ORDER BY id"))
+
+    def get_price(self, equity):
+        row = self._conn().execute("SELECT price FROM equities WHERE name = ?", (equity,)).fetchone()
+        if row is None:
+            raise UnknownEquityError(f"Unknown equity: {equity}")
+        return row[0]
+
+    def set_price(self, equity, price):
+        def do_set(conn):
+            cur = conn.execute("UPDATE equities SET price = ? WHERE name = ?", (price, equity))
+            if cur.rowcount == 0:
+                raise UnknownEquityError(f"Unknown equity: {equity}")
+        self._write(do_set, bumps=('prices',))
+
+    # Apply many price updates ({equity: price}) in one transaction
+    def set_prices(self, prices):
+        def do_set(conn):
+            conn.executemany("UPDATE equities SET price = ? WHERE name = ?", [(p, e) for e, p in prices.items()])
+        self._write(do_set, bumps=('prices',))
+
+    # Same shape the app used to keep in st.session_state.clients[name]
+    def get_client(self, name):
+        conn = self._conn()
+        row = conn.execute("SELECT id, investment FROM clients WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise UnknownClientError(f"Unknown client: {name}")
+        shares = dict(conn.execute(
+            "SELECT e.name, COALESCE(h.shares, 0) FROM equities e "
+            "LEFT JOIN holdings h ON h.equity_id = e.id AND h.client_id = ? ORDER BY e.id",
+            (row[0],)
+        ))
+        return {'Investment': row[1], 'Shares': shares}
+
+    # Whole book as {client: {'Investment': ..., 'Shares': {...}}}, read in one snapshot
+    def clients(self):
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            book = {
+                name: {'Investment': investment, 'Shares': {}}
+                for _, name, investment in conn.execute("SELECT id, name, investment FROM clients ORDER BY id")
+            }
+            for client, equity, num_shares in conn.execute(
+                "SELECT c.name, e.name, COALESCE(h.shares, 0) FROM clients c CROSS JOIN equities e "
+                "LEFT JOIN holdings h ON h.client_id = c.id AND h.equity_id = e.id ORDER BY c.id, e.id"
+            ):
+                book[client]['Shares'][equity] = num_shares
+        finally:
+            conn.execute("COMMIT")
+        return book
+
+    # Raw table contents for columnar consumers (see portfolio.py), read in one snapshot:
+    # clients as (id, name, investment), equities as (id, name, price),
+    # holdings as (client_id, equity_id, shares), plus the versions they correspond to
+    def columns(self):
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            return {
+                'clients': conn.execute("SELECT id, name, investment FROM clients ORDER BY id").fetchall(),
+                'equities': conn.execute("SELECT id, name, price FROM equities ORDER BY id").fetchall(),
+                'holdings': conn.execute("SELECT client_id, equity_id, shares FROM holdings").fetchall(),
+                'versions': dict(conn.execute("SELECT name, version FROM versions")),
+            }
+        finally:
+            conn.execute("COMMIT")
+
+    def _ids(self, conn, client, equity):
+        client_row = conn.execute("SELECT id FROM clients WHERE name = ?", (client,)).fetchone()
+        if client_row is None:
+            raise UnknownClientError(f"Unknown client: {client}")
+        equity_row = conn.execute("SELECT id, price FROM equities WHERE name = ?", (equity,)).fetchone()
+        if equity_row is None:
+            raise UnknownEquityError(f"Unknown equity: {equity}")
+        return client_row[0], equity_row[0], equity_row[1]
+
+    def _position(self, conn, client_id, equity_id):
+        investment = conn.execute("SELECT investment FROM clients WHERE id = ?", (client_id,)).fetchone()[0]
+        row = conn.execute(
+            "SELECT shares FROM holdings WHERE client_id = ? AND equity_id = ?", (client_id, equity_id)
+        ).fetchone()
+        return investment, (row[0] if row else 0)
+
+    # Buy num_shares at the current price. Returns the updated position:
+    # {'Investment': balance, 'Shares': shares of equity, 'Price': price paid}
+    def buy(self, client, equity, num_shares):
+        if num_shares < 1:
+            raise LedgerError("Number of shares must be at least 1.")
+
+        def do_buy(conn):
+            client_id, equity_id, price = self._ids(conn, client, equity)
+            total_cost = num_shares * price
+            cur = conn.execute(
+                "UPDATE clients SET investment = investment - ? WHERE id = ? AND investment >= ?",
+                (total_cost, client_id, total_cost)
+            )
+            if cur.rowcount == 0:
+                raise InsufficientFundsError()
+            conn.execute(
+                "INSERT INTO holdings (client_id, equity_id, shares) VALUES (?, ?, ?) "
+                "ON CONFLICT (client_id, equity_id) DO UPDATE SET shares = shares + excluded.shares",
+                (client_id, equity_id, num_shares)
+            )
+            investment, shares = self._position(conn, client_id, equity_id)
+            return {'Investment': investment, 'Shares': shares, 'Price': price}
+        return self._write(do_buy)
+
+    # Sell num_shares at the current price. Returns the same shape as buy()
+    def sell(self, client, equity, num_shares):
+        if num_shares < 1:
+            raise LedgerError("Number of shares must be at least 1.")
+
+        def do_sell(conn):
+            client_id, equity_id, price = self._ids(conn, client, equity)
+            cur = conn.execute(
+                "UPDATE holdings SET shares = shares - ? WHERE client_id = ? AND equity_id = ? AND shares >= ?",
+                (num_shares, client_id, equity_id, num_shares)
+            )
+            if cur.rowcount == 0:
+                raise InsufficientSharesError()
+            conn.execute(
+                "UPDATE clients SET investment = investment + ? WHERE id = ?",
+                (num_shares * price, client_id)
+            )
+            investment, shares = self._position(conn, client_id, equity_id)
+            return {'Investment': investment, 'Shares': shares, 'Price': price}
+        return self._write(do_sell)
+
+    # Apply a whole rebalance (rebalance.RebalancePlan) in one transaction:
+    # trades as (client, equity, signed shares, price), cash as (client, net change).
+    # Only applies if no trade has landed since the plan's holdings version and the
+    # traded equities still have the plan's prices; otherwise raises StaleBookError.
+    def apply_rebalance(self, trades, cash_changes, holdings_version):
+        def do_rebalance(conn):
+            version = conn.execute("SELECT version FROM versions WHERE name = 'holdings'").fetchone()[0]
+            prices = dict(conn.execute("SELECT name, price FROM equities"))
+            if version != holdings_version or any(prices.get(e) != price for _, e, _, price in trades):
+                raise StaleBookError()
+            client_ids = dict(conn.execute("SELECT name, id FROM clients"))
+            equity_ids = dict(conn.execute("SELECT name, id FROM equities"))
+            try:
+                conn.executemany(
+                    "INSERT INTO holdings (client_id, equity_id, shares) VALUES (?, ?, ?) "
+                    "ON CONFLICT (client_id, equity_id) DO UPDATE SET shares = shares + excluded.shares",
+                    [(client_ids[client], equity_ids[equity], shares) for client, equity, shares, _ in trades]
+                )
+                conn.executemany(
+                    "UPDATE clients SET investment = investment + ? WHERE id = ?",
+                    [(amount, client_ids[client]) for client, amount in cash_changes]
+                )
+            except KeyError:
+                raise StaleBookError()
+            return len(trades)
+        return self._write(do_rebalance)
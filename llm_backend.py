@@ -0,0 +1,43 @@
+import os
+
+from langchain_openai import ChatOpenAI
+
+from llm_cache import LLMResponseCache
+from run_profiler import TokenUsageCallback
+
+# The chat model behind the agent runners, chosen with LLM_BACKEND:
+#
+#   openai (default)  the OpenAI API; model LLM_MODEL (default gpt-4o), answered
+#                     from the on-disk response cache on deterministic reruns
+#                     unless LLM_CACHE=0
+#   mock              a local mock_llm_server.py at MOCK_LLM_URL
+#                     (default http://127.0.0.1:8600/v1); never cached, so every
+#                     step really goes over the wire
+#
+# Both are ChatOpenAI, so the agent takes the same function-calling path either
+# way and a mock run exercises everything but the model itself.
+
+BACKENDS = ('openai', 'mock')
+DEFAULT_MOCK_URL = 'http://127.0.0.1:8600/v1'
+
+
+def make_llm(sensitive_data=None, backend=None, use_cache=None, mock_url=None):
+    backend = backend or os.getenv('LLM_BACKEND', 'openai')
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LLM_BACKEND {backend!r}; expected one of {', '.join(BACKENDS)}")
+    if backend == 'mock':
+        return ChatOpenAI(
+            model='mock',
+            temperature=0.0,
+            base_url=mock_url or os.getenv('MOCK_LLM_URL', DEFAULT_MOCK_URL),
+            api_key='mock',
+            callbacks=[TokenUsageCallback()],
+        )
+    if use_cache is None:
+        use_cache = os.getenv('LLM_CACHE', '1') != '0'
+    return ChatOpenAI(
+        model=os.getenv('LLM_MODEL', 'gpt-4o'),
+        temperature=0.0,
+        cache=LLMResponseCache(sensitive_data=sensitive_data) if use_cache else None,
+        callbacks=[TokenUsageCallback()],
+    )
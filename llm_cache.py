@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import warnings
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+
+# loads() is flagged beta; don't repeat that warning on every cache hit
+warnings.filterwarnings('ignore', category=LangChainBetaWarning, module=__name__)
+
+# On-disk response cache for the agents' chat model calls.
+#
+# Plugs into LangChain's cache hook: ChatOpenAI(..., cache=LLMResponseCache(...)).
+# Entries are keyed by a hash of the normalized message list plus the model's
+# invocation parameters (model, temperature, bound tools, ...), so a deterministic
+# rerun of a fixed task is answered from disk instead of the API. Normalizing
+# drops what changes between reruns of the same steps: message ids, the
+# "Current date and time" line browser_use writes into every step prompt, and
+# screenshots. Screenshots of the same page rarely match byte for byte (cursor,
+# animations, rendering), so only the page's text state (url, tabs, interactive
+# elements, action results) keys a vision step.
+#
+# Only the key hash and the model's response are stored, never the prompt. A
+# response that contains any value from `sensitive_data` is not cached at all.
+# Entries expire after `ttl` seconds, and least recently used entries are
+# evicted once the cache grows past `max_bytes`.
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.llm_cache.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_by_last_used ON responses (last_used);
+"""
+
+
+# browser_use's step prompt (agent/prompts.py) stamps the wall-clock minute
+TIMESTAMP_RE = re.compile(r'Current date and time: \d{4}-\d{2}-\d{2} \d{2}:\d{2}')
+IMAGE_RE = re.compile(r'data:image/[\w.+-]+;base64,[A-Za-z0-9+/=]*')
+
+
+# Drop fields that differ between otherwise identical calls (message ids, the
+# prompt's timestamp, screenshots) and fix key order, so the same conversation
+# always hashes the same
+def _normalize(value):
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in sorted(value.items()) if k != 'id'}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return IMAGE_RE.sub('data:image', TIMESTAMP_RE.sub('Current date and time: -', value))
+    return value
+
+
+# Every string in a generation as the model returned it: the text, the message
+# content and all tool call arguments. Checked before serializing, where
+# escaping (quotes, backslashes, non-ASCII) would hide a secret from `in`.
+def _texts(generation):
+    yield generation.text
+    message = getattr(generation, 'message', None)
+    if message is not None:
+        yield from _strings(message.model_dump())
+
+
+def _strings(value):
+    if isinstance(value, str):
+        yield value
+        # Tool call arguments arrive as JSON text (additional_kwargs, invalid_tool_calls)
+        if value[:1] in ('{', '['):
+            try:
+                yield from _strings(json.loads(value))
+            except ValueError:
+                pass
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def cache_key(prompt, llm_string):
+    try:
+        prompt = json.dumps(_normalize(json.loads(prompt)), separators=(',', ':'))
+    except ValueError:
+        pass
+    digest = hashlib.sha256()
+    digest.update(llm_string.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(prompt.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class LLMResponseCache(BaseCache):
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_bytes=256 * 1024 * 1024, sensitive_data=None):
+        self.path = path or os.getenv('LLM_CACHE_PATH', DEFAULT_CACHE_PATH)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.secrets = [value for value in (sensitive_data or {}).values() if value]
+        self.hits = 0
+        self.misses = 0
+        self.skipped_sensitive = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def lookup(self, prompt, llm_string):
+        key = cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def _contains_secret(self, generations):
+        return any(secret in text for generation in generations for text in _texts(generation)
+                   for secret in self.secrets)
+
+    def update(self, prompt, llm_string, return_val):
+        if self.secrets and self._contains_secret(return_val):
+            with self._lock:
+                self.skipped_sensitive += 1
+            return
+        value = json.dumps([dumps(generation) for generation in return_val])
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (cache_key(prompt, llm_string), value, len(value), now, now)
+            )
+            self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Oldest-used first until back under the limit
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'skipped_sensitive': self.skipped_sensitive,
+            'entries': entries,
+            'bytes': size,
+        }
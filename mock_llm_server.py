@@ -0,0 +1,278 @@
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from scripted_llm import MEMORY_RE, replay_output, script_output, task_text
+from trace_cache import DEFAULT_CACHE_DIR, TraceCache
+from ux_tasks import APP_URL, UX_TEST_TASKS, ux_test_script
+
+# Local OpenAI-compatible stand-in for the agents' LLM.
+#
+# Serves POST /v1/chat/completions well enough for ChatOpenAI's function-calling
+# path: each request is answered with one AgentOutput tool call from a
+# deterministic policy (scripted_llm.py), after `latency` +/- `jitter` seconds.
+# Point the runners at it with LLM_BACKEND=mock (see llm_backend.py) to load-test
+# the browser/controller side without tokens or rate limits.
+#
+#   scripted  the ux_tasks scenario whose prompt is in the task, driven against
+#             `app_url` (or the app the task names, if not the default one);
+#             other tasks get an immediate done
+#   replay    recorded steps for the task: a trace cache directory (looked up by
+#             task, see trace_cache.py), or one file holding a trace cache entry
+#             or a saved AgentHistoryList (served for every task)
+#
+# Policies are stateless (progress rides in the agent's own message history), so
+# any number of agents can share one server. GET /stats reports request counts,
+# peak concurrency and mean latency.
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8600
+
+APP_URL_RE = re.compile(r'https?://(?:localhost|127\.0\.0\.1):\d+/')
+
+
+def _normalize(text):
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+
+def _content_text(content):
+    if isinstance(content, list):
+        return '\n'.join(part.get('text', '') for part in content if isinstance(part, dict))
+    return content or ''
+
+
+# The UX test whose prompt is part of `task` (whichever app it names), or None
+def ux_test_name(task):
+    task = _normalize(APP_URL_RE.sub(APP_URL, task))
+    for name, prompt in UX_TEST_TASKS.items():
+        if _normalize(prompt) in task:
+            return name
+    return None
+
+
+class ScriptedPolicy:
+    def __init__(self, app_url=APP_URL, max_retries=5):
+        self.app_url = app_url
+        self.max_retries = max_retries
+
+    def __call__(self, task, state, previous_memory):
+        name = ux_test_name(task)
+        if name is None:
+            return script_output([[('done',)]], state, previous_memory)
+        # A task pointed at another app (ux_tasks.with_app_url, e.g. the executor's
+        # scratch apps) is driven against that app
+        match = APP_URL_RE.search(task)
+        url = match.group(0) if match and match.group(0) != APP_URL else self.app_url
+        return script_output(ux_test_script(name, url), state, previous_memory, self.max_retries)
+
+
+class ReplayPolicy:
+    def __init__(self, path):
+        self.cache = None
+        self.steps = None
+        if os.path.isdir(path):
+            self.cache = TraceCache(root=path)
+        else:
+            with open(path, encoding='utf-8') as f:
+                self.steps = self.load_steps(json.load(f))
+
+    # Steps from a trace cache entry or a saved AgentHistoryList
+    @staticmethod
+    def load_steps(data):
+        if 'steps' in data:
+            return data['steps']
+        steps = []
+        for item in data.get('history', []):
+            output = item.get('model_output')
+            if output:
+                steps.append({'actions': output['action'], 'goal': output['current_state'].get('next_goal', '')})
+        return steps
+
+    def __call__(self, task, state, previous_memory):
+        steps = self.steps
+        if steps is None:
+            entry = self.cache.get(task) if task else None
+            steps = entry['steps'] if entry else []
+        return replay_output(steps, previous_memory)
+
+
+class MockLLMRequestHandler(BaseHTTPRequestHandler):
+    policy = None
+    latency = 0.0
+    jitter = 0.0
+    stats = None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            self._send(200, self.stats.snapshot())
+        elif self.path == '/v1/models':
+            self._send(200, {'object': 'list', 'data': [{'id': 'mock', 'object': 'model', 'owned_by': 'local'}]})
+        else:
+            self._send(404, {'error': {'message': f"Unknown path: {self.path}"}})
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/v1/chat/completions':
+            self._send(404, {'error': {'message': f"Unknown path: {self.path}"}})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:
+            self._send(400, {'error': {'message': f"Invalid JSON: {e}"}})
+            return
+
+        self.stats.started()
+        start = time.perf_counter()
+        try:
+            delay = max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+            if delay:
+                time.sleep(delay)
+            self._send(200, self.complete(request))
+        finally:
+            self.stats.finished(time.perf_counter() - start)
+
+    def complete(self, request):
+        messages = request.get('messages', [])
+        tools = request.get('tools') or []
+        message = {'role': 'assistant', 'content': ''}
+        finish_reason = 'stop'
+        if tools:
+            task = None
+            state = ''
+            previous_memory = None
+            for m in messages:
+                if m.get('role') == 'user':
+                    state = _content_text(m.get('content'))
+                    task = task or task_text(state)
+                for call in m.get('tool_calls') or []:
+                    try:
+                        memory = json.loads(call['function']['arguments'])['current_state']['memory']
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                    if MEMORY_RE.match(memory):
+                        previous_memory = memory
+            output = self.policy(task, state, previous_memory)
+            message = {
+                'role': 'assistant',
+                'content': None,
+                'tool_calls': [{
+                    'id': f"call_{random.getrandbits(48):012x}",
+                    'type': 'function',
+                    'function': {'name': tools[0]['function']['name'], 'arguments': json.dumps(output)},
+                }],
+            }
+            finish_reason = 'tool_calls'
+
+        prompt_tokens = len(json.dumps(messages)) // 4
+        completion_tokens = len(json.dumps(message)) // 4
+        return {
+            'id': f"chatcmpl-mock-{random.getrandbits(48):012x}",
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'mock'),
+            'choices': [{'index': 0, 'message': message, 'finish_reason': finish_reason, 'logprobs': None}],
+            'usage': {
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'total_tokens': prompt_tokens + completion_tokens,
+            },
+        }
+
+    # Keep request logging out of the agent's output
+    def log_message(self, format, *args):
+        pass
+
+
+class ServerStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_seconds = 0.0
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def finished(self, seconds):
+        with self._lock:
+            self.in_flight -= 1
+            self.total_seconds += seconds
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'in_flight': self.in_flight,
+                'peak_in_flight': self.peak_in_flight,
+                'mean_seconds': self.total_seconds / self.requests if self.requests else 0.0,
+            }
+
+
+def make_server(policy, host=DEFAULT_HOST, port=DEFAULT_PORT, latency=0.0, jitter=0.0):
+    handler = type('BoundMockLLMRequestHandler', (MockLLMRequestHandler,), {
+        'policy': staticmethod(policy),
+        'latency': latency,
+        'jitter': jitter,
+        'stats': ServerStats(),
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.stats = handler.stats
+    return server
+
+
+# Serve in a daemon thread; returns the server (call shutdown() to stop it)
+def start_server(policy, host=DEFAULT_HOST, port=DEFAULT_PORT, latency=0.0, jitter=0.0):
+    server = make_server(policy, host, port, latency, jitter)
+    thread = threading.Thread(target=server.serve_forever, name='mock-llm', daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible mock LLM for the agent runners")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--mode', choices=['scripted', 'replay'], default='scripted')
+    parser.add_argument('--app-url', default=APP_URL, help="Advisor app URL for scripted mode")
+    parser.add_argument('--replay', default=None,
+                        help="Trace cache directory or recorded trace/history file for replay mode "
+                             "(default: the trace cache)")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Random +/- seconds around --latency")
+    args = parser.parse_args()
+
+    if args.mode == 'scripted':
+        policy = ScriptedPolicy(args.app_url)
+    else:
+        policy = ReplayPolicy(args.replay or DEFAULT_CACHE_DIR)
+
+    server = make_server(policy, args.host, args.port, args.latency, args.jitter)
+    print(f"Mock LLM ({args.mode}) on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
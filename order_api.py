@@ -0,0 +1,141 @@
+import argparse
+import json
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from journal import JournalError, open_journal
+from ledger import Ledger, LedgerError
+from order_engine import OrderEngine
+
+# Headless JSON order API for the advisor app.
+#
+# Lets automation trade without driving the Streamlit DOM. It runs on the same
+# ledger as the UI, so trades placed here show up on the Clients Overview page.
+#
+#   GET  /quote[?equity=Nvidia]      -> {"Nvidia": 280.0}
+#   GET  /holdings[?client=Client C] -> {"Client C": {"Investment": ..., "Shares": {...}}}
+#   GET  /orders/last[?client=Client C] -> result of the latest order (404 if none yet)
+#   POST /orders        {"client": ..., "side": "Buy"|"Sell", "equity": ..., "shares": n}
+#   POST /orders/batch  {"orders": [order, ...]} -> {"results": [result, ...]}
+#   POST /rebalance     {"clients": [...], "sell_all": [...], "sell": {...}, "buy_max": ...,
+#                        "weights": {...}, "dry_run": false} -> result with a per-client "diff"
+#                        (see rebalance.py; omitted clients means every client)
+#
+# Order results are the OrderEngine result dicts. A rejected order (e.g.
+# insufficient funds) is a 200 with "status": "error"; malformed requests are 400.
+
+DEFAULT_HOST = '127.0.0.1'
+# Clear of Streamlit's 8501 and the ports it moves up to when that one is taken
+DEFAULT_PORT = 8650
+
+REBALANCE_FIELDS = {'clients', 'sell_all', 'sell', 'buy_max', 'weights', 'dry_run'}
+
+
+class OrderRequestHandler(BaseHTTPRequestHandler):
+    engine = None
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == '/quote':
+                self._send(200, self.engine.quote(query.get('equity')))
+            elif url.path == '/holdings':
+                self._send(200, self.engine.holdings(query.get('client')))
+            elif url.path == '/orders/last':
+                result = self.engine.last_result(query.get('client'))
+                if result is None:
+                    self._send(404, {'error': "No orders yet"})
+                else:
+                    self._send(200, result)
+            else:
+                self._send(404, {'error': f"Unknown path: {url.path}"})
+        except LedgerError as e:
+            self._send(404, {'error': str(e)})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        try:
+            payload = self._read_json()
+        except ValueError as e:
+            self._send(400, {'error': f"Invalid JSON: {e}"})
+            return
+
+        if url.path == '/orders':
+            if not isinstance(payload, dict):
+                self._send(400, {'error': "Expected an order object"})
+                return
+            self._send(200, self.engine.place_orders([payload])[0])
+        elif url.path == '/orders/batch':
+            orders = payload.get('orders') if isinstance(payload, dict) else None
+            if not isinstance(orders, list) or not all(isinstance(order, dict) for order in orders):
+                self._send(400, {'error': "Expected {\"orders\": [order, ...]}"})
+                return
+            self._send(200, {'results': self.engine.place_orders(orders)})
+        elif url.path == '/rebalance':
+            if not isinstance(payload, dict) or set(payload) - REBALANCE_FIELDS:
+                self._send(400, {'error': f"Expected an object with fields from {sorted(REBALANCE_FIELDS)}"})
+                return
+            try:
+                self._send(200, self.engine.rebalance(**payload))
+            except (TypeError, ValueError, AttributeError) as e:
+                self._send(400, {'error': f"Invalid rebalance: {e}"})
+        else:
+            self._send(404, {'error': f"Unknown path: {url.path}"})
+
+    # Keep request logging off the root logger the agent runners stream to the UI
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(engine, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    handler = type('BoundOrderRequestHandler', (OrderRequestHandler,), {'engine': engine})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+# Serve in a daemon thread; returns the server so callers can shutdown() it
+def start_server(engine, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    server = make_server(engine, host, port)
+    threading.Thread(target=server.serve_forever, name='order-api', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Advisor app JSON order API")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--ledger', default=None, help="Ledger database path (defaults to the app's)")
+    parser.add_argument('--no-journal', action='store_true', help="Don't append orders to the ledger's journal")
+    args = parser.parse_args()
+
+    ledger = Ledger(args.ledger)
+    try:
+        journal = None if args.no_journal else open_journal(ledger)
+    except JournalError as e:
+        sys.exit(f"order_api: {e}")
+    server = make_server(OrderEngine(ledger, journal=journal), args.host, args.port)
+    print(f"Order API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import logging
+import threading
+
+from ledger import LedgerError, StaleBookError
+from portfolio import load_portfolio
+from rebalance import RebalanceError, plan_rebalance
+
+logger = logging.getLogger(__name__)
+
+# Buy/sell/quote logic shared by the Streamlit page and the JSON order API.
+#
+# Every order produces a result dict rather than raising, so a batch can report
+# per-order outcomes and the UI can show the message as-is:
+#   {'status': 'success' | 'error', 'message': str, 'client': ..., 'side': ...,
+#    'equity': ..., 'shares': ..., 'price': ..., 'investment': ..., 'shares_owned': ...}
+#
+# The latest result (overall and per client) is kept in memory for
+# last_result(), so automation can read back the outcome of an order placed
+# through the UI without scraping the page.
+#
+# With a journal (journal.py), every filled order is also appended to it once
+# the ledger has committed it.
+#
+# rebalance() applies a bulk rebalance (rebalance.py) across many clients as
+# one ledger transaction and reports a per-client before/after diff.
+
+SIDES = ("Buy", "Sell")
+
+
+class OrderEngine:
+    def __init__(self, ledger, journal=None):
+        self.ledger = ledger
+        self.journal = journal
+        self._last = {}
+        self._last_lock = threading.Lock()
+
+    # Price of one equity, or every equity when none is given
+    def quote(self, equity=None):
+        if equity is None:
+            return self.ledger.tickers()
+        return {equity: self.ledger.get_price(equity)}
+
+    def holdings(self, client=None):
+        if client is None:
+            return self.ledger.clients()
+        return {client: self.ledger.get_client(client)}
+
+    def place_order(self, client, side, equity, shares):
+        result = self._place_order(client, side, equity, shares)
+        if self.journal is not None and result['status'] == 'success':
+            try:
+                self.journal.record_order(result)
+            except OSError as e:
+                # The order stands; journal.verify() reports the gap
+                logger.warning(f"Could not journal order for {client}: {e}")
+        with self._last_lock:
+            self._last[None] = result
+            if isinstance(client, str):
+                self._last[client] = result
+        return result
+
+    # Result of the most recent order (for `client` when given), or None
+    def last_result(self, client=None):
+        with self._last_lock:
+            return self._last.get(client)
+
+    def _place_order(self, client, side, equity, shares):
+        result = {
+            'status': 'error',
+            'client': client,
+            'side': side,
+            'equity': equity,
+            'shares': shares,
+        }
+        side = str(side).capitalize()
+        if side not in SIDES:
+            result['message'] = f"Unknown transaction type: {result['side']}"
+            return result
+        result['side'] = side
+        # JSON orders can carry anything; only strings reach the ledger
+        if not isinstance(client, str) or not client:
+            result['message'] = "Client must be a client name."
+            return result
+        if not isinstance(equity, str) or not equity:
+            result['message'] = "Equity must be an equity name."
+            return result
+        if isinstance(shares, bool) or not isinstance(shares, int) or shares < 1:
+            result['message'] = "Number of shares must be a whole number of at least 1."
+            return result
+
+        try:
+            if side == "Buy":
+                position = self.ledger.buy(client, equity, shares)
+                verb = "bought"
+            else:
+                position = self.ledger.sell(client, equity, shares)
+                verb = "sold"
+        except LedgerError as e:
+            result['message'] = str(e)
+            return result
+
+        result.update(
+            status='success',
+            price=position['Price'],
+            investment=position['Investment'],
+            shares_owned=position['Shares'],
+            message=(
+                f"Successfully {verb} **{shares}** shares of **{equity}** for **{client}** "
+                f"at **${position['Price']:,.2f}** per share.\n\n"
+                f"**Updated Investment Balance:** ${position['Investment']:,.2f}\n"
+                f"**Shares Owned:** {position['Shares']} shares of {equity}."
+            ),
+        )
+        return result
+
+    # Each order is applied independently and in sequence; one failure does not stop the rest
+    def place_orders(self, orders):
+        return [
+            self.place_order(order.get('client'), order.get('side'), order.get('equity'), order.get('shares'))
+            for order in orders
+        ]
+
+    # Plan a rebalance over the current book and apply it atomically; re-plans when a
+    # trade lands between planning and applying. Result shape as for orders, plus
+    #   'orders': number of trades, 'diff': {client: {'before', 'after', 'trades'}}
+    # dry_run returns the plan's diff without trading.
+    def rebalance(self, clients=None, sell_all=(), sell=None, buy_max=None, weights=None, dry_run=False,
+                  attempts=3):
+        result = {'status': 'error', 'clients': clients, 'dry_run': dry_run}
+        for _ in range(attempts):
+            portfolio = load_portfolio(self.ledger)
+            try:
+                plan = plan_rebalance(portfolio, clients, sell_all, sell, buy_max, weights)
+            except RebalanceError as e:
+                result['message'] = str(e)
+                return result
+            trades = plan.trades()
+            if dry_run or not trades:
+                break
+            try:
+                self.ledger.apply_rebalance(trades, plan.cash_changes(), portfolio.versions['holdings'])
+            except StaleBookError:
+                continue
+            if self.journal is not None:
+                try:
+                    self.journal.append_many(trades)
+                except OSError as e:
+                    logger.warning(f"Could not journal rebalance: {e}")
+            break
+        else:
+            result['message'] = "The book kept changing while rebalancing; nothing was traded."
+            return result
+
+        diff = plan.diff()
+        if not trades:
+            message = "Nothing to rebalance."
+        elif dry_run:
+            message = f"Rebalance would place **{len(trades)}** orders for **{len(diff)}** clients."
+        else:
+            message = f"Rebalanced **{len(diff)}** clients with **{len(trades)}** orders."
+        result.update(status='success', orders=len(trades), diff=diff, message=message)
+        return result
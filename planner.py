@@ -0,0 +1,482 @@
+import argparse
+import asyncio
+import collections
+import contextlib
+import json
+import logging
+import os
+import time
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, create_model
+
+logger = logging.getLogger(__name__)
+
+# Splits a multi-part agent task into sub-tasks and runs the independent ones
+# at the same time.
+#
+# A planner LLM call (structured output, the Plan model below) turns the task
+# into sub-tasks with dependencies. Each sub-task runs as its own browser_use
+# Agent as soon as the sub-tasks it depends on have finished, up to
+# `concurrency` at once. Values pass between stages as JSON, not prose: a
+# sub-task's `outputs` become the fields of its done action (Controller
+# output_model), and every later sub-task gets the values of everything it
+# depends on, directly or not, appended to its prompt.
+#
+# Sub-tasks with the same context_group run one after another in one shared
+# BrowserContext (e.g. drafting an email and later sending it in the same
+# logged-in Gmail tab); every other sub-task leases a fresh context from the
+# BrowserPool. A group keeps its browser while its later members wait on their
+# dependencies, so the pool needs room for those on top of `concurrency`
+# running sub-tasks (browsers_needed()); run_plan refuses a smaller pool rather
+# than deadlock. If a sub-task fails, the sub-tasks that depend on it are skipped.
+#
+# Results mirror executor.py: per sub-task {'id', 'success', 'attempts',
+# 'duration', 'start', 'steps', 'values', 'final_result', 'error'}, plus the
+# wall clock against `sequential_estimate`, the sum of the sub-task durations.
+# Those were measured while other sub-tasks ran alongside, and one agent on the
+# whole task would not split it the same way, so it and `speedup_estimate` are
+# approximations. `--baseline` measures the real thing: after the plan it runs
+# the original task in one agent and reports `baseline` and `speedup`.
+
+
+class SubTask(BaseModel):
+    id: str = Field(description="Short snake_case name, unique within the plan")
+    task: str = Field(description="Complete instructions for one browser agent, including every URL, "
+                                  "credential placeholder and detail it needs from the original task")
+    depends_on: List[str] = Field(default_factory=list,
+                                  description="Ids of sub-tasks that must finish first: ones whose outputs "
+                                              "this sub-task needs or whose effects it must see")
+    outputs: List[str] = Field(default_factory=list,
+                               description="snake_case names of the values this sub-task must report "
+                                           "for later sub-tasks")
+    context_group: Optional[str] = Field(default=None,
+                                         description="Sub-tasks with the same group continue in one browser "
+                                                     "session (same logged-in site, an open draft); "
+                                                     "leave empty for a fresh browser")
+
+
+class Plan(BaseModel):
+    subtasks: List[SubTask]
+
+
+PLANNER_PROMPT = """You split a web automation task into sub-tasks for browser agents that can run in parallel.
+Rules:
+- Each sub-task is done by a separate agent that only sees its own instructions, so copy every URL,
+  credential placeholder, name, address and wording it needs from the original task.
+- Only add a dependency when a sub-task needs another's outputs or must happen after its effects.
+- Keep steps that must happen in order on the same site in one sub-task; do not split a single login session
+  across sub-tasks unless they share a context_group.
+- Declare outputs for every value a later sub-task needs (for example metrics captured before and after a change)
+  and tell the agent to capture them exactly.
+- Preserve every ordering and verification requirement of the original task.
+- Prefer few sub-tasks; a task with no independent parts is one sub-task."""
+
+
+# Hand-written plan for ux_tasks.bank_email_task: the banking work and the
+# start of the Gmail draft are independent; the body needs the metrics, and is
+# finished in the same Gmail session as the draft.
+BANK_EMAIL_PLAN = Plan(subtasks=[
+    SubTask(
+        id='bank',
+        task="""
+You are a financial advisor's assistant.
+Go to http://localhost:8501/ and login with my banking_username and banking_password.
+Capture the current state of all client accounts exactly as shown (before_metrics).
+Sell all of Client C's NVIDIA shares and spend as much as possible on MS.
+If the client does not have enough money or shares, stop trading and move on.
+Capture the exact text of each transaction result message (trade_results).
+Return to the main client menu and capture all client metrics again (after_metrics).
+Finally, log out of the website.
+""",
+        outputs=['before_metrics', 'after_metrics', 'trade_results'],
+        context_group='bank',
+    ),
+    SubTask(
+        id='email_draft',
+        task="""
+Go to Gmail and log in with my username and password, then start a new email draft.
+When entering who to address it to, each person's email should be entered separately. After typing each individual person's email, hit enter before proceeding to the next person.
+Addressees: pradeep.sundaram@morganstanley.com; mainak.saha@morganstanley.com; timothy.eng@morganstanley.com;
+CC: timothy.eng@outlook.com
+Subject: 'Sample banking transaction with a dummy app - no hands!'
+Leave the body empty and the draft open. Do not send it.
+""",
+        outputs=['draft_status'],
+        context_group='gmail',
+    ),
+    SubTask(
+        id='email_send',
+        task="""
+An email draft is open in Gmail with the addressees, CC and subject already filled in.
+Write the body: the client metrics both before and after the trades, nicely formatted and human readable (replace new lines with enter, escape sequences with their actual characters, etc.), with the trade results.
+Add a note saying Hi! and about how I didn't have to lift a finger to write the email, and about how cool Operator is and how potentially it could be quite powerful, given the correct guardrails.
+Sign it Best, Tim
+Check that the addressees, CC, subject and body are all set up correctly. Do not send the email until they are.
+Then send the email, wait for it to send and check that it shows up in sent mail.
+""",
+        depends_on=['bank', 'email_draft'],
+        outputs=['sent_confirmation'],
+        context_group='gmail',
+    ),
+])
+
+
+# Check ids, dependencies and cycles; returns the sub-tasks in a runnable order
+def validate_plan(plan):
+    by_id = {}
+    for subtask in plan.subtasks:
+        if subtask.id in by_id:
+            raise ValueError(f'Duplicate sub-task id: {subtask.id}')
+        by_id[subtask.id] = subtask
+    for subtask in plan.subtasks:
+        for dependency in subtask.depends_on:
+            if dependency not in by_id:
+                raise ValueError(f'Sub-task {subtask.id} depends on unknown sub-task {dependency}')
+
+    ordered = []
+    state = {}
+
+    def visit(subtask):
+        if state.get(subtask.id) == 'done':
+            return
+        if state.get(subtask.id) == 'visiting':
+            raise ValueError(f'Dependency cycle through sub-task {subtask.id}')
+        state[subtask.id] = 'visiting'
+        for dependency in subtask.depends_on:
+            visit(by_id[dependency])
+        state[subtask.id] = 'done'
+        ordered.append(subtask)
+
+    for subtask in plan.subtasks:
+        visit(subtask)
+    return ordered
+
+
+# Ask the LLM for a plan. Falls back to running the whole task as one sub-task
+# when the answer is not a usable plan.
+async def plan_task(llm, task):
+    planner = llm.with_structured_output(Plan)
+    try:
+        plan = await planner.ainvoke([('system', PLANNER_PROMPT), ('human', task)])
+        validate_plan(plan)
+        if not plan.subtasks:
+            raise ValueError('Empty plan')
+        return plan
+    except Exception as e:
+        logger.warning(f'Planner did not return a usable plan ({e}); running the task as one sub-task')
+        return Plan(subtasks=[SubTask(id='task', task=task)])
+
+
+# Longest chain of sub-task durations through the dependency graph
+def critical_path(plan, durations):
+    finish = {}
+    for subtask in validate_plan(plan):
+        start = max((finish[d] for d in subtask.depends_on), default=0.0)
+        finish[subtask.id] = start + durations.get(subtask.id, 0.0)
+    return max(finish.values(), default=0.0)
+
+
+# Browsers a plan can hold at once: one per running sub-task, plus one per context
+# group with more than one member, held between members. With fewer, a group can
+# sit on the browser a sub-task it waits on needs.
+def browsers_needed(plan, concurrency):
+    sizes = collections.Counter(s.context_group or s.id for s in plan.subtasks)
+    held = sum(1 for size in sizes.values() if size > 1)
+    return min(len(sizes), concurrency + held)
+
+
+# The done-action model of a sub-task: one string field per declared output
+def output_model(subtask):
+    fields = {name: (str, ...) for name in subtask.outputs}
+    return create_model(f'{subtask.id.title().replace("_", "")}Output', **fields)
+
+
+def subtask_prompt(subtask, values):
+    prompt = subtask.task.strip()
+    if values:
+        prompt += ('\n\nValues captured by earlier steps (JSON); use them exactly:\n'
+                   + json.dumps(values, indent=2))
+    if subtask.outputs:
+        prompt += f"\n\nWhen you are done, report {', '.join(subtask.outputs)} in the done action."
+    return prompt
+
+
+class PlanRunner:
+    # make_agent(task, browser_context, controller) -> browser_use.Agent.
+    # make_controller(output_model) -> Controller; by default a plain Controller
+    # whose done action takes the sub-task's outputs.
+    def __init__(self, pool, make_agent, make_controller=None, concurrency=2, timeout=600.0, retries=0,
+                 max_steps=50):
+        self.pool = pool
+        self.make_agent = make_agent
+        self.make_controller = make_controller or self._default_controller
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.max_steps = max_steps
+
+    @staticmethod
+    def _default_controller(model):
+        from browser_use import Controller
+        return Controller(output_model=model)
+
+    async def _attempt(self, subtask, context, values):
+        controller = self.make_controller(output_model(subtask) if subtask.outputs else None)
+        agent = self.make_agent(subtask_prompt(subtask, values), context, controller)
+        history = await asyncio.wait_for(agent.run(max_steps=self.max_steps), self.timeout)
+        if not history.is_done():
+            raise RuntimeError('Agent did not complete the sub-task')
+        final = history.final_result()
+        if not subtask.outputs:
+            return history, {}, final
+        try:
+            reported = json.loads(final or '')
+        except ValueError:
+            raise RuntimeError(f'Sub-task result is not JSON: {final!r}')
+        missing = [name for name in subtask.outputs if name not in reported]
+        if missing:
+            raise RuntimeError(f"Sub-task result is missing {', '.join(missing)}")
+        return history, {name: reported[name] for name in subtask.outputs}, final
+
+    async def _run_subtask(self, subtask, done, results, values, groups, semaphore, started):
+        result = {
+            'id': subtask.id,
+            'success': False,
+            'attempts': 0,
+            'duration': 0.0,
+            'start': None,
+            'steps': 0,
+            'values': {},
+            'final_result': None,
+            'error': None,
+        }
+        results[subtask.id] = result
+        group = groups[subtask.context_group or subtask.id]
+        try:
+            for dependency in subtask.depends_on:
+                await done[dependency].wait()
+            failed = [d for d in subtask.depends_on if not results[d]['success']]
+            if failed:
+                result['error'] = f"Skipped: {', '.join(failed)} failed"
+                return
+
+            inputs = {}
+            for dependency in self._ancestors(subtask):
+                inputs.update(values.get(dependency, {}))
+
+            async with group['lock'], semaphore:
+                if group['context'] is None:
+                    group['context'] = await group['stack'].enter_async_context(self.pool.lease())
+                result['start'] = time.perf_counter() - started
+                for attempt in range(1 + self.retries):
+                    result['attempts'] += 1
+                    start = time.perf_counter()
+                    try:
+                        history, reported, final = await self._attempt(subtask, group['context'], inputs)
+                        result['steps'] = len(history.history)
+                        result['final_result'] = final
+                        result['values'] = reported
+                        result['success'] = True
+                        result['error'] = None
+                    except asyncio.TimeoutError:
+                        result['error'] = f'Timed out after {self.timeout:.0f}s'
+                    except Exception as e:
+                        result['error'] = f'{type(e).__name__}: {e}'
+                    finally:
+                        result['duration'] += time.perf_counter() - start
+                    if result['success']:
+                        break
+                    logger.info(f'Sub-task {subtask.id} attempt {attempt + 1} failed: {result["error"]}')
+            values[subtask.id] = result['values']
+        finally:
+            done[subtask.id].set()
+            group['remaining'] -= 1
+            if group['remaining'] == 0:
+                # Last sub-task of the group: hand the context back to the pool
+                await group['stack'].aclose()
+
+    def _ancestors(self, subtask):
+        seen = []
+        stack = list(subtask.depends_on)
+        while stack:
+            dependency = stack.pop()
+            if dependency not in seen:
+                seen.append(dependency)
+                stack.extend(self._by_id[dependency].depends_on)
+        return seen
+
+    # Must run on the pool's loop (see run())
+    async def run_plan(self, plan):
+        ordered = validate_plan(plan)
+        needed = browsers_needed(plan, self.concurrency)
+        if self.pool.max_size < needed:
+            raise ValueError(f'Plan can hold {needed} browsers at once; the pool has {self.pool.max_size}')
+        self._by_id = {s.id: s for s in ordered}
+        done = {s.id: asyncio.Event() for s in ordered}
+        groups = {}
+        for subtask in ordered:
+            group = groups.setdefault(subtask.context_group or subtask.id, {
+                'lock': asyncio.Lock(),
+                'stack': contextlib.AsyncExitStack(),
+                'context': None,
+                'remaining': 0,
+            })
+            group['remaining'] += 1
+        results = {}
+        values = {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*[
+            self._run_subtask(s, done, results, values, groups, semaphore, started) for s in ordered
+        ])
+        wall_clock = time.perf_counter() - started
+        durations = {i: r['duration'] for i, r in results.items()}
+        sequential_estimate = sum(durations.values())
+        merged = {}
+        for s in ordered:
+            merged.update(values.get(s.id, {}))
+        return {
+            'concurrency': self.concurrency,
+            'wall_clock': wall_clock,
+            'critical_path': critical_path(plan, durations),
+            'sequential_estimate': sequential_estimate,
+            'speedup_estimate': sequential_estimate / wall_clock if wall_clock else 0.0,
+            'succeeded': sum(r['success'] for r in results.values()),
+            'failed': sum(not r['success'] for r in results.values()),
+            'values': merged,
+            'plan': plan.model_dump(),
+            'results': [results[s.id] for s in plan.subtasks],
+        }
+
+    # Blocking entry point
+    def run(self, plan):
+        return self.pool.run(self.run_plan(plan)).result()
+
+
+def format_plan(plan):
+    lines = []
+    for subtask in validate_plan(plan):
+        after = f" after {', '.join(subtask.depends_on)}" if subtask.depends_on else ''
+        group = f" [{subtask.context_group}]" if subtask.context_group else ''
+        outputs = f" -> {', '.join(subtask.outputs)}" if subtask.outputs else ''
+        lines.append(f"{subtask.id}{group}{after}{outputs}")
+    return '\n'.join(lines)
+
+
+def format_report(report):
+    lines = [
+        f"{'sub-task':<16} {'ok':<4} {'tries':>5} {'steps':>5} {'start s':>8} {'seconds':>8}  error",
+    ]
+    for r in report['results']:
+        start = f"{r['start']:>8.1f}" if r['start'] is not None else f"{'-':>8}"
+        lines.append(
+            f"{r['id']:<16} {'yes' if r['success'] else 'no':<4} {r['attempts']:>5} {r['steps']:>5} "
+            f"{start} {r['duration']:>8.1f}  {r['error'] or ''}"
+        )
+    lines.append('')
+    lines.append(f"{report['succeeded']} succeeded, {report['failed']} failed, concurrency {report['concurrency']}")
+    lines.append(
+        f"wall clock {report['wall_clock']:.1f}s (critical path {report['critical_path']:.1f}s) "
+        f"vs {report['sequential_estimate']:.1f}s of sub-task time (~{report['speedup_estimate']:.2f}x; "
+        f"sub-tasks measured concurrently, so a sequential estimate only)"
+    )
+    baseline = report.get('baseline')
+    if baseline is not None:
+        outcome = 'done' if baseline['success'] else f"failed: {baseline['error']}"
+        lines.append(
+            f"one agent on the whole task {baseline['wall_clock']:.1f}s ({outcome}), measured speedup "
+            f"{report['speedup']:.2f}x"
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    from browser_use import Agent, Controller
+    from dotenv import load_dotenv
+
+    from advisor_actions import register_advisor_actions
+    from browser_pool import BrowserPool
+    from llm_backend import make_llm
+    from redaction import install_redaction
+    from ux_tasks import bank_email_task
+
+    parser = argparse.ArgumentParser(description="Plan a multi-part agent task and run its parts in parallel")
+    parser.add_argument('--task-file', default=None, help="Task prompt file (default: the bank + email demo task)")
+    parser.add_argument('--static-plan', action='store_true',
+                        help="Use the hand-written plan for the bank + email demo instead of asking the LLM")
+    parser.add_argument('--plan-only', action='store_true', help="Print the plan and exit")
+    parser.add_argument('--concurrency', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=900.0, help="Seconds per sub-task attempt")
+    parser.add_argument('--retries', type=int, default=0)
+    parser.add_argument('--max-steps', type=int, default=60)
+    parser.add_argument('--baseline', action='store_true',
+                        help="Afterwards run the whole task in one agent and report the measured speedup "
+                             "(repeats the task's effects: trades, sent mail)")
+    parser.add_argument('--report', default=None, help="Write the JSON report to this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    load_dotenv(os.path.join(os.path.dirname(__file__), 'secrets.env'))
+    sensitive_data = {
+        'username': os.getenv('EMAIL'),
+        'password': os.getenv('PASSWORD'),
+        'banking_username': os.getenv('BANKINGUSERNAME'),
+        'banking_password': os.getenv('BANKINGPASSWORD')
+    }
+    install_redaction(sensitive_data)
+    task = bank_email_task
+    if args.task_file:
+        with open(args.task_file, encoding='utf-8') as f:
+            task = f.read()
+
+    llm = make_llm(sensitive_data)
+    if args.static_plan:
+        plan = BANK_EMAIL_PLAN
+    else:
+        plan = asyncio.run(plan_task(llm, task))
+    print(format_plan(plan))
+    if args.plan_only:
+        return
+
+    def make_agent(prompt, context, controller):
+        return Agent(
+            browser_context=context,
+            task=prompt,
+            llm=llm,
+            controller=controller,
+            sensitive_data=sensitive_data,
+            max_failures=10,
+            generate_gif=False,
+        )
+
+    def make_controller(model):
+        return register_advisor_actions(Controller(output_model=model))
+
+    pool = BrowserPool(max_size=browsers_needed(plan, args.concurrency))
+    try:
+        runner = PlanRunner(pool, make_agent, make_controller, concurrency=args.concurrency, timeout=args.timeout,
+                            retries=args.retries, max_steps=args.max_steps)
+        report = runner.run(plan)
+        if args.baseline:
+            baseline = runner.run(Plan(subtasks=[SubTask(id='task', task=task)]))
+            report['baseline'] = {
+                'wall_clock': baseline['wall_clock'],
+                'success': baseline['succeeded'] == 1,
+                'error': baseline['results'][0]['error'],
+            }
+            report['speedup'] = baseline['wall_clock'] / report['wall_clock'] if report['wall_clock'] else 0.0
+    finally:
+        pool.close()
+
+    print()
+    print(format_report(report))
+    print()
+    print(json.dumps(report['values'], indent=2))
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
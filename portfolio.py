@@ -0,0 +1,148 @@
+import threading
+
+import numpy as np
+
+# Columnar view of the ledger for valuation.
+#
+# Holdings are a dense client x equity share matrix and prices a vector aligned
+# with its columns, so valuing the whole book is a single batched multiply instead
+# of a Python loop over every client and equity.
+
+
+class PortfolioMatrix:
+    def __init__(self, clients, equities, shares, cash, prices, versions=None):
+        self.clients = clients          # list of client names, row order
+        self.equities = equities        # list of equity names, column order
+        self.shares = shares            # int64 array, shape (n_clients, n_equities)
+        self.cash = cash                # float64 array, shape (n_clients,)
+        self.prices = prices            # float64 array, shape (n_equities,)
+        self.versions = versions or {}
+        self._row = {name: i for i, name in enumerate(clients)}
+        self._col = {name: j for j, name in enumerate(equities)}
+        self._lower_names = None
+
+    def __len__(self):
+        return len(self.clients)
+
+    def row(self, client):
+        return self._row[client]
+
+    def col(self, equity):
+        return self._col[equity]
+
+    # Indices of clients whose name contains `query` (case-insensitive), in row order
+    def search(self, query):
+        if not query:
+            return np.arange(len(self.clients))
+        if self._lower_names is None:
+            self._lower_names = np.char.lower(np.asarray(self.clients, dtype=str))
+        return np.flatnonzero(np.char.find(self._lower_names, query.lower()) >= 0)
+
+
+# Build a PortfolioMatrix from one consistent read of the ledger
+def load_portfolio(ledger):
+    cols = ledger.columns()
+    client_ids = np.fromiter((row[0] for row in cols['clients']), dtype=np.int64, count=len(cols['clients']))
+    equity_ids = np.fromiter((row[0] for row in cols['equities']), dtype=np.int64, count=len(cols['equities']))
+
+    shares = np.zeros((len(client_ids), len(equity_ids)), dtype=np.int64)
+    if cols['holdings']:
+        holdings = np.asarray(cols['holdings'], dtype=np.int64)
+        # ids come back sorted (ORDER BY id), so searchsorted maps ids to row/column positions
+        rows = np.searchsorted(client_ids, holdings[:, 0])
+        columns = np.searchsorted(equity_ids, holdings[:, 1])
+        shares[rows, columns] = holdings[:, 2]
+
+    return PortfolioMatrix(
+        clients=[row[1] for row in cols['clients']],
+        equities=[row[1] for row in cols['equities']],
+        shares=shares,
+        cash=np.fromiter((row[2] for row in cols['clients']), dtype=np.float64, count=len(client_ids)),
+        prices=np.fromiter((row[2] for row in cols['equities']), dtype=np.float64, count=len(equity_ids)),
+        versions=cols['versions'],
+    )
+
+
+class Valuation:
+    def __init__(self, position_values, totals):
+        self.position_values = position_values  # shares * prices, shape (n_clients, n_equities)
+        self.totals = totals                    # per-client portfolio value, shape (n_clients,)
+
+
+# Value every position and every client in one pass
+def valuate(portfolio, prices=None):
+    prices = portfolio.prices if prices is None else np.asarray(prices, dtype=np.float64)
+    position_values = portfolio.shares * prices
+    return Valuation(position_values, position_values.sum(axis=1))
+
+
+# Valuation kept current one price tick at a time.
+#
+# A tick for equity j only moves the totals of clients that hold j, by
+# shares[:, j] * (new - old), so each tick costs O(holders of j) instead of a
+# full shares @ prices over the book. Position values are derived on demand for
+# the rows being displayed. Totals are recomputed exactly every `resync_every`
+# ticks so floating-point drift from repeated deltas stays bounded.
+class IncrementalValuation:
+    def __init__(self, portfolio, resync_every=100_000):
+        self.portfolio = portfolio
+        self.prices = portfolio.prices.copy()
+        self.totals = valuate(portfolio).totals
+        self.resync_every = resync_every
+        self.ticks_applied = 0
+        self._since_resync = 0
+        self._holders = [np.flatnonzero(portfolio.shares[:, j]) for j in range(len(portfolio.equities))]
+        self._lock = threading.Lock()
+
+    # ticks: {equity: price}; unknown equities are ignored
+    def apply_ticks(self, ticks):
+        shares = self.portfolio.shares
+        with self._lock:
+            for equity, price in ticks.items():
+                j = self.portfolio._col.get(equity)
+                if j is None:
+                    continue
+                delta = price - self.prices[j]
+                if delta:
+                    holders = self._holders[j]
+                    self.totals[holders] += shares[holders, j] * delta
+                    self.prices[j] = price
+            self.ticks_applied += len(ticks)
+            self._since_resync += len(ticks)
+            if self._since_resync >= self.resync_every:
+                self.totals = shares @ self.prices
+                self._since_resync = 0
+
+    # Consistent copy of (prices, totals) for rendering
+    def view(self):
+        with self._lock:
+            return self.prices.copy(), self.totals.copy()
+
+
+# Keeps an IncrementalValuation in step with the ledger for a live price feed:
+# ticks are applied incrementally, and a change in the ledger's holdings version
+# (a trade) rebuilds the matrix and replays the latest prices onto it.
+class LiveValuation:
+    def __init__(self, ledger):
+        self.ledger = ledger
+        self._latest = {}
+        self._current = None
+        self._holdings_version = None
+        self._lock = threading.Lock()
+
+    def apply_ticks(self, ticks):
+        with self._lock:
+            self._latest.update(ticks)
+            current = self._current
+        if current is not None:
+            current.apply_ticks(ticks)
+
+    def current(self):
+        holdings_version = self.ledger.versions()['holdings']
+        with self._lock:
+            if self._current is None or holdings_version != self._holdings_version:
+                current = IncrementalValuation(load_portfolio(self.ledger))
+                current.apply_ticks(self._latest)
+                self._current = current
+                self._holdings_version = holdings_version
+            return self._current
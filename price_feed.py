@@ -0,0 +1,124 @@
+import math
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# Pluggable price feeds for the advisor app.
+#
+# A feed pushes batches of ticks, {equity: price}, to its subscribers from its own
+# thread. Ticks are coalesced per batch (only the last price per equity in a batch
+# is delivered), which is what lets subscribers keep up at high tick rates.
+# A feed implements start() and stop(); PriceFeed handles the subscribers.
+
+
+class PriceFeed(ABC):
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    # callback(ticks) is called from the feed thread with {equity: price}
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers = self._subscribers + [callback]
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            self._subscribers = [cb for cb in self._subscribers if cb is not callback]
+
+    def publish(self, ticks):
+        for callback in self._subscribers:
+            callback(ticks)
+
+    @abstractmethod
+    def start(self):
+        pass
+
+    @abstractmethod
+    def stop(self):
+        pass
+
+
+# Local random-walk tick generator. Produces `rate` ticks per second, published
+# every `interval` seconds as one coalesced batch.
+class SimulatedPriceFeed(PriceFeed):
+    def __init__(self, prices, rate=1000.0, interval=0.05, volatility=0.0005, seed=None):
+        super().__init__()
+        self.prices = dict(prices)
+        self.rate = rate
+        self.interval = interval
+        self.volatility = volatility
+        self.ticks_generated = 0
+        self._equities = list(self.prices)
+        self._random = random.Random(seed)
+        self._stop = threading.Event()
+        self._thread = None
+
+    # Advance the walk by n ticks and return the coalesced batch
+    def generate(self, n):
+        batch = {}
+        for _ in range(n):
+            equity = self._random.choice(self._equities)
+            price = self.prices[equity] * math.exp(self._random.gauss(0.0, self.volatility))
+            price = round(max(price, 0.01), 2)
+            self.prices[equity] = price
+            batch[equity] = price
+        self.ticks_generated += n
+        return batch
+
+    def _run(self):
+        owed = 0.0
+        next_at = time.monotonic()
+        while not self._stop.is_set():
+            owed += self.rate * self.interval
+            n = int(owed)
+            owed -= n
+            if n:
+                self.publish(self.generate(n))
+            next_at += self.interval
+            self._stop.wait(max(0.0, next_at - time.monotonic()))
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='simulated-price-feed', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+# Subscriber that persists prices to the ledger, so trades execute at the live price.
+# Ticks only update an in-memory dict; a writer thread flushes it every `interval`
+# seconds as a single set_prices() transaction.
+class LedgerPriceWriter:
+    def __init__(self, ledger, interval=0.5):
+        self.ledger = ledger
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='ledger-price-writer', daemon=True)
+        self._thread.start()
+
+    def __call__(self, ticks):
+        with self._lock:
+            self._pending.update(ticks)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if pending:
+            self.ledger.set_prices(pending)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
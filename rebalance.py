@@ -0,0 +1,161 @@
+import numpy as np
+
+# Bulk rebalancing over the columnar book (portfolio.PortfolioMatrix).
+#
+# "Sell all of Client C's Nvidia and spend as much as possible on Morgan
+# Stanley" used to be worked out by the agent and entered one order at a time.
+# plan_rebalance() computes it for any number of clients at once, as array
+# operations over the selected rows of the share matrix:
+#   sell_all   [equity, ...]       sell every share held
+#   sell       {equity: shares}    sell up to that many shares each
+#   buy_max    equity | [equity, ...] | {equity: fraction}
+#                                  spend the cash on hand after the sells
+#                                  (split evenly, or by fraction of it) on as
+#                                  many whole shares as it buys
+#   weights    {equity: weight}    hold floor(pool * weight / price) shares of
+#                                  each listed equity, where pool is the
+#                                  client's cash plus the value of the listed
+#                                  equities; unlisted holdings are left alone
+#                                  and whatever is not allocated stays in cash
+# Sells (sell_all, sell) happen first; buy_max and weights are alternatives.
+# Share counts are floor divisions, checked so no client can ever go below
+# zero cash at the plan's prices.
+#
+# A plan is applied with Ledger.apply_rebalance() in one transaction, and only
+# if the book and prices are still the ones it was computed from (see
+# OrderEngine.rebalance(), which re-plans on a conflict).
+
+# Slack for float rounding when checking that whole shares fit a budget
+CASH_EPSILON = 1e-9
+
+
+class RebalanceError(ValueError):
+    pass
+
+
+class RebalancePlan:
+    def __init__(self, portfolio, rows, delta, cash_after):
+        self.portfolio = portfolio
+        self.rows = rows                # row indices into the portfolio, shape (k,)
+        self.delta = delta              # share changes, shape (k, n_equities)
+        self.cash_after = cash_after    # shape (k,)
+
+    @property
+    def versions(self):
+        return self.portfolio.versions
+
+    # Trades as (client, equity, signed shares, price), client by client
+    def trades(self):
+        p = self.portfolio
+        i, j = np.nonzero(self.delta)
+        clients = [p.clients[row] for row in self.rows[i].tolist()]
+        equities = [p.equities[col] for col in j.tolist()]
+        return list(zip(clients, equities, self.delta[i, j].tolist(), p.prices[j].tolist()))
+
+    # Net cash change per client with any trade: [(client, amount), ...]
+    def cash_changes(self):
+        p = self.portfolio
+        changed = np.flatnonzero(self.delta.any(axis=1))
+        change = self.cash_after[changed] - p.cash[self.rows[changed]]
+        return list(zip([p.clients[row] for row in self.rows[changed].tolist()], change.tolist()))
+
+    # {client: {'before': position, 'after': position, 'trades': {equity: signed shares}}} for
+    # the clients that trade, positions shaped like Ledger.get_client()
+    def diff(self):
+        p = self.portfolio
+        changed = np.flatnonzero(self.delta.any(axis=1))
+        rows = self.rows[changed]
+        before = p.shares[rows]
+        delta = self.delta[changed]
+        equities = p.equities
+        diff = {}
+        for row, cash_before, cash_after, held, moved in zip(
+            rows.tolist(), p.cash[rows].tolist(), self.cash_after[changed].tolist(),
+            before.tolist(), delta.tolist()
+        ):
+            diff[p.clients[row]] = {
+                'before': {'Investment': cash_before, 'Shares': dict(zip(equities, held))},
+                'after': {'Investment': cash_after,
+                          'Shares': {e: h + m for e, h, m in zip(equities, held, moved)}},
+                'trades': {e: m for e, m in zip(equities, moved) if m},
+            }
+        return diff
+
+
+def _columns(portfolio, equities, rule, buying=False):
+    try:
+        cols = np.array([portfolio.col(e) for e in equities], dtype=np.intp)
+    except KeyError as e:
+        raise RebalanceError(f"Unknown equity in {rule}: {e.args[0]}")
+    if buying and (portfolio.prices[cols] <= 0).any():
+        raise RebalanceError(f"No price to buy at in {rule}")
+    return cols
+
+
+# Largest whole share counts whose cost fits `budget`, elementwise (budget and price broadcast)
+def max_shares(budget, price):
+    shares = np.floor((budget + CASH_EPSILON) / price)
+    shares -= shares * price > budget + CASH_EPSILON
+    return np.maximum(shares, 0).astype(np.int64)
+
+
+def plan_rebalance(portfolio, clients=None, sell_all=(), sell=None, buy_max=None, weights=None):
+    if buy_max is not None and weights is not None:
+        raise RebalanceError("Give either buy_max or weights, not both")
+    if isinstance(clients, str):
+        clients = [clients]
+    if isinstance(sell_all, str):
+        sell_all = [sell_all]
+    if clients is None:
+        rows = np.arange(len(portfolio), dtype=np.intp)
+    else:
+        try:
+            rows = np.array([portfolio.row(c) for c in dict.fromkeys(clients)], dtype=np.intp)
+        except KeyError as e:
+            raise RebalanceError(f"Unknown client: {e.args[0]}")
+
+    shares = portfolio.shares[rows]
+    prices = portfolio.prices
+    delta = np.zeros_like(shares)
+
+    # Sells
+    if sell_all:
+        cols = _columns(portfolio, sell_all, 'sell_all')
+        delta[:, cols] = -shares[:, cols]
+    if sell:
+        cols = _columns(portfolio, list(sell), 'sell')
+        amounts = np.array(list(sell.values()), dtype=np.int64)
+        if (amounts < 0).any():
+            raise RebalanceError("Share counts to sell must not be negative")
+        delta[:, cols] = -np.minimum(shares[:, cols], np.maximum(amounts, -delta[:, cols]))
+    cash = portfolio.cash[rows] - delta @ prices
+
+    # Buys
+    if buy_max is not None:
+        if isinstance(buy_max, str):
+            buy_max = {buy_max: 1.0}
+        elif not isinstance(buy_max, dict):
+            buy_max = {equity: 1.0 / len(buy_max) for equity in buy_max}
+        if not buy_max:
+            raise RebalanceError("buy_max names no equity")
+        cols = _columns(portfolio, list(buy_max), 'buy_max', buying=True)
+        fractions = np.array(list(buy_max.values()), dtype=np.float64)
+        if (fractions < 0).any() or fractions.sum() > 1 + CASH_EPSILON:
+            raise RebalanceError("buy_max fractions must be non-negative and add up to at most 1")
+        if (delta[:, cols] < 0).any():
+            raise RebalanceError("Cannot sell and buy the same equity in one rebalance")
+        buys = max_shares(cash[:, None] * fractions, prices[cols])
+        delta[:, cols] += buys
+        cash = cash - buys @ prices[cols]
+    elif weights is not None:
+        cols = _columns(portfolio, list(weights), 'weights', buying=True)
+        targets = np.array(list(weights.values()), dtype=np.float64)
+        if (targets < 0).any() or targets.sum() > 1 + CASH_EPSILON:
+            raise RebalanceError("Weights must be non-negative and add up to at most 1")
+        current = shares[:, cols] + delta[:, cols]
+        pool = cash + current @ prices[cols]
+        target_shares = max_shares(pool[:, None] * targets, prices[cols])
+        cash = cash - (target_shares - current) @ prices[cols]
+        delta[:, cols] = target_shares - shares[:, cols]
+
+    return RebalancePlan(portfolio, rows, delta, cash)
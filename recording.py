@@ -0,0 +1,394 @@
+import argparse
+import base64
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Bounded, compressed recordings of agent runs, written off the agent's loop.
+#
+# Replaces the runners' save_recording_path / trace_path / generate_gif output
+# (a full-motion video, a Playwright trace zip and a GIF rendered at the end of
+# every run, all written synchronously into the working directory).
+#
+# browser_use already takes a screenshot for every step; a run's recording
+# keeps those instead. The agent's step callback only enqueues the screenshot
+# and step details; one writer thread per Recorder does the rest:
+#   frames/<hash>.jpg   each distinct screenshot once, re-encoded as JPEG.
+#                       A step whose page looks exactly like an earlier one
+#                       just points at that frame.
+#   trace.jsonl.gz      one line per step (time, url, title, goal, actions,
+#                       frame) and a final line with the outcome
+# If the writer falls max_pending_frames behind, new frames are dropped rather
+# than blocking the agent or piling up in memory; once a run reaches
+# max_run_bytes only its trace lines are written.
+#
+# Retention (prune(), also run by the writer when a run finishes) deletes runs
+# older than max_age_days, trims runs over max_run_bytes (video and Playwright
+# traces first), then deletes the oldest runs until the directory fits
+# max_total_bytes. Age is that of a run's newest file. Runs still being written,
+# by this or any other process sharing the directory, are left alone: a run
+# holds a RECORDING marker file until it finishes (a marker nothing has touched
+# for stale_after seconds is from a crashed process), and a run with any file
+# modified in the last min_idle seconds is skipped as well. Playwright video and traces are still available per run
+# (video=True / trace=True) and land in the run's directory, so they are
+# bounded by the same limits.
+#
+#   python recording.py prune|list|gif <run directory>
+
+DEFAULT_RECORDING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.recordings')
+
+MB = 1024 * 1024
+
+# Present in a run's directory while it is being recorded
+ACTIVE_MARKER = 'RECORDING'
+
+
+# (total size, newest modification time) of the files under `path`
+def _dir_stats(path):
+    total = 0
+    newest = 0.0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                stat = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            total += stat.st_size
+            newest = max(newest, stat.st_mtime)
+    return total, newest
+
+
+def _dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+class RunRecording:
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        safe_name = re.sub(r'[^\w.-]+', '_', name)
+        self.directory = os.path.join(
+            recorder.root, f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{os.urandom(3).hex()}")
+        self.steps = 0
+        self.frames = 0
+        self.duplicate_frames = 0
+        self.dropped_frames = 0
+        self.bytes = 0
+        self.finished = False
+        # Writer-thread state
+        self._hashes = set()
+        self._trace = None
+        os.makedirs(os.path.join(self.directory, 'frames'), exist_ok=True)
+        with open(os.path.join(self.directory, ACTIVE_MARKER), 'w') as f:
+            f.write(str(os.getpid()))
+
+    # BrowserContextConfig options for this run's Playwright video and trace, if enabled
+    def context_options(self):
+        options = {}
+        if self.recorder.video:
+            options['save_recording_path'] = os.path.join(self.directory, 'video')
+        if self.recorder.trace:
+            options['trace_path'] = self.directory
+        return options
+
+    # Agent step callback (register_new_step_callback); runs on the agent's loop
+    def __call__(self, state, model_output, step):
+        self.steps += 1
+        entry = {
+            'step': step,
+            'time': time.time(),
+            'url': state.url,
+            'title': state.title,
+            'goal': model_output.current_state.next_goal if model_output else None,
+            'actions': [a.model_dump(exclude_unset=True) for a in model_output.action] if model_output else [],
+        }
+        self.recorder._submit(self, entry, state.screenshot)
+
+    # Record the run's outcome and close its files (asynchronously). Only the first
+    # call counts, so a runner can also call it in a finally in case record() never ran.
+    def finish(self, history=None):
+        if self.finished:
+            return
+        self.finished = True
+        outcome = {'finished': time.time(), 'steps': self.steps}
+        if history is not None:
+            outcome.update(done=history.is_done(), final_result=history.final_result(), errors=len(
+                [e for e in history.errors() if e]))
+        self.recorder._submit(self, outcome, None, close=True)
+
+    # Writer thread only
+    def _write(self, entry, screenshot, close):
+        if screenshot:
+            entry['frame'] = self._write_frame(screenshot)
+        if self._trace is None:
+            self._trace = gzip.open(os.path.join(self.directory, 'trace.jsonl.gz'), 'wt', encoding='utf-8')
+        self._trace.write(json.dumps(entry) + '\n')
+        if close:
+            self._trace.close()
+            self._trace = None
+            try:
+                os.remove(os.path.join(self.directory, ACTIVE_MARKER))
+            except OSError:
+                pass
+
+    def _write_frame(self, screenshot):
+        data = base64.b64decode(screenshot)
+        digest = hashlib.blake2b(data, digest_size=12).hexdigest()
+        if digest in self._hashes:
+            self.duplicate_frames += 1
+            return digest
+        if self.bytes >= self.recorder.max_run_bytes:
+            self.dropped_frames += 1
+            return None
+        path = os.path.join(self.directory, 'frames', f'{digest}.jpg')
+        encoded = self.recorder._encode(data)
+        with open(path, 'wb') as f:
+            f.write(encoded)
+        self._hashes.add(digest)
+        self.frames += 1
+        self.bytes += len(encoded)
+        return digest
+
+
+class Recorder:
+    def __init__(self, root=DEFAULT_RECORDING_DIR, max_run_bytes=50 * MB, max_total_bytes=500 * MB,
+                 max_age_days=7.0, quality=70, video=False, trace=False, max_pending_frames=64,
+                 stale_after=3600.0, min_idle=60.0):
+        self.root = root
+        self.max_run_bytes = max_run_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_age_days = max_age_days
+        self.stale_after = stale_after
+        self.min_idle = min_idle
+        self.quality = quality
+        self.video = video
+        self.trace = trace
+        os.makedirs(self.root, exist_ok=True)
+        self.max_pending_frames = max_pending_frames
+        self._lock = threading.Lock()
+        self._pending_frames = 0
+        self._active = set()
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='recorder', daemon=True)
+        self._thread.start()
+
+    def start_run(self, name='run'):
+        run = RunRecording(self, name)
+        with self._lock:
+            self._active.add(run.directory)
+        return run
+
+    # Record `agent` for the duration of the block (chains any existing step callback)
+    @contextmanager
+    def record(self, agent, name='run', run=None):
+        run = run or self.start_run(name)
+        previous_callback = agent.register_new_step_callback
+
+        def on_step(state, model_output, step):
+            run(state, model_output, step)
+            if previous_callback:
+                previous_callback(state, model_output, step)
+
+        agent.register_new_step_callback = on_step
+        try:
+            yield run
+        finally:
+            agent.register_new_step_callback = previous_callback
+            run.finish(agent.history)
+
+    def _submit(self, run, entry, screenshot, close=False):
+        with self._lock:
+            if screenshot and self._pending_frames >= self.max_pending_frames:
+                # The writer is behind: keep the step in the trace, lose only its frame
+                run.dropped_frames += 1
+                screenshot = None
+            if screenshot:
+                self._pending_frames += 1
+        self._queue.put((run, entry, screenshot, close))
+
+    def _encode(self, png):
+        try:
+            from PIL import Image
+        except ImportError:
+            return png
+        image = Image.open(io.BytesIO(png)).convert('RGB')
+        out = io.BytesIO()
+        image.save(out, 'JPEG', quality=self.quality, optimize=True)
+        return out.getvalue()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                run, entry, screenshot, close = item
+                try:
+                    run._write(entry, screenshot, close)
+                except OSError as e:
+                    logger.warning(f'Could not write recording for {run.name}: {e}')
+                finally:
+                    if screenshot:
+                        with self._lock:
+                            self._pending_frames -= 1
+                if close:
+                    with self._lock:
+                        self._active.discard(run.directory)
+                    self.prune()
+            finally:
+                self._queue.task_done()
+
+    # Block until everything queued so far is on disk
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    # Apply the age, per-run and total size limits; returns the removed run directories
+    def prune(self, now=None):
+        now = now or time.time()
+        removed = []
+        runs = []
+        with self._lock:
+            active = set(self._active)
+        for name in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(path) or path in active:
+                continue
+            size, modified = _dir_stats(path)
+            idle = now - modified
+            if idle < self.min_idle or (idle < self.stale_after
+                                        and os.path.exists(os.path.join(path, ACTIVE_MARKER))):
+                # Still being recorded, possibly by another process
+                continue
+            if self.max_age_days is not None and idle > self.max_age_days * 86400:
+                shutil.rmtree(path, ignore_errors=True)
+                removed.append(path)
+                continue
+            if size > self.max_run_bytes:
+                size = self._trim_run(path)
+            runs.append((modified, path, size))
+
+        total = sum(size for _, _, size in runs)
+        for _, path, size in sorted(runs):
+            if total <= self.max_total_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            removed.append(path)
+            total -= size
+        return removed
+
+    # Largest files first among video and Playwright traces, then the newest frames
+    def _trim_run(self, path):
+        files = []
+        for root, _, names in os.walk(path):
+            for name in names:
+                file_path = os.path.join(root, name)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                if name.endswith(('.webm', '.zip')):
+                    files.append((0, -stat.st_size, file_path, stat.st_size))
+                elif root.endswith('frames'):
+                    files.append((1, -stat.st_mtime, file_path, stat.st_size))
+        size = _dir_size(path)
+        for _, _, file_path, file_size in sorted(files):
+            if size <= self.max_run_bytes:
+                break
+            os.remove(file_path)
+            size -= file_size
+        return size
+
+
+# Recorder configured from the environment, or None with AGENT_RECORDING=0:
+#   RECORDING_DIR, RECORDING_MAX_RUN_MB, RECORDING_MAX_TOTAL_MB, RECORDING_MAX_AGE_DAYS,
+#   RECORDING_VIDEO=1 / RECORDING_TRACE=1 for Playwright video / traces
+def recorder_from_env():
+    if os.getenv('AGENT_RECORDING', '1') == '0':
+        return None
+    return Recorder(
+        os.getenv('RECORDING_DIR', DEFAULT_RECORDING_DIR),
+        max_run_bytes=int(float(os.getenv('RECORDING_MAX_RUN_MB', '50')) * MB),
+        max_total_bytes=int(float(os.getenv('RECORDING_MAX_TOTAL_MB', '500')) * MB),
+        max_age_days=float(os.getenv('RECORDING_MAX_AGE_DAYS', '7')),
+        video=os.getenv('RECORDING_VIDEO') == '1',
+        trace=os.getenv('RECORDING_TRACE') == '1',
+    )
+
+
+# Steps of a recorded run, from its trace.jsonl.gz
+def load_trace(directory):
+    with gzip.open(os.path.join(directory, 'trace.jsonl.gz'), 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# Render a recorded run as a GIF, one frame per step (the replacement for generate_gif)
+def make_gif(directory, output=None, duration=1000):
+    from PIL import Image
+
+    frames = []
+    for entry in load_trace(directory):
+        frame = entry.get('frame')
+        path = os.path.join(directory, 'frames', f'{frame}.jpg') if frame else None
+        if path and os.path.exists(path):
+            frames.append(Image.open(path).convert('RGB'))
+    if not frames:
+        raise ValueError(f'No frames recorded in {directory}')
+    output = output or os.path.join(directory, 'run.gif')
+    frames[0].save(output, save_all=True, append_images=frames[1:], duration=duration, loop=0, optimize=True)
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent run recordings")
+    parser.add_argument('command', choices=['prune', 'list', 'gif'])
+    parser.add_argument('run', nargs='?', help="Run directory (gif)")
+    parser.add_argument('--root', default=DEFAULT_RECORDING_DIR)
+    parser.add_argument('--max-run-mb', type=float, default=50)
+    parser.add_argument('--max-total-mb', type=float, default=500)
+    parser.add_argument('--max-age-days', type=float, default=7)
+    args = parser.parse_args()
+
+    if args.command == 'gif':
+        if not args.run:
+            parser.error('gif needs a run directory')
+        print(make_gif(args.run))
+        return
+
+    recorder = Recorder(args.root, max_run_bytes=int(args.max_run_mb * MB), max_total_bytes=int(args.max_total_mb * MB),
+                        max_age_days=args.max_age_days)
+    try:
+        if args.command == 'prune':
+            for path in recorder.prune():
+                print(f"removed {path}")
+        for name in sorted(os.listdir(args.root)):
+            path = os.path.join(args.root, name)
+            if os.path.isdir(path):
+                print(f"{name:<48} {_dir_size(path) / MB:>8.1f} MiB")
+    finally:
+        recorder.close()
+
+
+if __name__ == '__main__':
+    main()
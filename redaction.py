@@ -0,0 +1,110 @@
+import logging
+import re
+
+# Scrubs sensitive_data values out of log records before any handler sees them.
+#
+# browser_use logs some action parameters after it has substituted the real
+# secrets (e.g. "⌨️  Input johnsmith into index 5"), and those records reach
+# every handler on the root logger, the Streamlit page and the run profiles
+# included. install_redaction() wraps the log record factory, so each record is
+# cleaned once, when it is created, whichever logger or handler it goes to
+# (browser_use's own non-propagating handler too). SecretRedactionFilter can
+# also be attached to a single handler or logger.
+#
+# The message is formatted once (msg % args), and every secret in it is
+# replaced by its placeholder, <secret>name</secret>, the same form the agent
+# uses. Exception and stack text is formatted and cleaned the same way. All
+# secrets are matched by one regex built from a trie of the values, so a
+# record costs a single scan whatever the number of secrets. The longest
+# secret wins where secrets overlap. Values shorter than `min_length` are
+# skipped, since they would match everywhere.
+
+
+# Regex source matching any of `words`: alternatives share their common
+# prefixes (a trie), so the regex engine never re-tests one prefix per word
+def trie_pattern(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not end:
+            return branches[0]
+        # Longer continuations first: the longest secret wins
+        group = '(?:' + '|'.join(branches) + ')'
+        return group + '?' if end else group
+
+    return build(trie)
+
+
+class SecretRedactionFilter(logging.Filter):
+    # secrets: {name: value} (sensitive_data); empty or short values are ignored
+    def __init__(self, secrets=None, min_length=3):
+        super().__init__()
+        self.min_length = min_length
+        self.set_secrets(secrets or {})
+
+    def set_secrets(self, secrets):
+        values = {}
+        for name, value in secrets.items():
+            if value and len(str(value)) >= self.min_length:
+                values.setdefault(str(value), f'<secret>{name}</secret>')
+        self._placeholders = values
+        self._pattern = re.compile(trie_pattern(values)) if values else None
+
+    def redact(self, text):
+        if self._pattern is None or not text:
+            return text
+        return self._pattern.sub(lambda m: self._placeholders[m.group(0)], text)
+
+    def filter(self, record):
+        if self._pattern is None or getattr(record, '_redacted', False):
+            return True
+        try:
+            record.msg = self.redact(record.getMessage())
+            record.args = None
+        except (TypeError, ValueError):
+            # msg % args fails; clean the parts and let the handler report the bad call
+            record.msg = self.redact(str(record.msg))
+            if isinstance(record.args, tuple):
+                record.args = tuple(self.redact(a) if isinstance(a, str) else a for a in record.args)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        if record.exc_text:
+            record.exc_text = self.redact(record.exc_text)
+        if record.stack_info:
+            record.stack_info = self.redact(record.stack_info)
+        record._redacted = True
+        return True
+
+
+_filter = None
+
+
+# Redact `secrets` from every log record created from now on. Calling it again
+# replaces the secrets (e.g. on a Streamlit rerun) without stacking factories.
+def install_redaction(secrets, min_length=3):
+    global _filter
+    if _filter is not None:
+        _filter.min_length = min_length
+        _filter.set_secrets(secrets)
+        return _filter
+
+    redaction = SecretRedactionFilter(secrets, min_length)
+    make_record = logging.getLogRecordFactory()
+
+    def record_factory(*args, **kwargs):
+        record = make_record(*args, **kwargs)
+        redaction.filter(record)
+        return record
+
+    logging.setLogRecordFactory(record_factory)
+    _filter = redaction
+    return redaction
@@ -0,0 +1,393 @@
+import argparse
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# Per-step timing records for agent runs.
+#
+# browser_use logs a fixed sequence for every step: "📍 Step N" when the step
+# starts (before the page state is captured), the model's Eval/Memory/Next goal
+# and "🛠️  Action i/n" lines once the LLM has answered, then [controller] lines
+# as each action executes, and "❌ Result failed" when the step errors.
+# StepTimeline turns that sequence into one record per step, so the same code
+# serves a live run (timestamps from the LogRecord) and an old text log such as
+# sample_bank_email_log.txt (timestamps only if the log format had them).
+#
+# A record is a plain dict:
+#   {'run', 'step', 'start', 'end', 'duration',
+#    'decide_seconds'  step start -> model output (page state + LLM),
+#    'llm_seconds'     the LLM call alone (live runs only),
+#    'action_seconds'  model output -> step end (controller actions),
+#    'actions', 'action_names', 'controller_events', 'failed', 'errors',
+#    'input_tokens', 'output_tokens', 'done'}
+# Durations are None when the source had no timestamps.
+#
+# Live runs: wrap the run in profile_run(agent, name). It listens on the
+# browser_use logger, times agent.get_next_action exactly, and collects token
+# usage from a TokenUsageCallback on the chat model. Records go to one JSONL
+# file per run under DEFAULT_PROFILE_DIR. Like StreamlitHandler, a profiler only
+# sees records logged from its own run's context, so concurrent runs stay apart.
+#
+# `python run_profiler.py PATH...` summarizes JSONL profiles and/or text logs.
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.agent_profiles')
+
+STEP_RE = re.compile(r'📍 Step (\d+)')
+ACTION_RE = re.compile(r'🛠️\s+Action (\d+)/(\d+): (.*)')
+FAILED_RE = re.compile(r'❌ Result failed (\d+)/(\d+) times')
+EVAL_RE = re.compile(r'^\S+ Eval:')
+RUN_START = '🚀 Starting task'
+RUN_END = ('✅ Task completed', '❌ Failed to complete task', '❌ Stopping due to', '❌ Failed to complete')
+
+# "2025-01-30 10:12:01,123 INFO     [agent] message" (the timestamp is optional)
+LINE_RE = re.compile(
+    r'^(?:(?P<ts>\d{4}-\d\d-\d\d[ T]\d\d:\d\d:\d\d(?:[.,]\d+)?)\s+(?:-\s+)?)?'
+    r'(?P<level>DEBUG|INFO|WARNING|ERROR|CRITICAL)\s+\[(?P<logger>[^\]]+)\]\s?(?P<message>.*)$'
+)
+
+_current_profiler = contextvars.ContextVar('step_profiler', default=None)
+
+
+def _new_record(run, step, start):
+    return {
+        'run': run,
+        'step': step,
+        'start': start,
+        'end': None,
+        'duration': None,
+        'decide_seconds': None,
+        'llm_seconds': None,
+        'action_seconds': None,
+        'actions': 0,
+        'action_names': [],
+        'controller_events': 0,
+        'failed': False,
+        'errors': [],
+        'input_tokens': 0,
+        'output_tokens': 0,
+        'done': False,
+    }
+
+
+def _elapsed(start, end):
+    return end - start if start is not None and end is not None else None
+
+
+class StepTimeline:
+    def __init__(self, run='run'):
+        self.run = run
+        self.runs = 0
+        self.records = []
+        self.current = None
+        self._decided = None
+        self._last_ts = None
+
+    def _run_name(self):
+        return self.run if self.runs <= 1 else f'{self.run}#{self.runs}'
+
+    def _close(self, ts):
+        record = self.current
+        if record is None:
+            return
+        record['end'] = ts
+        record['duration'] = _elapsed(record['start'], ts)
+        record['decide_seconds'] = _elapsed(record['start'], self._decided)
+        record['action_seconds'] = _elapsed(self._decided, ts)
+        self.records.append(record)
+        self.current = None
+        self._decided = None
+
+    # Feed one log event. ts is seconds since the epoch, or None.
+    def feed(self, ts, level, logger_name, message):
+        if ts is not None:
+            self._last_ts = ts
+        message = message.strip()
+        if message.startswith(RUN_START):
+            self._close(ts)
+            self.runs += 1
+            return
+        step = STEP_RE.match(message)
+        if step:
+            self._close(ts)
+            if self.runs == 0:
+                self.runs = 1
+            self.current = _new_record(self._run_name(), int(step.group(1)), ts)
+            return
+        record = self.current
+        if record is None:
+            return
+        if message.startswith(RUN_END):
+            self._close(ts)
+            return
+
+        action = ACTION_RE.match(message)
+        if EVAL_RE.match(message) or action:
+            if self._decided is None:
+                self._decided = ts
+        if action:
+            record['actions'] += 1
+            try:
+                record['action_names'].append(next(iter(json.loads(action.group(3)))))
+            except (ValueError, StopIteration, TypeError):
+                record['action_names'].append('unknown')
+        elif FAILED_RE.match(message):
+            record['failed'] = True
+            detail = message.split('\n', 1)[1].strip() if '\n' in message else ''
+            record['errors'].append(detail[:200])
+        elif message.startswith('📄 Result'):
+            record['done'] = True
+        elif 'controller' in logger_name.split('.'):
+            record['controller_events'] += 1
+
+    # Continuation line of a multi-line message (e.g. an error's detail)
+    def feed_continuation(self, line):
+        record = self.current
+        if record is not None and record['failed'] and record['errors'] and not record['errors'][-1]:
+            record['errors'][-1] = line.strip()[:200]
+
+    def finish(self):
+        self._close(self._last_ts)
+        return self.records
+
+
+def _parse_ts(text):
+    if not text:
+        return None
+    return datetime.fromisoformat(text.replace(',', '.')).timestamp()
+
+
+# Build step records from a text log (lines as produced by browser_use's
+# "LEVEL     [logger] message" format, optionally prefixed with a timestamp)
+def parse_log(lines, run='run'):
+    timeline = StepTimeline(run)
+    for line in lines:
+        line = line.rstrip('\n')
+        match = LINE_RE.match(line)
+        if match:
+            timeline.feed(_parse_ts(match.group('ts')), match.group('level'), match.group('logger'),
+                          match.group('message'))
+        elif line.strip():
+            timeline.feed_continuation(line)
+    return timeline.finish()
+
+
+# Collects token usage from the chat model (ChatOpenAI(callbacks=[TokenUsageCallback()]))
+# and credits it to the step the calling run is on.
+class TokenUsageCallback(BaseCallbackHandler):
+    run_inline = True
+
+    def on_llm_end(self, response, **kwargs):
+        profiler = _current_profiler.get()
+        if profiler is None:
+            return
+        input_tokens = output_tokens = 0
+        usage = (response.llm_output or {}).get('token_usage') or {}
+        if usage:
+            input_tokens = usage.get('prompt_tokens', 0)
+            output_tokens = usage.get('completion_tokens', 0)
+        else:
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, 'message', None), 'usage_metadata', None) or {}
+                    input_tokens += metadata.get('input_tokens', 0)
+                    output_tokens += metadata.get('output_tokens', 0)
+        profiler.add_tokens(input_tokens, output_tokens)
+
+
+class StepProfiler(logging.Handler):
+    def __init__(self, run='run'):
+        super().__init__(level=logging.INFO)
+        self.timeline = StepTimeline(run)
+        self.timeline.runs = 1
+
+    def bind(self):
+        return _current_profiler.set(self)
+
+    def unbind(self, token):
+        _current_profiler.reset(token)
+
+    def emit(self, record):
+        if _current_profiler.get() is not self:
+            return
+        try:
+            self.timeline.feed(record.created, record.levelname, record.name, record.getMessage())
+        except Exception:
+            self.handleError(record)
+
+    def add_tokens(self, input_tokens, output_tokens):
+        record = self.timeline.current
+        if record is not None:
+            record['input_tokens'] += input_tokens
+            record['output_tokens'] += output_tokens
+
+    # Time the agent's LLM call exactly instead of inferring it from log lines
+    def instrument(self, agent):
+        get_next_action = agent.get_next_action
+
+        async def timed_get_next_action(input_messages):
+            start = time.perf_counter()
+            try:
+                return await get_next_action(input_messages)
+            finally:
+                record = self.timeline.current
+                if record is not None:
+                    record['llm_seconds'] = (record['llm_seconds'] or 0.0) + time.perf_counter() - start
+
+        agent.get_next_action = timed_get_next_action
+
+    @property
+    def records(self):
+        return self.timeline.records
+
+    def finish(self):
+        return self.timeline.finish()
+
+
+def write_records(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+# Profile one agent run: `with profile_run(agent, 'buy_enough'): await agent.run()`.
+# Must be entered inside the run's own task/context. Returns the profiler; its
+# records are written to `directory` (default DEFAULT_PROFILE_DIR) on exit,
+# unless directory is False. Every record's 'run' is a unique id for this run,
+# "<time>-<name>-<random>", which is also the file's name.
+@contextmanager
+def profile_run(agent, name='run', directory=None):
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', name)
+    run_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{safe_name}-{os.urandom(3).hex()}"
+    profiler = StepProfiler(run_id)
+    profiler.instrument(agent)
+    browser_use_logger = logging.getLogger('browser_use')
+    browser_use_logger.addHandler(profiler)
+    token = profiler.bind()
+    try:
+        yield profiler
+    finally:
+        profiler.unbind(token)
+        browser_use_logger.removeHandler(profiler)
+        records = profiler.finish()
+        for record in records:
+            record['run'] = run_id
+        if directory is not False:
+            directory = directory or DEFAULT_PROFILE_DIR
+            os.makedirs(directory, exist_ok=True)
+            write_records(os.path.join(directory, f'{run_id}.jsonl'), records)
+
+
+# Records from a .jsonl profile, or parsed from any other (text log) file. A
+# profile holds one run; its file name is the run id (older profiles only
+# stored the runner's name, shared by all of its runs).
+def load_records(path):
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            run_id = os.path.splitext(os.path.basename(path))[0]
+            return [dict(json.loads(line), run=run_id) for line in f if line.strip()]
+        return parse_log(f, run=os.path.basename(path))
+
+
+def _sum(records, field):
+    values = [r[field] for r in records if r.get(field) is not None]
+    return sum(values) if values else None
+
+
+# Where the wall time of a set of runs went: totals per phase, per action type
+# (a step's action time split evenly over its actions) and the slowest steps
+def summarize(records, top=5):
+    runs = sorted({r['run'] for r in records})
+    by_action = {}
+    for r in records:
+        share = r['action_seconds'] / len(r['action_names']) if r['action_seconds'] is not None and r['action_names'] else None
+        for name in r['action_names']:
+            entry = by_action.setdefault(name, {'count': 0, 'seconds': None})
+            entry['count'] += 1
+            if share is not None:
+                entry['seconds'] = (entry['seconds'] or 0.0) + share
+    timed = [r for r in records if r['duration'] is not None]
+    return {
+        'runs': len(runs),
+        'completed_runs': len({r['run'] for r in records if r['done']}),
+        'steps': len(records),
+        'failed_steps': sum(r['failed'] for r in records),
+        'actions': sum(r['actions'] for r in records),
+        'wall_seconds': _sum(records, 'duration'),
+        'decide_seconds': _sum(records, 'decide_seconds'),
+        'llm_seconds': _sum(records, 'llm_seconds'),
+        'action_seconds': _sum(records, 'action_seconds'),
+        'failed_step_seconds': _sum([r for r in records if r['failed']], 'duration'),
+        'input_tokens': sum(r['input_tokens'] for r in records),
+        'output_tokens': sum(r['output_tokens'] for r in records),
+        'by_action': by_action,
+        'slowest_steps': sorted(timed, key=lambda r: r['duration'], reverse=True)[:top],
+    }
+
+
+def _fmt(seconds, total=None):
+    if seconds is None:
+        return '-'
+    if total:
+        return f'{seconds:.1f}s ({100 * seconds / total:.0f}%)'
+    return f'{seconds:.1f}s'
+
+
+def format_summary(summary):
+    wall = summary['wall_seconds']
+    lines = [
+        f"runs {summary['runs']} ({summary['completed_runs']} completed), steps {summary['steps']} "
+        f"({summary['failed_steps']} failed), actions {summary['actions']}",
+        f"wall time        {_fmt(wall)}",
+        f"  page + LLM     {_fmt(summary['decide_seconds'], wall)}",
+        f"    LLM only     {_fmt(summary['llm_seconds'], wall)}",
+        f"  actions        {_fmt(summary['action_seconds'], wall)}",
+        f"  failed steps   {_fmt(summary['failed_step_seconds'], wall)}",
+        f"tokens           {summary['input_tokens']} in / {summary['output_tokens']} out",
+        '',
+        f"{'action':<24} {'count':>6} {'seconds':>9}",
+    ]
+    for name, entry in sorted(summary['by_action'].items(), key=lambda kv: (-(kv[1]['seconds'] or 0), -kv[1]['count'])):
+        seconds = f"{entry['seconds']:.1f}" if entry['seconds'] is not None else '-'
+        lines.append(f"{name:<24} {entry['count']:>6} {seconds:>9}")
+    if summary['slowest_steps']:
+        lines.append('')
+        lines.append('slowest steps')
+        for r in summary['slowest_steps']:
+            lines.append(
+                f"  {r['run']} step {r['step']}: {r['duration']:.1f}s "
+                f"(page+LLM {_fmt(r['decide_seconds'])}, actions {_fmt(r['action_seconds'])}) "
+                f"{', '.join(r['action_names'])}"
+            )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize agent step profiles (.jsonl) and text logs")
+    parser.add_argument('paths', nargs='*', help=f"Profile or log files (default: every profile in {DEFAULT_PROFILE_DIR})")
+    parser.add_argument('--top', type=int, default=5, help="How many of the slowest steps to list")
+    parser.add_argument('--json', action='store_true', help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    paths = args.paths
+    if not paths and os.path.isdir(DEFAULT_PROFILE_DIR):
+        paths = sorted(os.path.join(DEFAULT_PROFILE_DIR, name) for name in os.listdir(DEFAULT_PROFILE_DIR))
+    if not paths:
+        sys.exit("No profiles found")
+
+    records = []
+    for path in paths:
+        records.extend(load_records(path))
+    summary = summarize(records, top=args.top)
+    print(json.dumps(summary, indent=2) if args.json else format_summary(summary))
+
+
+if __name__ == '__main__':
+    main()
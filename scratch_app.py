@@ -0,0 +1,82 @@
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+# A throwaway advisor_app on a freshly seeded ledger, for agent runs that must
+# neither see nor leave behind each other's trades (executor.py,
+# benchmarks/bench_scenarios.py). The app runs as `streamlit run advisor_app.py`
+# on its own port, with the ledger in a temporary directory that is removed when
+# the app stops. Price feed and order API are off so the seed prices hold.
+#
+#   with ScratchApp() as app:
+#       ...  # drive app.url
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'advisor_app.py')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ScratchApp:
+    def __init__(self, port=None, timeout=60.0):
+        self.port = port
+        self.timeout = timeout
+        self.proc = None
+        self._dir = None
+
+    @property
+    def url(self):
+        return f'http://localhost:{self.port}/'
+
+    def start(self):
+        self.port = self.port or free_port()
+        self._dir = tempfile.mkdtemp(prefix='advisor-scratch-')
+        env = dict(os.environ, ADVISOR_LEDGER_PATH=os.path.join(self._dir, 'ledger.db'))
+        env.pop('ADVISOR_PRICE_FEED', None)
+        env.pop('ADVISOR_API_PORT', None)
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'streamlit', 'run', APP,
+             '--server.port', str(self.port), '--server.headless', 'true', '--browser.gatherUsageStats', 'false'],
+            env=env, cwd=os.path.dirname(APP), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + self.timeout
+        while time.monotonic() < deadline:
+            if self.proc.poll() is not None:
+                code = self.proc.returncode
+                self.stop()
+                raise RuntimeError(f'advisor_app exited with code {code}')
+            try:
+                with urllib.request.urlopen(f'http://localhost:{self.port}/_stcore/health', timeout=1) as response:
+                    if response.status == 200:
+                        return self
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f'advisor_app did not come up on port {self.port} within {self.timeout:.0f}s')
+
+    def stop(self):
+        if self.proc is not None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+            self.proc = None
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,189 @@
+import re
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from pydantic import PrivateAttr
+
+# Deterministic stand-ins for the LLM that drives a browser_use Agent, so runs
+# need no network or API key: ScriptedChatModel in-process, and the same
+# policies behind mock_llm_server.py for anything that talks to an
+# OpenAI-compatible endpoint.
+#
+# A script is a list of steps, each a list of ops:
+#   ('go', url)              go_to_url
+#   ('input', label, text)   input_text into the element labelled `label`
+#   ('key', keys)            send_keys, e.g. 'Enter'
+#   ('click', label)         click_element on the element labelled `label`
+#   ('done',)                done, reporting the last app message seen
+#
+# Element indices are not known in advance; each step resolves its labels
+# against the "Interactive elements" list in the agent's latest state message
+# (an exact text/aria-label match beats a substring match). If a label is not
+# on the page yet (Streamlit still rerunning), the step is retried on the next
+# call with a harmless scroll_to_text, up to `max_retries` times.
+#
+# The policies are stateless: where they are in the script is carried in the
+# `memory` of their own previous output, which the agent keeps in its message
+# history. One model or server can therefore serve any number of concurrent
+# agents.
+#
+# Keep at most one index-based op per step: browser_use stops a multi-action
+# step once new elements appear, and a later index in the same step may be stale.
+
+ELEMENT_RE = re.compile(r'^\[(\d+)\]<(\w+)([^>]*)>(.*?)</\2>$')
+ATTRIBUTE_RE = re.compile(r'([\w-]+)="([^"]*)"')
+MEMORY_RE = re.compile(r'^(Scripted|Replayed) step (\d+)/\d+, retries (\d+)\.(?: Last app message: (.*))?$', re.S)
+TASK_RE = re.compile(r'Your (?:new )?ultimate task is: """(.*?)"""', re.S)
+
+# The order engine's result messages, as rendered text on the page
+MESSAGE_RE = re.compile(
+    r'(Successfully (?:bought|sold) \d+ shares of .+? for .+? at \$[\d,.]+ per share\.'
+    r'|Insufficient (?:funds|shares) to complete the (?:purchase|sale)\.'
+    r'|Unknown transaction type: \w+'
+    r'|Number of shares must be a whole number of at least 1\.)'
+)
+
+
+def page_elements(text):
+    elements = []
+    for line in text.splitlines():
+        match = ELEMENT_RE.match(line.strip())
+        if match:
+            index, tag, attributes, label = match.groups()
+            elements.append((int(index), tag, dict(ATTRIBUTE_RE.findall(attributes)), label.strip()))
+    return elements
+
+
+def page_text(text):
+    return ' '.join(line.strip()[2:].strip() for line in text.splitlines() if line.strip().startswith('[]'))
+
+
+def find_element(elements, label):
+    best = None
+    for index, tag, attributes, text in elements:
+        names = [text, attributes.get('aria-label', ''), attributes.get('placeholder', '')]
+        if label in names:
+            return index
+        if best is None and any(label in name for name in names if name):
+            best = index
+    return best
+
+
+# Where a policy left off, from the memory of its last output: (position, retries, last app message)
+def parse_memory(memory):
+    match = MEMORY_RE.match(memory or '')
+    if match is None:
+        return 0, 0, ''
+    return int(match.group(2)), int(match.group(3)), match.group(4) or ''
+
+
+def _output(kind, position, total, retries, last_message, goal, actions):
+    memory = f'{kind} step {position}/{total}, retries {retries}.'
+    if last_message:
+        memory += f' Last app message: {last_message}'
+    return {
+        'current_state': {
+            'evaluation_previous_goal': f'Unknown - {kind.lower()}',
+            'memory': memory,
+            'next_goal': goal,
+        },
+        'action': actions,
+    }
+
+
+def _action(op, elements, last_message):
+    kind = op[0]
+    if kind == 'go':
+        return {'go_to_url': {'url': op[1]}}
+    if kind == 'key':
+        return {'send_keys': {'keys': op[1]}}
+    if kind == 'done':
+        return {'done': {'text': last_message or 'No result message found on the page.'}}
+    index = find_element(elements, op[1])
+    if index is None:
+        return None
+    if kind == 'input':
+        return {'input_text': {'index': index, 'text': op[2]}}
+    if kind == 'click':
+        return {'click_element': {'index': index}}
+    raise ValueError(f'Unknown script op: {kind}')
+
+
+# Next AgentOutput (as a dict) for `script`, given the latest state message and
+# the memory of this policy's previous output (None on the first call)
+def script_output(script, state_text, previous_memory=None, max_retries=5):
+    position, retries, last_message = parse_memory(previous_memory)
+    found = MESSAGE_RE.findall(page_text(state_text))
+    if found:
+        last_message = found[-1]
+
+    step = script[position] if position < len(script) else [('done',)]
+    elements = page_elements(state_text)
+    actions = [_action(op, elements, last_message) for op in step]
+    missing = [op for op, action in zip(step, actions) if action is None]
+    if not missing:
+        goal = ', '.join(' '.join(str(part) for part in op) for op in step)
+        return _output('Scripted', position + 1, len(script), 0, last_message, goal, actions)
+    if retries >= max_retries:
+        actions = [{'done': {'text': f'Could not find "{missing[0][1]}" on the page.'}}]
+        return _output('Scripted', len(script), len(script), retries, last_message, 'Give up', actions)
+    actions = [{'scroll_to_text': {'text': missing[0][1]}}]
+    return _output('Scripted', position, len(script), retries + 1, last_message,
+                   f'Wait for "{missing[0][1]}"', actions)
+
+
+# Next AgentOutput replaying recorded steps ({'actions', 'goal'} dicts, e.g. a
+# trace_cache entry), then done
+def replay_output(steps, previous_memory=None):
+    position, _, _ = parse_memory(previous_memory)
+    if position >= len(steps):
+        return _output('Replayed', position, len(steps), 0, '', 'Finish',
+                       [{'done': {'text': 'Replay finished.'}}])
+    step = steps[position]
+    return _output('Replayed', position + 1, len(steps), 0, '', step.get('goal', ''), step['actions'])
+
+
+def task_text(text):
+    match = TASK_RE.search(text or '')
+    return match.group(1) if match else None
+
+
+class ScriptedChatModel(BaseChatModel):
+    script: list
+    max_retries: int = 5
+    model_name: str = 'scripted'
+
+    _calls: int = PrivateAttr(default=0)
+
+    @property
+    def _llm_type(self):
+        return 'scripted'
+
+    @property
+    def calls(self):
+        return self._calls
+
+    # with_structured_output() binds the AgentOutput schema as a tool; the script
+    # already answers in that shape
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        self._calls += 1
+        state = ''
+        previous_memory = None
+        for message in messages:
+            if isinstance(message, HumanMessage):
+                content = message.content
+                if isinstance(content, list):
+                    content = '\n'.join(part.get('text', '') for part in content if isinstance(part, dict))
+                state = content
+            elif isinstance(message, AIMessage):
+                for call in message.tool_calls:
+                    memory = call['args'].get('current_state', {}).get('memory', '')
+                    if MEMORY_RE.match(memory):
+                        previous_memory = memory
+        output = script_output(self.script, state, previous_memory, self.max_retries)
+        message = AIMessage(content='', tool_calls=[{'name': 'AgentOutput', 'args': output, 'id': f'call_{self._calls}'}])
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,119 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+
+import streamlit as st
+
+# Buffered log streaming into a Streamlit page.
+#
+# emit() only formats the record and appends it to an in-memory buffer under a
+# lock, so it stays cheap on the agent's event loop and never calls Streamlit
+# from a thread that has no script context. The script thread drives the display
+# with pump()/flush(), which redraw a single placeholder at most every
+# `flush_interval` seconds, or sooner once `max_pending` records are waiting.
+#
+# Records are grouped per agent step (a new group starts at each "📍 Step" line).
+# The current step is shown in full and earlier steps are collapsed into an
+# expander. Only the last `max_steps` steps are kept, so redraw cost and memory
+# stay bounded however long the run is.
+
+STEP_MARKER = '📍 Step'
+
+# The handler of the run whose context a record was logged from. Agent tasks
+# inherit it (asyncio copies context into tasks and to_thread calls), so several
+# runs sharing one process/event loop each see only their own records.
+_current_handler = contextvars.ContextVar('streamlit_log_handler', default=None)
+
+
+class StreamlitHandler(logging.Handler):
+    def __init__(self, placeholder=None, flush_interval=0.5, max_pending=50, max_steps=20, scoped=True):
+        super().__init__()
+        self.log_placeholder = placeholder
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.scoped = scoped
+        self._lock = threading.Lock()
+        self._steps = deque(maxlen=max_steps)
+        self._steps.append([])
+        self._dropped_steps = 0
+        self._pending = 0
+        self._last_flush = 0.0
+        self._wake = threading.Event()
+
+    # Make this handler the target for records logged from the current context
+    def bind(self):
+        return _current_handler.set(self)
+
+    def unbind(self, token):
+        _current_handler.reset(token)
+
+    def emit(self, record):
+        if self.scoped and _current_handler.get() is not self:
+            return
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        with self._lock:
+            if line.lstrip().startswith(STEP_MARKER) and self._steps[-1]:
+                if len(self._steps) == self._steps.maxlen:
+                    self._dropped_steps += 1
+                self._steps.append([])
+            self._steps[-1].append(line)
+            self._pending += 1
+            if self._pending >= self.max_pending:
+                self._wake.set()
+
+    # Redraw the placeholder if the interval has passed or enough records are waiting.
+    # force redraws whatever has been logged so far (e.g. into a new placeholder after a rerun).
+    # Must be called from the script thread.
+    def flush(self, force=False):
+        with self._lock:
+            due = (force and any(self._steps)) or (self._pending and (
+                self._pending >= self.max_pending
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            ))
+            if not due:
+                return
+            steps = [list(lines) for lines in self._steps]
+            dropped = self._dropped_steps
+            self._pending = 0
+            self._wake.clear()
+            self._last_flush = time.monotonic()
+
+        if self.log_placeholder is None:
+            self.log_placeholder = st.empty()
+        with self.log_placeholder.container():
+            earlier, current = steps[:-1], steps[-1]
+            if earlier:
+                label = f"Earlier steps ({dropped + len(earlier)})"
+                with st.expander(label, expanded=False):
+                    if dropped:
+                        st.caption(f"{dropped} older steps not shown")
+                    for lines in earlier:
+                        st.text('\n'.join(lines))
+            with st.chat_message("assistant"):
+                st.text('\n'.join(current))
+
+    # Wake pump() as soon as `future` finishes. Call once per run, when it is created;
+    # pump() itself runs on every Streamlit rerun.
+    def watch(self, future):
+        future.add_done_callback(lambda _: self._wake.set())
+
+    # Flush until `future` (a concurrent.futures.Future) finishes, or stop waiting as soon
+    # as `until()` is true. Wakes every flush_interval, early when max_pending records are
+    # waiting, and when a watched future finishes. Never raises the run's exception; the
+    # caller inspects the future.
+    def pump(self, future, until=None):
+        try:
+            while not future.done():
+                if until is not None and until():
+                    return
+                self._wake.wait(self.flush_interval)
+                self._wake.clear()
+                self.flush()
+        finally:
+            self.flush(force=True)
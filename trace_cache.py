@@ -0,0 +1,228 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+# Replay cache for agent action traces.
+#
+# At temperature 0 the same task against the same app follows nearly the same
+# action sequence every run. After a successful run we store its steps, keyed by
+# the task, each with a fingerprint of the page it acted on. The next run replays
+# those steps straight through the controller, with no LLM call, for as long as
+# the live page still matches the fingerprint and every action succeeds. It then
+# hands the rest of the task (at least the final `done` step, so results are
+# always reported from the live page) to the agent. A mismatch or a failed action
+# truncates the cached trace at that step; the agent's own steps from there on are
+# recorded again, so the entry heals on the next successful run.
+#
+# Cached actions keep the <secret>name</secret> placeholders the model produced;
+# real values are substituted by the controller at execution time and never
+# written to disk.
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.trace_cache')
+
+
+def task_key(task):
+    normalized = re.sub(r'\s+', ' ', task).strip()
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+# Fingerprint of the page as far as one step's actions are concerned: the URL
+# (without fragment), the title and, for every action that targets an element
+# index, that element's tag and xpath. Text that changes between runs (balances,
+# messages) is deliberately left out; element identity is what replay relies on.
+def page_fingerprint(state, actions):
+    parts = [state.url.split('#')[0], state.title]
+    for action in actions:
+        # actions look like {'click_element': {'index': 9}}
+        params = next(iter(action.values()), None)
+        index = params.get('index') if isinstance(params, dict) else None
+        if index is None:
+            continue
+        element = state.selector_map.get(index)
+        parts.append(f"{index}:{element.tag_name}:{element.xpath}" if element is not None else f"{index}:missing")
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+class TraceCache:
+    def __init__(self, root=DEFAULT_CACHE_DIR, max_entries=200, max_age=7 * 24 * 3600):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.root, f"{key}.json")
+
+    def _write(self, key, entry):
+        path = self._path(key)
+        tmp = f"{path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp, path)
+
+    # Cached entry for the task, or None. Entries older than max_age are dropped.
+    def get(self, task):
+        key = task_key(task)
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        if time.time() - entry['created'] > self.max_age or not entry['steps']:
+            self.delete(task)
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry['last_used'] = time.time()
+        self._write(key, entry)
+        return entry
+
+    # steps: [{'fingerprint': str, 'actions': [action dicts], 'goal': str}, ...]
+    def put(self, task, steps):
+        self._write(task_key(task), {
+            'created': time.time(),
+            'last_used': time.time(),
+            'steps': steps,
+        })
+        self._evict()
+
+    # Drop the trace from step `from_step` onward (the whole entry when 0)
+    def invalidate(self, task, from_step=0):
+        self.invalidations += 1
+        key = task_key(task)
+        if from_step <= 0:
+            self.delete(task)
+            return
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return
+        entry['steps'] = entry['steps'][:from_step]
+        self._write(key, entry)
+
+    def delete(self, task):
+        try:
+            os.remove(self._path(task_key(task)))
+        except OSError:
+            pass
+
+    # Least recently used entries go first once there are more than max_entries
+    def _evict(self):
+        paths = [os.path.join(self.root, name) for name in os.listdir(self.root) if name.endswith('.json')]
+        if len(paths) <= self.max_entries:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'invalidations': self.invalidations}
+
+
+# Step callback for Agent(register_new_step_callback=...): remembers the page
+# fingerprint each model output was produced against, so a finished run can be
+# turned into cacheable steps.
+class TraceRecorder:
+    def __init__(self):
+        self._fingerprints = {}
+
+    def __call__(self, state, model_output, step):
+        actions = [a.model_dump(exclude_unset=True) for a in model_output.action]
+        self._fingerprints[id(model_output)] = page_fingerprint(state, actions)
+
+    # Cacheable steps from an agent history: steps whose actions all succeeded,
+    # stopping before the step that calls `done`
+    def steps(self, history):
+        steps = []
+        for item in history.history:
+            if item.model_output is None:
+                continue
+            actions = [a.model_dump(exclude_unset=True) for a in item.model_output.action]
+            if any('done' in action for action in actions):
+                break
+            fingerprint = self._fingerprints.get(id(item.model_output))
+            if fingerprint is None or any(r.error for r in item.result):
+                continue
+            steps.append({
+                'fingerprint': fingerprint,
+                'actions': actions,
+                'goal': item.model_output.current_state.next_goal,
+            })
+        return steps
+
+
+# Replay cached steps for `task` on the agent's browser context and return the
+# steps that were replayed. Stops at the first step whose fingerprint no longer
+# matches or whose actions fail, and truncates the cache there.
+async def replay(agent, cache, task):
+    entry = cache.get(task)
+    if entry is None:
+        return []
+
+    action_model = agent.controller.registry.create_action_model()
+    replayed = []
+    for i, step in enumerate(entry['steps']):
+        state = await agent.browser_context.get_state()
+        if page_fingerprint(state, step['actions']) != step['fingerprint']:
+            logger.info(f'🔁 Replay diverged at cached step {i + 1}: page changed')
+            cache.invalidate(task, from_step=i)
+            break
+        try:
+            actions = [action_model(**action) for action in step['actions']]
+            results = await agent.controller.multi_act(
+                actions,
+                agent.browser_context,
+                page_extraction_llm=agent.page_extraction_llm,
+                sensitive_data=agent.sensitive_data,
+            )
+        except Exception as e:
+            results = None
+            logger.info(f'🔁 Replay failed at cached step {i + 1}: {e}')
+        if not results or len(results) < len(actions) or any(r.error for r in results):
+            logger.info(f'🔁 Replay stopped at cached step {i + 1}; handing over to the agent')
+            cache.invalidate(task, from_step=i)
+            break
+        logger.info(f'🔁 Replayed cached step {i + 1}/{len(entry["steps"])}: {step["goal"]}')
+        replayed.append(step)
+    return replayed
+
+
+# Run `agent` with the replay cache: replay what is cached, tell the agent which
+# goals are already done, let it finish, and store the combined trace if the run
+# succeeds. Returns the agent's history.
+async def run_with_replay(agent, cache, max_steps=100):
+    task = agent.task
+    replayed_steps = await replay(agent, cache, task)
+    if replayed_steps:
+        completed = '\n'.join(f"- {step['goal']}" for step in replayed_steps)
+        agent.add_new_task(
+            f"{task}\n\nThese steps of the task have already been completed in this browser:\n{completed}\n"
+            "Continue from the current page; do not repeat them."
+        )
+
+    recorder = TraceRecorder()
+    previous_callback = agent.register_new_step_callback
+
+    def on_step(state, model_output, step):
+        recorder(state, model_output, step)
+        if previous_callback:
+            previous_callback(state, model_output, step)
+
+    agent.register_new_step_callback = on_step
+    history = await agent.run(max_steps=max_steps)
+    if history.is_done():
+        cache.put(task, replayed_steps + recorder.steps(history))
+    return history
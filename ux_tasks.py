@@ -0,0 +1,116 @@
+# Prompts for the advisor app UX tests, shared by the Streamlit runner (BrowserUse.py),
+# the multi-task executor and the benchmarks.
+
+# The app URL the prompts name; runs against an app elsewhere swap it with with_app_url()
+APP_URL = 'http://localhost:8501/'
+
+
+def with_app_url(task, url):
+    return task.replace(APP_URL, url)
+
+
+dummy_fa_app_ux_test_framework_task = """
+You are are helpful robotic process automation tester. 
+I will provide you with a task that you are to test on a given app. 
+
+You must always start by going to http://localhost:8501/ and logging in with my username and password for the banking site, and always finish with logging out of the site after the below steps are complete.
+
+Here is the specific test goal and the steps you should take:
+"""
+
+ux_test_buy_enough_task = """
+You are testing a financial advisor order entry system. You are to test the ability to buy shares for a client if they have enough funds.
+- Buy 20 shares of Morgan Stanley for Client B.
+- Ensure that the transaction is successful as they have enough investment balance. You should capture the exact text of the resulting message.
+"""
+
+ux_test_buy_task_not_enough = """
+You are testing a financial advisor order entry system. You are to test the ability to buy shares for a client if they do not have enough funds.
+- Buy 100000 shares of Morgan for Client B. 
+- This should fail as they do not have enough money. You should capture the exact text of the resulting message.
+"""
+
+ux_test_sell_not_enough_task = """
+You are testing a financial advisor order entry system. You are to test the ability to sell shares for a client if they do not have enough shares.
+- Attempt to sell 10 shares of Microsoft for Client A. 
+- This should fail as they do not own any Microsoft shares. You should capture the exact text of the resulting message.
+"""
+
+ux_test_sell_task = """
+You are testing a financial advisor order entry system. You are to test the ability to sell shares for a client if they have enough shares. 
+- Sell all of Client C's NVIDIA shares. You should capture the exact text of the resulting message. 
+"""
+
+
+# The combined banking + Gmail demo (browserusetest.py, planner.py). Uses the
+# sensitive_data placeholders username/password and banking_username/banking_password
+bank_email_task = """
+You are a financial advisor's assistant.
+Go to http://localhost:8501/ and login with my username and password.
+Then, do the following: 
+Capture the current state of the accounts.
+Sell all of Client C's NVIDIA shares and spend as much as possible on MS
+If client does not have enough money or shares you should stop and move on to the next step.
+You should then return to the main client menu and capture all my client metrics and print them out in a nice simple report.
+Finally, when you are done, log out of the website.
+
+Then, go to Gmail and log in with my credentials and draft an email. 
+When using email interface, when entering who to address it to, each person's email should be entered seperately. After typing each individual person's email, you should type it and then hit enter before proceeding to the next person. 
+The email must have the following:
+Addressee are the following: pradeep.sundaram@morganstanley.com; mainak.saha@morganstanley.com; timothy.eng@morganstanley.com;
+You should CC timothy.eng@outlook.com. 
+The subject should be 'Sample banking transaction with a dummy app - no hands!' 
+The body should contain, nicely formatted, the client metrics both before and after updated to reflect the changes you executed.
+You should reformat the metrics before and after to be human readable - replace new lines with enter, escape sequences with their actual characters, etc. 
+Make an additional note in the body saying Hi! and about how I didn't have to lift a finger to write the email, and about how cool Operator is and how potentially it could be quite powerful, given the correct guardrails.
+Sign it Best, Tim
+
+After doing all this make sure you've set up all the email components I've specified correctly. Do not send the email until all the above conditions have been met.
+After doing that, send the email. 
+Wait for it to send before closing. Check that it shows up in sent mail. 
+"""
+
+
+# Name -> full agent task (framework preamble + test steps)
+UX_TEST_TASKS = {
+    'buy_enough': dummy_fa_app_ux_test_framework_task + ux_test_buy_enough_task,
+    'buy_not_enough': dummy_fa_app_ux_test_framework_task + ux_test_buy_task_not_enough,
+    'sell': dummy_fa_app_ux_test_framework_task + ux_test_sell_task,
+    'sell_not_enough': dummy_fa_app_ux_test_framework_task + ux_test_sell_not_enough_task,
+}
+
+
+# Scripted runs of the same tests for scripted_llm.ScriptedChatModel (offline
+# benchmarks), and the app message each test must end with
+def _order_script(url, client, side, equity, shares):
+    return [
+        [('go', url)],
+        [('input', 'Username', '<secret>banking_username</secret>')],
+        [('input', 'Password', '<secret>banking_password</secret>')],
+        [('click', 'Login')],
+        [('click', 'Manage Investments')],
+        [('input', 'Select Client', client), ('key', 'Enter')],
+        [('input', 'Transaction Type', side), ('key', 'Enter')],
+        [('input', 'Select Equity', equity), ('key', 'Enter')],
+        [('input', 'Number of Shares', str(shares)), ('key', 'Enter')],
+        [('click', 'Execute')],
+        [('click', 'Logout')],
+        [('done',)],
+    ]
+
+
+def ux_test_script(name, url=APP_URL):
+    return {
+        'buy_enough': lambda: _order_script(url, 'Client B', 'Buy', 'Morgan Stanley', 20),
+        'buy_not_enough': lambda: _order_script(url, 'Client B', 'Buy', 'Morgan Stanley', 100000),
+        'sell': lambda: _order_script(url, 'Client C', 'Sell', 'Nvidia', 3),
+        'sell_not_enough': lambda: _order_script(url, 'Client A', 'Sell', 'Microsoft', 10),
+    }[name]()
+
+
+UX_TEST_EXPECTED = {
+    'buy_enough': r'Successfully bought 20 shares of Morgan Stanley for Client B',
+    'buy_not_enough': r'Insufficient funds to complete the purchase\.',
+    'sell': r'Successfully sold 3 shares of Nvidia for Client C',
+    'sell_not_enough': r'Insufficient shares to complete the sale\.',
+}